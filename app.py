@@ -10,20 +10,27 @@ import sys
 import re
 import json
 import subprocess
+import threading
 import importlib.util
 from pathlib import Path
-from datetime import datetime, timedelta, timezone
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from operator import itemgetter
 from typing import Optional
 
 ROOT = Path(__file__).parent
 EV_MIN_APP = float(os.getenv("PINNACLE_EV_MIN_APP", "0.15"))
+DRAFT_ROLES = ["TOP", "JUNG", "MID", "ADC", "SUP"]
 for _path in [str(ROOT / "odds_analysis"), str(ROOT / "bets_tracker"), str(ROOT)]:
     if _path not in sys.path:
         sys.path.insert(0, _path)
 
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import sqlite3
 import pandas as pd
+import numpy as np
 
 # Draft ao vivo (LoL Esports)
 import lolesports_live_draft as ls_draft
@@ -37,7 +44,7 @@ from bets_database import (
     get_placed_bets,
     get_resolved_bets,
     get_bet_by_id,
-    save_bet,
+    upsert_bet_placed,
     init_database,
 )
 
@@ -70,12 +77,94 @@ st.set_page_config(
 # ═══════════════════════════════════════════════════════════════
 
 
+@lru_cache(maxsize=4)
+def _day_str(delta_days: int, day_bucket: int) -> str:
+    """'YYYY-MM-DD' de day_bucket (date ordinal) + delta_days; o bucket vira à meia-noite."""
+    return (date.fromordinal(day_bucket) + timedelta(days=delta_days)).isoformat()
+
+
 def _today() -> str:
-    return datetime.now().strftime("%Y-%m-%d")
+    return _day_str(0, datetime.now().toordinal())
 
 
 def _tomorrow() -> str:
-    return (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    return _day_str(1, datetime.now().toordinal())
+
+
+# Cloud é read-only: o mtime não muda, então basta um TTL longo como rede de segurança.
+_DB_CACHE_TTL = 3600 if IS_CLOUD else None
+
+
+def _db_mtime(db_path: Path) -> int:
+    """Chave de cache do banco: maior mtime entre o arquivo e o -wal (0 se não existir)."""
+    mtime = 0
+    for p in (db_path, db_path.with_name(db_path.name + "-wal")):
+        try:
+            mtime = max(mtime, p.stat().st_mtime_ns)
+        except OSError:
+            pass
+    return mtime
+
+
+@st.cache_data(ttl=_DB_CACHE_TTL, show_spinner=False)
+def _cached_bet_stats(db_path_str: str, mtime: int) -> dict:
+    return get_bet_stats(db_path=Path(db_path_str))
+
+
+@st.cache_data(ttl=_DB_CACHE_TTL, show_spinner=False)
+def _cached_resolved_ev15(db_path_str: str, mtime: int) -> list[dict]:
+    return fetch_resolved_ev15(Path(db_path_str))
+
+
+@st.cache_data(ttl=_DB_CACHE_TTL, show_spinner=False)
+def _cached_resolved_df(db_path_str: str, mtime: int, method: str) -> pd.DataFrame:
+    """build_df das resolvidas EV15+ já filtrado por método; compartilhado por Dashboard e Performance."""
+    return _apply_method_filter_df(build_df(_cached_resolved_ev15(db_path_str, mtime)), method)
+
+
+@st.cache_data(ttl=_DB_CACHE_TTL, show_spinner=False)
+def _cached_bets_by_date(db_path_str: str, mtime: int, date_start: str, date_end: str | None = None,
+                         min_ev: float | None = None, metodo: tuple[str, ...] | None = None,
+                         exclude_metodo: tuple[str, ...] | None = None) -> list[dict]:
+    return get_bets_by_date(date_start, date_end, db_path=Path(db_path_str),
+                            min_ev=min_ev, metodo=metodo, exclude_metodo=exclude_metodo)
+
+
+def _frame_hash(df: pd.DataFrame) -> tuple:
+    """Chave de cache de um DataFrame: colunas + hash do conteúdo (com índice)."""
+    return tuple(df.columns), int(pd.util.hash_pandas_object(df, index=True).sum())
+
+
+_FRAME_HASH_FUNCS = {pd.DataFrame: _frame_hash}
+# Caches por conteúdo de DataFrame: cada filtro gera um hash novo; sem TTL local, limita as entradas
+_FRAME_CACHE_ENTRIES = 16
+
+
+@st.cache_data(ttl=_DB_CACHE_TTL, max_entries=_FRAME_CACHE_ENTRIES, show_spinner=False,
+               hash_funcs=_FRAME_HASH_FUNCS)
+def _cached_summary(df: pd.DataFrame) -> dict:
+    return summary_stats(df)
+
+
+@st.cache_data(ttl=_DB_CACHE_TTL, max_entries=_FRAME_CACHE_ENTRIES, show_spinner=False,
+               hash_funcs=_FRAME_HASH_FUNCS)
+def _cached_agg(df: pd.DataFrame, group_col: str) -> pd.DataFrame:
+    return agg_stats(df, group_col)
+
+
+@st.cache_data(ttl=_DB_CACHE_TTL, max_entries=_FRAME_CACHE_ENTRIES, show_spinner=False,
+               hash_funcs=_FRAME_HASH_FUNCS)
+def _cached_pl_curve(df: pd.DataFrame) -> pd.DataFrame:
+    return build_pl_curve(df)
+
+
+def _method_filter_sql(method: str) -> dict:
+    """kwargs de get_bets_by_date para o filtro de método da sidebar (Empírico = tudo que não é ML)."""
+    if method == "ML":
+        return {"metodo": ("ml",)}
+    if method == "Todos":
+        return {}
+    return {"exclude_metodo": ("ml",)}
 
 
 @st.cache_data(ttl=180)
@@ -119,8 +208,10 @@ def _games_today_tomorrow():
     return today, tomorrow
 
 
-def _champions_from_history():
-    """Lista de campeões únicos em lol_history (compositions), com fallback para champions.json."""
+@st.cache_data(ttl=_DB_CACHE_TTL, show_spinner=False)
+def _champions_from_history(mtime: int = 0):
+    """Lista de campeões únicos em lol_history (compositions), com fallback para champions.json.
+    mtime = _db_mtime(HISTORY_DB), só para invalidar o cache."""
     champs: set[str] = set()
 
     # Fonte 1: banco lol_history.db (local)
@@ -152,7 +243,8 @@ def _champions_from_history():
     return sorted(champs)
 
 
-def _leagues_from_history():
+@st.cache_data(ttl=_DB_CACHE_TTL, show_spinner=False)
+def _leagues_from_history(mtime: int = 0):
     """Ligas únicas em lol_history."""
     if not HISTORY_DB.exists():
         return []
@@ -164,29 +256,29 @@ def _leagues_from_history():
     return out
 
 
-def _teams_by_league(league: str):
-    """Times por liga (matchups t1/t2)."""
-    if not HISTORY_DB.exists() or not league:
-        return []
+@st.cache_data(ttl=_DB_CACHE_TTL, show_spinner=False)
+def _teams_by_league_all(mtime: int = 0) -> dict[str, list[str]]:
+    """{liga: times} de lol_history (matchups t1/t2), numa única query."""
+    if not HISTORY_DB.exists():
+        return {}
     conn = sqlite3.connect(HISTORY_DB)
     cur = conn.cursor()
-    cur.execute(
-        "SELECT DISTINCT t1 AS t FROM matchups WHERE league = ? "
-        "UNION SELECT t2 FROM matchups WHERE league = ? ORDER BY t",
-        (league, league),
-    )
-    out = [r[0] for r in cur.fetchall() if r[0]]
+    cur.execute("SELECT league, t1 FROM matchups UNION SELECT league, t2 FROM matchups")
+    out: dict[str, list[str]] = {}
+    for league, team in cur.fetchall():
+        if league and team:
+            out.setdefault(league, []).append(team)
     conn.close()
+    for teams in out.values():
+        teams.sort()
     return out
 
 
-def _apply_method_filter(bets: list, method: str) -> list:
-    """Filtra lista de bets por método (sidebar)."""
-    if method == "Todos":
-        return bets
-    if method == "ML":
-        return [b for b in bets if (b.get("metodo") or "").lower() == "ml"]
-    return [b for b in bets if (b.get("metodo") or "").lower() != "ml"]
+def _teams_by_league(league: str):
+    """Times por liga (matchups t1/t2)."""
+    if not league:
+        return []
+    return _teams_by_league_all(_db_mtime(HISTORY_DB)).get(league, [])
 
 
 def _apply_method_filter_df(df: pd.DataFrame, method: str) -> pd.DataFrame:
@@ -203,24 +295,43 @@ def _apply_method_filter_df(df: pd.DataFrame, method: str) -> pd.DataFrame:
 # ═══════════════════════════════════════════════════════════════
 
 
+@st.cache_resource(show_spinner=False)
+def _load_oa_config():
+    """odds_analysis/config.py (carregado uma vez; o `config` importável é o do bets_tracker)."""
+    spec = importlib.util.spec_from_file_location("odds_config", ROOT / "odds_analysis" / "config.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+@st.cache_resource(show_spinner=False)
+def _load_oa_normalizer():
+    """odds_analysis/normalizer.py (carregado uma vez, com `config` apontando para _load_oa_config)."""
+    _prev_config = sys.modules.get("config")
+    sys.modules["config"] = _load_oa_config()
+    try:
+        spec = importlib.util.spec_from_file_location("oa_normalizer", ROOT / "odds_analysis" / "normalizer.py")
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        return mod
+    finally:
+        if _prev_config is not None:
+            sys.modules["config"] = _prev_config
+        else:
+            sys.modules.pop("config", None)
+
+
 @st.cache_resource
 def _get_analyzer():
     import io
     import contextlib
-    import importlib.util
 
     f = io.StringIO()
-    _oa = ROOT / "odds_analysis"
 
-    _cfg_spec = importlib.util.spec_from_file_location("odds_config", _oa / "config.py")
-    _cfg_mod = importlib.util.module_from_spec(_cfg_spec)
-    _cfg_spec.loader.exec_module(_cfg_mod)
+    _cfg_mod = _load_oa_config()
+    _nz_mod = _load_oa_normalizer()
     _prev_config = sys.modules.get("config")
     sys.modules["config"] = _cfg_mod
-
-    _nz_spec = importlib.util.spec_from_file_location("oa_normalizer", _oa / "normalizer.py")
-    _nz_mod = importlib.util.module_from_spec(_nz_spec)
-    _nz_spec.loader.exec_module(_nz_mod)
     _prev_normalizer = sys.modules.get("normalizer")
     sys.modules["normalizer"] = _nz_mod
 
@@ -295,8 +406,16 @@ LOL_CHAMPION_ID_MAP = {
 }
 
 
-def _match_champ_to_options(champ_id: str, options: list[str]) -> str:
-    """Converte championId da API para string que existe no selectbox."""
+@st.cache_data(show_spinner=False)
+def _champ_lookup(options: tuple[str, ...]) -> tuple[frozenset[str], dict[str, str]]:
+    """(opções, {_norm_key(opção): opção}) do selectbox de campeões, montado uma vez por lista."""
+    return frozenset(options), {_norm_key(o): o for o in options if o}
+
+
+def _match_champ_to_options(champ_id: str, options: list[str],
+                            lookup: tuple[frozenset[str], dict[str, str]] | None = None) -> str:
+    """Converte championId da API para string que existe no selectbox.
+    lookup = _champ_lookup(tuple(options)) evita remontar o índice a cada chamada."""
     if not champ_id:
         return ""
     raw = str(champ_id).strip()
@@ -309,11 +428,11 @@ def _match_champ_to_options(champ_id: str, options: list[str]) -> str:
         if camel and camel != raw:
             candidates.append(camel)
 
+    opt_set, opt_map = lookup or _champ_lookup(tuple(options))
     for c in candidates:
-        if c in options:
+        if c in opt_set:
             return c
 
-    opt_map = {_norm_key(o): o for o in options if o}
     for c in candidates:
         nk = _norm_key(c)
         if nk in opt_map:
@@ -334,6 +453,41 @@ def _match_champ_to_options(champ_id: str, options: list[str]) -> str:
     return ""
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_emp_ev_df(cols: dict[str, list]) -> pd.DataFrame:
+    """Tabela Empírico (EV+) a partir das colunas Side/Linha/Odd/Prob./EV%; ordenada por EV%."""
+    return pd.DataFrame(cols).sort_values("EV%", ascending=False)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_ml_df(cols: dict[str, list]) -> pd.DataFrame:
+    """Tabela ML por linha a partir de Linha/ML pred/P(OVER)/P(UNDER); ordenada por linha."""
+    df = pd.DataFrame(cols)
+    df["Status"] = np.where(df["ML pred"] != "", "✅ Confiante", "⚠ Abaixo do threshold")
+    df["ML pred"] = df["ML pred"].replace("", "—")
+    return df.sort_values("Linha")
+
+
+# value_bets do Draft+ML são montados no app com todas as chaves: itemgetter em vez de .get() por campo
+_VB_FIELDS = itemgetter("side", "line_value", "odd_decimal", "expected_value", "empirical_prob", "implied_prob")
+_VB_TABLE_FIELDS = itemgetter("line_value", "odd_decimal", "empirical_prob", "expected_value")
+_ML_FIELDS = itemgetter("ml_pred", "ml_prob_over", "ml_prob_under")
+_NO_ML = {"ml_pred": "", "ml_prob_over": None, "ml_prob_under": None}
+
+_CONV_COLUMNS = {
+    "side_up": "Side", "line": "Linha", "odd": "Odd", "ev": "EV%",
+    "ml_pred": "ML", "ml_prob_over": "P(O)", "ml_prob_under": "P(U)",
+}
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_conv_df(results_df: pd.DataFrame, sort_by_ev: bool = True) -> pd.DataFrame:
+    """Tabela de convergência (Side/Linha/Odd/EV%/ML/P(O)/P(U)) a partir do DataFrame de results."""
+    df = results_df[list(_CONV_COLUMNS)].rename(columns=_CONV_COLUMNS)
+    df["EV%"] = df["EV%"] * 100
+    return df.sort_values("EV%", ascending=False) if sort_by_ev else df
+
+
 def _draft_ml_build_bet_rows(
     results: list,
     value_bets: list,
@@ -368,9 +522,13 @@ def _draft_ml_build_bet_rows(
     rows = []
     for r in results:
         ev_val = r.get("ev")
-        if ev_val is None or float(ev_val) < EV_MIN_APP:
+        if ev_val is None:
+            continue
+        ev_val = float(ev_val)
+        if ev_val < EV_MIN_APP:
             continue
-        r_line = float(r["line"]) if r.get("line") is not None else None
+        r_line_raw = r.get("line")
+        r_line = float(r_line_raw) if r_line_raw is not None else None
         r_side_norm = _norm(r.get("side"))
         vb_match = next(
             (vb for vb in value_bets
@@ -381,6 +539,8 @@ def _draft_ml_build_bet_rows(
         )
         if not vb_match:
             continue
+        r_odd_raw = r.get("odd")
+        r_odd = float(r_odd_raw) if r_odd_raw and r_odd_raw > 0 else None
         rows.append({
             "matchup_id": matchup_id_sel,
             "game_date": game_date,
@@ -389,14 +549,14 @@ def _draft_ml_build_bet_rows(
             "away_team": team2_sel,
             "market_type": "total_kills",
             "mapa": mapa_val,
-            "line_value": float(r["line"]) if r.get("line") is not None else None,
-            "side": (r.get("side") or "").strip().lower() or "over",
-            "odd_decimal": float(r["odd"]) if r.get("odd") and r["odd"] > 0 else 1.0,
+            "line_value": r_line,
+            "side": r_side_norm or "over",
+            "odd_decimal": r_odd or 1.0,
             "metodo": "ml",
-            "expected_value": float(r["ev"]) if r.get("ev") is not None else 0.0,
-            "edge": float(r["ev"]) if r.get("ev") is not None else 0.0,
+            "expected_value": ev_val,
+            "edge": ev_val,
             "empirical_prob": vb_match.get("empirical_prob"),
-            "implied_prob": (1.0 / float(r["odd"])) if r.get("odd") and r["odd"] > 0 else None,
+            "implied_prob": (1.0 / r_odd) if r_odd else None,
             "historical_mean": vb_match.get("historical_mean"),
             "historical_std": vb_match.get("historical_std"),
             "historical_games": vb_match.get("historical_games"),
@@ -417,35 +577,46 @@ def _draft_ml_build_bet_rows(
 # ═══════════════════════════════════════════════════════════════
 
 
-def _calculated_prob(b: dict) -> float | None:
-    """Probabilidade calculada do evento para a aposta."""
-    p = b.get("empirical_prob")
-    if isinstance(p, (int, float)) and p > 0:
-        return float(p)
-    md = b.get("metadata")
-    if md:
-        if isinstance(md, str):
-            try:
-                md = json.loads(md)
-            except Exception:
-                md = None
-    if isinstance(md, dict):
-        side = (b.get("side") or "").lower().strip()
-        if side == "over":
-            p = md.get("ml_prob_over")
-        elif side == "under":
-            p = md.get("ml_prob_under")
-        else:
-            p = md.get("calculated_prob") or md.get("probability") or md.get("prob")
-        if isinstance(p, (int, float)) and p > 0:
-            return float(p)
-    return None
+def _parse_metadata(md) -> dict:
+    """metadata da aposta (dict ou JSON string) como dict."""
+    if isinstance(md, str) and md:
+        try:
+            md = json.loads(md)
+        except Exception:
+            md = None
+    return md if isinstance(md, dict) else {}
+
+
+def _calculated_prob(bets_df: pd.DataFrame) -> pd.Series:
+    """Probabilidade calculada do evento para cada aposta (vetorizado sobre o DataFrame de bets)."""
+    n = len(bets_df)
+    if n == 0:
+        return pd.Series(dtype="float64")
+
+    def _col(name):
+        return bets_df[name] if name in bets_df.columns else pd.Series([None] * n, index=bets_df.index)
+
+    emp = pd.to_numeric(_col("empirical_prob"), errors="coerce")
+    md = _col("metadata").map(_parse_metadata)
+    side = _col("side").fillna("").astype(str).str.lower().str.strip()
+    ml_over = pd.to_numeric(md.map(lambda m: m.get("ml_prob_over")), errors="coerce")
+    ml_under = pd.to_numeric(md.map(lambda m: m.get("ml_prob_under")), errors="coerce")
+    md_other = pd.to_numeric(
+        md.map(lambda m: m.get("calculated_prob") or m.get("probability") or m.get("prob")),
+        errors="coerce",
+    )
+    md_prob = pd.Series(
+        np.where(side.eq("over"), ml_over, np.where(side.eq("under"), ml_under, md_other)),
+        index=bets_df.index,
+    )
+    return emp.where(emp > 0).fillna(md_prob.where(md_prob > 0))
 
 
 def _build_bets_df(bets: list) -> pd.DataFrame:
     """Retorna DataFrame com dados das apostas, ordenados por game_date e mapa."""
     rows = []
-    for b in bets:
+    probs = _calculated_prob(pd.DataFrame(bets)).tolist() if bets else []
+    for b, prob in zip(bets, probs):
         ev = (b.get("expected_value") or 0) * 100
         metodo = "ML" if (b.get("metodo") or "").lower() == "ml" else "Empírico"
         jogo = f"{b['home_team']} vs {b['away_team']}"
@@ -453,8 +624,7 @@ def _build_bets_df(bets: list) -> pd.DataFrame:
         dt_str = game_date[:16].replace("T", " ") if game_date else ""
         mapa_val = b.get("mapa")
         mapa_display = f"Map {mapa_val}" if mapa_val is not None else ""
-        prob = _calculated_prob(b)
-        fair_odds = (1.0 / prob) if (prob is not None and prob > 0) else None
+        fair_odds = (1.0 / prob) if pd.notna(prob) else None
         rows.append({
             "id": b["id"],
             "matchup_id": b.get("matchup_id"),
@@ -488,22 +658,30 @@ def _get_placed_bets_keys(db_path=None) -> set:
     db_path = db_path or USER_BETS_DB
     if not db_path.exists():
         return set()
+    return _cached_placed_bets_keys(str(db_path), _db_mtime(db_path))
+
+
+@st.cache_data(ttl=_DB_CACHE_TTL, show_spinner=False)
+def _cached_placed_bets_keys(db_path_str: str, mtime: int) -> set:
     try:
-        placed = get_placed_bets(db_path=db_path)
-        keys = set()
-        for b in placed:
-            mapa = b.get("mapa") if b.get("mapa") is not None else -1
-            lv = b.get("line_value")
-            line_val = float(lv) if lv is not None else None
-            keys.add((
-                b.get("matchup_id"),
-                (b.get("market_type") or "total_kills").strip().lower(),
-                mapa,
-                line_val,
-                (b.get("side") or "").strip().lower(),
-                (b.get("metodo") or "probabilidade_empirica").strip().lower(),
-            ))
-        return keys
+        placed = get_placed_bets(db_path=Path(db_path_str))
+        if not placed:
+            return set()
+        df = pd.DataFrame(placed)
+        mapa = df["mapa"].astype(object).where(df["mapa"].notna(), -1)
+        line_val = pd.to_numeric(df["line_value"], errors="coerce").astype(object)
+        line_val = line_val.where(line_val.notna(), None)
+        market_type = df["market_type"].fillna("").str.strip().str.lower().replace("", "total_kills")
+        side = df["side"].fillna("").str.strip().str.lower()
+        metodo = df["metodo"].fillna("").str.strip().str.lower().replace("", "probabilidade_empirica")
+        return set(zip(
+            df["matchup_id"].tolist(),
+            market_type.tolist(),
+            mapa.tolist(),
+            line_val.tolist(),
+            side.tolist(),
+            metodo.tolist(),
+        ))
     except Exception:
         return set()
 
@@ -544,34 +722,55 @@ def _add_model_bet_to_user_db(model_bet_id: int) -> bool:
         "status": "feita",
         "metadata": md,
     }
-    new_id = save_bet(bet_data, db_path=USER_BETS_DB)
-    if new_id:
-        return True
-    conn = sqlite3.connect(USER_BETS_DB)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute(
-        """SELECT id, status FROM bets
-        WHERE matchup_id = ? AND market_type = ?
-          AND COALESCE(mapa, -1) = COALESCE(?, -1)
-          AND line_value = ? AND side = ? AND metodo = ?
-        ORDER BY id DESC LIMIT 1""",
-        (bet_data["matchup_id"], bet_data["market_type"], bet_data.get("mapa"),
-         bet_data.get("line_value"), bet_data["side"], bet_data.get("metodo", "probabilidade_empirica")),
-    )
-    row = cur.fetchone()
-    conn.close()
-    if not row:
-        return False
-    if str(row["status"]).lower().strip() == "pending":
-        return mark_bet_placed(int(row["id"]), db_path=USER_BETS_DB)
-    return True
+    return _upsert_user_bet(bet_data) is not None
 
 
 # ═══════════════════════════════════════════════════════════════
 # Shared UI components (DRY)
 # ═══════════════════════════════════════════════════════════════
 
+# column_config das tabelas: montados uma vez no import, não a cada rerun
+_COLS_AGG = {
+    "N": st.column_config.NumberColumn(format="%d"),
+    "WR%": st.column_config.NumberColumn(format="%.1f"),
+    "Lucro(u)": st.column_config.NumberColumn(format="%+.2f"),
+    "ROI%": st.column_config.NumberColumn(format="%.2f"),
+    "AvgOdd(W)": st.column_config.NumberColumn(format="%.2f"),
+}
+_COLS_METHOD_COMP = {
+    "N": st.column_config.NumberColumn(format="%d"),
+    "WR%": st.column_config.NumberColumn(format="%.1f"),
+    "Lucro (u)": st.column_config.NumberColumn(format="%+.2f"),
+    "ROI%": st.column_config.NumberColumn(format="%+.1f"),
+}
+_COLS_LAST_BETS = {
+    "Odd": st.column_config.NumberColumn("Odd", format="%.2f"),
+    "P/L (u)": st.column_config.NumberColumn("P/L (u)", format="%+.2f"),
+}
+_COLS_EMP_EV = {
+    "Linha": st.column_config.NumberColumn(format="%.1f"),
+    "Odd": st.column_config.NumberColumn(format="%.2f"),
+    "Prob.": st.column_config.NumberColumn(format="%.3f"),
+    "EV%": st.column_config.NumberColumn(format="%.1f"),
+}
+_COLS_ML_LINE = {
+    "P(OVER)": st.column_config.NumberColumn(format="%.3f"),
+    "P(UNDER)": st.column_config.NumberColumn(format="%.3f"),
+}
+_COLS_CONV = {
+    "Linha": st.column_config.NumberColumn(format="%.1f"),
+    "Odd": st.column_config.NumberColumn(format="%.2f"),
+    "EV%": st.column_config.NumberColumn(format="%.1f"),
+    "P(O)": st.column_config.NumberColumn(format="%.3f"),
+    "P(U)": st.column_config.NumberColumn(format="%.3f"),
+}
+_COLS_SCENARIOS = {
+    "N": st.column_config.NumberColumn(format="%d"),
+    "WR%": st.column_config.NumberColumn(format="%.1f"),
+    "Lucro(u)": st.column_config.NumberColumn(format="%+.2f"),
+    "ROI%": st.column_config.NumberColumn(format="%+.2f"),
+}
+
 
 def render_kpi_row(metrics: list[dict]):
     """Render row of KPI st.metric() cards.
@@ -584,6 +783,34 @@ def render_kpi_row(metrics: list[dict]):
             st.metric(m["label"], m["value"], delta=m.get("delta"))
 
 
+def render_period_profits(df: pd.DataFrame):
+    """KPIs de lucro Hoje / Ontem / 7 dias / 30 dias a partir de game_date_day_d + lucro_u.
+
+    O build_df já vem em ordem de game_date (ORDER BY do fetch), então cada janela é
+    um np.searchsorted + diferença de soma acumulada; só reordena se houver NaT/desordem.
+    """
+    dates = df["game_date_day_d"].to_numpy().astype("datetime64[D]")
+    lucro = df["lucro_u"].to_numpy()
+    if not pd.Index(dates).is_monotonic_increasing:
+        order = np.argsort(dates, kind="stable")  # NaT vai para o fim
+        dates, lucro = dates[order], lucro[order]
+    cum = np.concatenate(([0.0], np.cumsum(lucro)))
+    n_valid = int(np.searchsorted(dates, np.datetime64("NaT")))
+    t = np.datetime64(datetime.now().date(), "D")
+
+    def _sum(start, end=None) -> float:
+        i = int(np.searchsorted(dates[:n_valid], start))
+        j = int(np.searchsorted(dates[:n_valid], end)) if end is not None else n_valid
+        return float(cum[j] - cum[i])
+
+    render_kpi_row([
+        {"label": "Hoje", "value": f"{_sum(t, t + 1):+.2f}u"},
+        {"label": "Ontem", "value": f"{_sum(t - 1, t):+.2f}u"},
+        {"label": "7 dias", "value": f"{_sum(t - 6):+.2f}u"},
+        {"label": "30 dias", "value": f"{_sum(t - 29):+.2f}u"},
+    ])
+
+
 def render_pl_curve(df_curve: pd.DataFrame):
     """Render P/L cumulative line chart with Altair."""
     if df_curve.empty:
@@ -614,9 +841,48 @@ def render_pl_curve(df_curve: pd.DataFrame):
     )
 
 
+_AGG_COLS = ["N", "W", "L", "WR%", "Lucro(u)", "ROI%", "AvgOdd(W)"]
+
+
+def _render_agg_section(subset: pd.DataFrame, group_col: str, col_header: str, *,
+                        drop_dash: bool = False, show_chart: bool = True,
+                        order: list[str] | None = None, keep: tuple[str, ...] | None = None):
+    """Tabela agg_stats (cacheada) por group_col + gráfico de ROI% opcional; usada nas seções de Performance."""
+    agg = _cached_agg(subset, group_col)
+    if not agg.empty:
+        if keep is not None:
+            agg = agg[agg[group_col].isin(keep)]
+        if drop_dash:
+            agg = agg[agg[group_col] != "—"]
+        if order is not None:
+            # valores fora da ordem conhecida vão para o fim
+            cats = order + [v for v in agg[group_col].unique() if v not in order]
+            agg = agg.assign(**{group_col: pd.Categorical(agg[group_col], categories=cats, ordered=True)})
+            agg = agg.sort_values(group_col)
+    if agg.empty:
+        st.caption("Sem dados.")
+        return
+
+    def _table():
+        st.dataframe(
+            agg[[group_col] + _AGG_COLS],
+            width="stretch", hide_index=True,
+            column_config={group_col: st.column_config.TextColumn(col_header), **_COLS_AGG},
+        )
+
+    if not show_chart:
+        _table()
+        return
+    c1, c2 = st.columns([1, 1])
+    with c1:
+        _table()
+    with c2:
+        st.bar_chart(agg.set_index(group_col)[["ROI%"]])
+
+
 def render_map_filter(df: pd.DataFrame, key_prefix: str) -> pd.DataFrame:
     """Render map filter selectbox, returns filtered DataFrame."""
-    if "Mapa" not in df.columns:
+    if df.empty or "Mapa" not in df.columns:
         return df
     mapas = sorted(
         [m for m in df["Mapa"].unique() if pd.notna(m) and str(m).strip()], key=str,
@@ -629,44 +895,132 @@ def render_map_filter(df: pd.DataFrame, key_prefix: str) -> pd.DataFrame:
     return df
 
 
-def _row_placed_key(row) -> tuple | None:
-    """Build placed-check key from a DataFrame row."""
-    matchup_id = row.get("matchup_id")
-    market_type = (row.get("market_type") or "total_kills").strip().lower() if pd.notna(row.get("market_type")) else "total_kills"
-    mapa_raw = row.get("mapa_raw")
-    if pd.isna(mapa_raw) or mapa_raw is None:
+def _row_placed_key(row: tuple, col_idx: dict[str, int]) -> tuple | None:
+    """Build placed-check key from a DataFrame row (tuple from itertuples(name=None))."""
+    def _get(col):
+        i = col_idx.get(col)
+        return row[i] if i is not None else None
+
+    matchup_id = _get("matchup_id")
+    market_type = _get("market_type")
+    market_type = (market_type or "total_kills").strip().lower() if pd.notna(market_type) else "total_kills"
+    mapa_raw = _get("mapa_raw")
+    if mapa_raw is None or pd.isna(mapa_raw):
         mapa_raw = -1
-    line_val = row.get("Linha")
+    line_val = _get("Linha")
     line_val = float(line_val) if line_val is not None and pd.notna(line_val) else None
-    side = (row.get("side") or "").strip().lower() if pd.notna(row.get("side")) else ""
-    metodo = (row.get("metodo") or "probabilidade_empirica").strip().lower() if pd.notna(row.get("metodo")) else "probabilidade_empirica"
+    side = _get("side")
+    side = (side or "").strip().lower() if pd.notna(side) else ""
+    metodo = _get("metodo")
+    metodo = (metodo or "probabilidade_empirica").strip().lower() if pd.notna(metodo) else "probabilidade_empirica"
     return (matchup_id, market_type, mapa_raw, line_val, side, metodo)
 
 
-def _render_action_btn(row, idx, *, source, key_prefix, already_placed_keys, show_mark, show_remove):
-    """Render mark/remove button for a single bet row."""
-    status_val = str(row.get("Status", "")).lower().strip()
-    is_placed = False
+def _placed_flags(df: pd.DataFrame, already_placed_keys: set) -> list[bool]:
+    """Para cada linha do DataFrame, indica se a aposta já está em user_bets.db."""
+    col_idx = {c: i for i, c in enumerate(df.columns)}
+    return [
+        _row_placed_key(row, col_idx) in already_placed_keys
+        for row in df.itertuples(index=False, name=None)
+    ]
+
+
+_BETS_TABLE_COLS = {
+    "Mapa": "Mapa",
+    "Mercado": "Mercado",
+    "Odd": "Odd",
+    "fair_odds": "Fair",
+    "EV%": "EV%",
+    "Método": "Método",
+}
+
+
+def _style_mapa(v) -> str:
+    if v == "Map 1":
+        return "color:#007bff;font-weight:bold"
+    if v == "Map 2":
+        return "color:#ff6b35;font-weight:bold"
+    return ""
+
+
+def _style_ev(v) -> str:
+    return "color:#28a745;font-weight:bold" if pd.notna(v) and v > 0 else ""
+
+
+def _style_bets_view(view: pd.DataFrame):
+    """Styler com as cores de mapa/EV usadas nas tabelas de apostas."""
+    return (
+        view.style
+        .format({"Odd": "{:.2f}", "Fair": "{:.2f}", "EV%": "{:+.1f}%"}, na_rep="")
+        .map(_style_mapa, subset=["Mapa"])
+        .map(_style_ev, subset=["EV%"])
+    )
+
+
+def _on_bets_editor_change(editor_key: str, nonce_key: str, ids: list, actionable: list,
+                           action_col: str, source: str):
+    """Callback do data_editor: aplica mark/remove nas linhas marcadas."""
+    edited = (st.session_state.get(editor_key) or {}).get("edited_rows", {})
+    for pos, changes in edited.items():
+        pos = int(pos)
+        if not changes.get(action_col):
+            continue
+        if not actionable[pos]:
+            # CheckboxColumn não desabilita por linha: avisa em vez de ignorar em silêncio
+            st.toast("Aposta já marcada como feita." if action_col == "✓"
+                     else "Só apostas aguardando resultado podem ser removidas.", icon="ℹ️")
+            continue
+        bet_id = int(ids[pos])
+        if action_col == "✗":
+            unmark_bet_placed(bet_id, db_path=USER_BETS_DB)
+            # st.rerun é no-op em callback; o fragmento Aguardando reroda o app
+            st.session_state["_minhas_removed"] = True
+        elif source == "model":
+            _add_model_bet_to_user_db(bet_id)
+        else:
+            mark_bet_placed(bet_id, db_path=USER_BETS_DB)
+    # Novo nonce => novo widget, descarta o estado editado já aplicado
+    st.session_state[nonce_key] = st.session_state.get(nonce_key, 0) + 1
+
+
+def _render_bets_table(df: pd.DataFrame, *, editor_key: str, nonce_key: str, source: str,
+                       already_placed_keys: set, show_mark: bool, show_remove: bool):
+    """Render one bets table (styled data_editor with the mark/remove column, or read-only)."""
+    view = df[list(_BETS_TABLE_COLS)].rename(columns=_BETS_TABLE_COLS).reset_index(drop=True)
+    status = df["Status"].astype(str).str.lower().str.strip().tolist()
     if source == "model" and already_placed_keys:
-        rk = _row_placed_key(row)
-        is_placed = rk is not None and rk in already_placed_keys
-
-    if is_placed:
-        st.caption("✅")
-    elif status_val == "pending" and show_mark:
-        if st.button("✓", key=f"{key_prefix}mk_{idx}", help="Marcar como feita",
-                      width="stretch", type="secondary"):
-            ok = (_add_model_bet_to_user_db(int(row["id"])) if source == "model"
-                  else mark_bet_placed(int(row["id"]), db_path=USER_BETS_DB))
-            if ok:
-                st.rerun()
-    elif status_val == "feita" and show_remove:
-        if st.button("✗", key=f"{key_prefix}rm_{idx}", help="Remover",
-                      width="stretch", type="secondary"):
-            if unmark_bet_placed(int(row["id"]), db_path=USER_BETS_DB):
-                st.rerun()
+        placed = _placed_flags(df, already_placed_keys)
+    else:
+        placed = [False] * len(df)
+
+    disabled = list(_BETS_TABLE_COLS.values())
+    if show_mark:
+        action_col = "✓"
+        # Estado de feita numa coluna só leitura; ✓ começa desmarcado em todas as linhas
+        view["Feita"] = ["✅" if p or s == "feita" else "" for p, s in zip(placed, status)]
+        disabled.append("Feita")
+        view[action_col] = False
+        actionable = [s == "pending" and not p for p, s in zip(placed, status)]
+        action_help = "Marcar como feita"
+    elif show_remove:
+        action_col = "✗"
+        view[action_col] = False
+        actionable = [s == "feita" for s in status]
+        action_help = "Remover"
     else:
-        st.text("")
+        st.dataframe(_style_bets_view(view), width="stretch", hide_index=True)
+        return
+
+    st.data_editor(
+        _style_bets_view(view),
+        key=editor_key,
+        width="stretch",
+        hide_index=True,
+        disabled=disabled,
+        column_config={action_col: st.column_config.CheckboxColumn(action_col, help=action_help)},
+        on_change=_on_bets_editor_change,
+        args=(editor_key, nonce_key, df["id"].tolist(), actionable, action_col, source),
+    )
 
 
 def render_bets_grouped(df: pd.DataFrame, *, key_prefix: str, source: str,
@@ -677,11 +1031,15 @@ def render_bets_grouped(df: pd.DataFrame, *, key_prefix: str, source: str,
         st.info("Nenhuma aposta encontrada.")
         return
     already_placed_keys = already_placed_keys or set()
+    nonce_key = f"{key_prefix}editor_nonce"
+    nonce = st.session_state.get(nonce_key, 0)
 
-    if "matchup_id" in df.columns:
-        groups = df.groupby("matchup_id", sort=False)
+    group_col = "matchup_id" if "matchup_id" in df.columns else "Jogo"
+    if len(df) == 1:
+        # uma aposta só: um único grupo, sem passar pelo groupby
+        groups = [(df[group_col].iat[0], df)]
     else:
-        groups = df.groupby("Jogo", sort=False)
+        groups = df.groupby(group_col, sort=False)
 
     for _gkey, gdf in groups:
         first = gdf.iloc[0]
@@ -691,55 +1049,11 @@ def render_bets_grouped(df: pd.DataFrame, *, key_prefix: str, source: str,
 
         with st.container(border=True):
             st.markdown(f"**{liga}** — {jogo} &nbsp; `{dt_str}`")
-            # Column headers
-            hdr = st.columns([0.7, 1.6, 0.6, 0.6, 0.8, 0.6, 0.5])
-            hdr[0].caption("Mapa")
-            hdr[1].caption("Mercado")
-            hdr[2].caption("Odd")
-            hdr[3].caption("Fair")
-            hdr[4].caption("EV%")
-            hdr[5].caption("Método")
-            hdr[6].caption("")
-
-            for idx, row in gdf.iterrows():
-                cols = st.columns([0.7, 1.6, 0.6, 0.6, 0.8, 0.6, 0.5])
-                mapa = str(row.get("Mapa", "")) if pd.notna(row.get("Mapa")) else ""
-                with cols[0]:
-                    if mapa == "Map 1":
-                        st.markdown("<span style='color:#007bff;font-weight:bold'>Map 1</span>",
-                                    unsafe_allow_html=True)
-                    elif mapa == "Map 2":
-                        st.markdown("<span style='color:#ff6b35;font-weight:bold'>Map 2</span>",
-                                    unsafe_allow_html=True)
-                    else:
-                        st.text(mapa)
-                with cols[1]:
-                    st.text(str(row.get("Mercado", "")))
-                with cols[2]:
-                    odd = row.get("Odd")
-                    st.text(f"{float(odd):.2f}" if pd.notna(odd) else "")
-                with cols[3]:
-                    fair = row.get("fair_odds")
-                    st.text(f"{float(fair):.2f}" if pd.notna(fair) else "")
-                with cols[4]:
-                    ev = row.get("EV%", 0)
-                    if pd.notna(ev) and ev > 0:
-                        st.markdown(
-                            f"<span style='color:#28a745;font-weight:bold'>+{ev:.1f}%</span>",
-                            unsafe_allow_html=True,
-                        )
-                    elif pd.notna(ev):
-                        st.text(f"{ev:.1f}%")
-                    else:
-                        st.text("")
-                with cols[5]:
-                    st.text(str(row.get("Método", "")))
-                with cols[6]:
-                    _render_action_btn(
-                        row, idx, source=source, key_prefix=key_prefix,
-                        already_placed_keys=already_placed_keys,
-                        show_mark=show_mark, show_remove=show_remove,
-                    )
+            _render_bets_table(
+                gdf, editor_key=f"{key_prefix}editor_{_gkey}_{nonce}", nonce_key=nonce_key,
+                source=source, already_placed_keys=already_placed_keys,
+                show_mark=show_mark, show_remove=show_remove,
+            )
 
 
 def render_bets_flat(df: pd.DataFrame, *, key_prefix: str, source: str,
@@ -748,56 +1062,63 @@ def render_bets_flat(df: pd.DataFrame, *, key_prefix: str, source: str,
     """Render bets as a flat table with action buttons (used for Draft+ML and compact views)."""
     if df.empty:
         return
-    already_placed_keys = already_placed_keys or set()
+    nonce_key = f"{key_prefix}editor_nonce"
+    _render_bets_table(
+        df, editor_key=f"{key_prefix}editor_{st.session_state.get(nonce_key, 0)}", nonce_key=nonce_key,
+        source=source, already_placed_keys=already_placed_keys or set(),
+        show_mark=show_mark, show_remove=show_remove,
+    )
 
-    widths = [0.7, 1.6, 0.6, 0.6, 0.8, 0.6, 0.5]
-    hdr = st.columns(widths)
-    for h, col in zip(["Mapa", "Mercado", "Odd", "Fair", "EV%", "Método", ""], hdr):
-        col.markdown(f"**{h}**") if h else None
 
-    for idx, row in df.iterrows():
-        cols = st.columns(widths)
-        mapa = str(row.get("Mapa", "")) if pd.notna(row.get("Mapa")) else ""
-        with cols[0]:
-            if mapa == "Map 1":
-                st.markdown("<span style='color:#007bff;font-weight:bold'>Map 1</span>",
-                            unsafe_allow_html=True)
-            elif mapa == "Map 2":
-                st.markdown("<span style='color:#ff6b35;font-weight:bold'>Map 2</span>",
-                            unsafe_allow_html=True)
-            else:
-                st.text(mapa)
-        with cols[1]:
-            st.text(str(row.get("Mercado", "")))
-        with cols[2]:
-            odd = row.get("Odd")
-            st.text(f"{float(odd):.2f}" if pd.notna(odd) else "")
-        with cols[3]:
-            fair = row.get("fair_odds")
-            st.text(f"{float(fair):.2f}" if pd.notna(fair) else "")
-        with cols[4]:
-            ev = row.get("EV%", 0)
-            if pd.notna(ev) and ev > 0:
-                st.markdown(
-                    f"<span style='color:#28a745;font-weight:bold'>+{ev:.1f}%</span>",
-                    unsafe_allow_html=True,
-                )
-            elif pd.notna(ev):
-                st.text(f"{ev:.1f}%")
-            else:
-                st.text("")
-        with cols[5]:
-            st.text(str(row.get("Método", "")))
-        with cols[6]:
-            _render_action_btn(
-                row, idx, source=source, key_prefix=key_prefix,
-                already_placed_keys=already_placed_keys,
-                show_mark=show_mark, show_remove=show_remove,
-            )
+@st.fragment
+def _mark_placed_fragment(df: pd.DataFrame, *, key_prefix: str, source: str):
+    """Apostas agrupadas com ✓; marcar uma aposta reexecuta só este fragmento, não o app inteiro."""
+    render_bets_grouped(
+        df,
+        key_prefix=key_prefix,
+        source=source,
+        already_placed_keys=_get_placed_bets_keys(USER_BETS_DB),
+        show_mark=True,
+    )
+
 
+@st.cache_resource
+def _user_bets_conn() -> sqlite3.Connection:
+    """Conexão única com user_bets.db, reaproveitada entre reruns (escritas via _upsert_user_bet)."""
+    conn = sqlite3.connect(USER_BETS_DB, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@st.cache_resource
+def _user_bets_lock() -> threading.Lock:
+    return threading.Lock()
+
+
+def _upsert_user_bet(bet_data: dict) -> Optional[int]:
+    """upsert_bet_placed na conexão compartilhada, sob o lock e numa transação (`with conn`):
+    se falhar, faz rollback em vez de deixar o user_bets.db travado para o coletor e as outras sessões."""
+    conn = _user_bets_conn()
+    with _user_bets_lock(), conn:
+        return upsert_bet_placed(bet_data, conn=conn)
+
+
+def _rerun_fragment():
+    """st.rerun(scope="fragment"); se o fragmento está rodando dentro de uma rerun completa, reroda o app."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+def _draft_ml_bet_key(bd: dict) -> str:
+    """Chave estável de uma aposta Draft+ML (não depende da posição na tabela)."""
+    return (f"{bd.get('matchup_id')}|{bd.get('market_type')}|{bd.get('mapa')}|"
+            f"{bd.get('line_value')}|{bd.get('side')}|{bd.get('metodo')}")
 
-def _render_draft_ml_bets_table(bet_rows: list[dict], key_prefix: str = "draft_ml_"):
-    """Tabela de apostas Draft+ML com botão 'Marcar como feita'."""
+
+def _render_draft_ml_bets_table(bet_rows: dict[str, dict], key_prefix: str = "draft_ml_"):
+    """Tabela de apostas Draft+ML ({_draft_ml_bet_key: aposta}) com botão 'Marcar como feita'."""
     if not bet_rows:
         return
     try:
@@ -817,14 +1138,12 @@ def _render_draft_ml_bets_table(bet_rows: list[dict], key_prefix: str = "draft_m
             "ml",
         )
 
-    st.session_state["draft_ml_bet_rows"] = list(bet_rows)
-
     widths = [0.7, 1.6, 0.6, 0.6, 0.8, 0.6, 0.5]
     hdr = st.columns(widths)
     for h, col in zip(["Mapa", "Mercado", "Odd", "Fair", "EV%", "Método", ""], hdr):
         col.markdown(f"**{h}**") if h else None
 
-    for i, b in enumerate(bet_rows):
+    for bk, b in bet_rows.items():
         ev = (b.get("expected_value") or 0) * 100
         prob = b.get("empirical_prob")
         fair_odds = (1.0 / prob) if (prob is not None and prob > 0) else None
@@ -862,30 +1181,13 @@ def _render_draft_ml_bets_table(bet_rows: list[dict], key_prefix: str = "draft_m
             if is_placed:
                 st.caption("✅")
             else:
-                if st.button("✓", key=f"{key_prefix}mark_{i}", help="Marcar como feita",
+                if st.button("✓", key=f"{key_prefix}mark_{bk}", help="Marcar como feita",
                               width="stretch", type="secondary"):
-                    bet_data = st.session_state.get("draft_ml_bet_rows")
-                    if bet_data and i < len(bet_data):
-                        bd = bet_data[i]
-                        bid = save_bet(bd, db_path=USER_BETS_DB)
-                        if bid:
-                            if mark_bet_placed(bid, db_path=USER_BETS_DB):
-                                st.rerun()
-                        else:
-                            conn = sqlite3.connect(USER_BETS_DB)
-                            conn.row_factory = sqlite3.Row
-                            cur = conn.cursor()
-                            cur.execute(
-                                "SELECT id FROM bets WHERE matchup_id=? AND market_type=? "
-                                "AND COALESCE(mapa,-1)=COALESCE(?,-1) AND line_value=? "
-                                "AND side=? AND metodo=? ORDER BY id DESC LIMIT 1",
-                                (bd["matchup_id"], bd["market_type"], bd.get("mapa"),
-                                 bd["line_value"], bd["side"], bd["metodo"]),
-                            )
-                            ex = cur.fetchone()
-                            conn.close()
-                            if ex and mark_bet_placed(ex["id"], db_path=USER_BETS_DB):
-                                st.rerun()
+                    bd = (st.session_state.get("draft_ml_bet_rows") or {}).get(bk)
+                    if bd:
+                        bet_id = _upsert_user_bet(bd)
+                        if bet_id:
+                            _rerun_fragment()
                     else:
                         st.warning("Dados da aposta não encontrados.")
     return None
@@ -912,7 +1214,7 @@ with st.sidebar:
 
     # Quick KPIs
     if BETS_DB.exists():
-        _sb_stats = get_bet_stats(db_path=BETS_DB)
+        _sb_stats = _cached_bet_stats(str(BETS_DB), _db_mtime(BETS_DB))
         _sb_roi = _sb_stats.get("roi") or {}
         _sb_resolved = int(_sb_roi.get("total_resolved", 0))
         _sb_lucro = float(_sb_roi.get("lucro", 0))
@@ -950,26 +1252,40 @@ with st.sidebar:
     else:
         # Pipeline button (apenas local)
         if st.button("🔄 Atualizar Pipeline", width="stretch", type="primary"):
+            _pipe_log = st.empty()
+            _pipe_tail: deque[str] = deque(maxlen=200)
             with st.spinner("Rodando run_all.py..."):
                 try:
-                    _pipe_result = subprocess.run(
+                    _pipe_proc = subprocess.Popen(
                         [sys.executable, str(ROOT / "run_all.py")],
                         cwd=str(ROOT),
-                        capture_output=True,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
                         text=True,
-                        timeout=300,
+                        bufsize=1,
+                        env={**os.environ, "PYTHONUNBUFFERED": "1"},
                     )
-                    if _pipe_result.returncode == 0:
+                    # readline bloqueia: o timeout de 5 min mata o processo por fora
+                    _pipe_timer = threading.Timer(300, _pipe_proc.kill)
+                    _pipe_timer.start()
+                    try:
+                        for _pipe_line in _pipe_proc.stdout:
+                            _pipe_tail.append(_pipe_line)
+                            _pipe_log.code("".join(_pipe_tail))
+                        _pipe_rc = _pipe_proc.wait()
+                    finally:
+                        _pipe_timed_out = not _pipe_timer.is_alive() and _pipe_proc.returncode != 0
+                        _pipe_timer.cancel()
+                        # Interrupção (Ctrl+C, parada do script) ou erro no meio da leitura: não deixa o filho órfão
+                        if _pipe_proc.poll() is None:
+                            _pipe_proc.kill()
+                            _pipe_proc.wait()
+                    if _pipe_timed_out:
+                        st.error("Pipeline excedeu timeout de 5 min.")
+                    elif _pipe_rc == 0:
                         st.success("Pipeline concluído!")
                     else:
-                        st.error(f"Pipeline falhou (exit {_pipe_result.returncode})")
-                        with st.expander("Output"):
-                            if _pipe_result.stdout:
-                                st.code(_pipe_result.stdout[-2000:])
-                            if _pipe_result.stderr:
-                                st.code(_pipe_result.stderr[-2000:])
-                except subprocess.TimeoutExpired:
-                    st.error("Pipeline excedeu timeout de 5 min.")
+                        st.error(f"Pipeline falhou (exit {_pipe_rc})")
                 except Exception as _pipe_err:
                     st.error(f"Erro ao rodar pipeline: {_pipe_err}")
             st.rerun()
@@ -996,10 +1312,8 @@ with tab_dash:
     if not _dash_db.exists():
         st.warning(f"Banco `{_dash_db.name}` não encontrado.")
     else:
-        _d_bets = fetch_resolved_ev15(_dash_db)
-        _d_df = build_df(_d_bets)
-        _d_df = _apply_method_filter_df(_d_df, method_filter)
-        _d_stats = summary_stats(_d_df)
+        _d_df = _cached_resolved_df(str(_dash_db), _db_mtime(_dash_db), method_filter)
+        _d_stats = _cached_summary(_d_df)
 
         # ── KPIs principais ──
         col_roi, col_lucro, col_wr, col_wl = st.columns(4)
@@ -1016,8 +1330,8 @@ with tab_dash:
         if not _d_df.empty and method_filter == "Todos":
             _df_ml = _d_df[_d_df["metodo"] == "ML"]
             _df_emp = _d_df[_d_df["metodo"] == "Empírico"]
-            _s_ml = summary_stats(_df_ml)
-            _s_emp = summary_stats(_df_emp)
+            _s_ml = _cached_summary(_df_ml)
+            _s_emp = _cached_summary(_df_emp)
             _method_comp = pd.DataFrame([
                 {
                     "Método": "Empírico",
@@ -1040,54 +1354,38 @@ with tab_dash:
                 _method_comp,
                 width="stretch",
                 hide_index=True,
-                column_config={
-                    "N": st.column_config.NumberColumn(format="%d"),
-                    "WR%": st.column_config.NumberColumn(format="%.1f"),
-                    "Lucro (u)": st.column_config.NumberColumn(format="%+.2f"),
-                    "ROI%": st.column_config.NumberColumn(format="%+.1f"),
-                },
+                column_config=_COLS_METHOD_COMP,
             )
 
         st.divider()
 
         # P/L curve
         st.subheader("Curva P/L acumulada")
-        _d_pl = build_pl_curve(_d_df)
+        _d_pl = _cached_pl_curve(_d_df)
         render_pl_curve(_d_pl)
 
         st.divider()
 
         # Period profits
-        if not _d_df.empty and "game_date_day" in _d_df.columns:
-            _d_today = datetime.now().date()
-            _d_yesterday = _d_today - timedelta(days=1)
-            _d_days = pd.to_datetime(_d_df["game_date_day"], errors="coerce")
-
-            def _d_lucro_mask(mask):
-                sub = _d_df[mask]
-                return float(pd.to_numeric(sub["lucro_u"], errors="coerce").fillna(0).sum()) if not sub.empty else 0.0
-
-            render_kpi_row([
-                {"label": "Hoje", "value": f"{_d_lucro_mask(_d_days.dt.date == _d_today):+.2f}u"},
-                {"label": "Ontem", "value": f"{_d_lucro_mask(_d_days.dt.date == _d_yesterday):+.2f}u"},
-                {"label": "7 dias", "value": f"{_d_lucro_mask(_d_days.dt.date >= (_d_today - timedelta(days=6))):+.2f}u"},
-                {"label": "30 dias", "value": f"{_d_lucro_mask(_d_days.dt.date >= (_d_today - timedelta(days=29))):+.2f}u"},
-            ])
+        if not _d_df.empty and "game_date_day_d" in _d_df.columns:
+            render_period_profits(_d_df)
             st.divider()
 
         # Last 10 resolved
         if not _d_df.empty:
             st.subheader("Ultimas apostas resolvidas")
-            _d_last = _d_df.sort_values("game_date", ascending=False).head(10).copy()
+            _d_last = _d_df.nlargest(10, "game_date").copy()
             # Build Mercado column (side + line)
-            _d_last["Mercado"] = _d_last.apply(
-                lambda r: f"{r['side']} {r['line_value']}" if pd.notna(r.get("line_value")) else r["side"],
-                axis=1,
+            _d_last["Mercado"] = np.where(
+                _d_last["line_value"].notna(),
+                _d_last["side"].astype(str) + " " + _d_last["line_value"].astype(str),
+                _d_last["side"],
             )
             # Build Jogo column
-            _d_last["Jogo"] = _d_last.apply(
-                lambda r: f"{r['home_team']} vs {r['away_team']}" if r.get("home_team") else "",
-                axis=1,
+            _d_last["Jogo"] = np.where(
+                _d_last["home_team"].notna() & (_d_last["home_team"] != ""),
+                _d_last["home_team"].astype(str) + " vs " + _d_last["away_team"].astype(str),
+                "",
             )
             _display_cols = ["game_date_day", "league_name", "Jogo", "Mercado", "odd_decimal", "status", "lucro_u", "metodo"]
             _display_cols = [c for c in _display_cols if c in _d_last.columns]
@@ -1104,10 +1402,7 @@ with tab_dash:
                 ),
                 width="stretch",
                 hide_index=True,
-                column_config={
-                    "Odd": st.column_config.NumberColumn("Odd", format="%.2f"),
-                    "P/L (u)": st.column_config.NumberColumn("P/L (u)", format="%+.2f"),
-                },
+                column_config=_COLS_LAST_BETS,
             )
 
 
@@ -1120,9 +1415,10 @@ with tab_apostas:
         st.warning("Banco `bets.db` não encontrado. Rode o pipeline primeiro.")
     else:
         # Load all upcoming bets
-        _a_all = get_bets_by_date(_today(), "2099-12-31", db_path=BETS_DB)
-        _a_all = [b for b in _a_all if float(b.get("expected_value") or 0) >= EV_MIN_APP]
-        _a_all = _apply_method_filter(_a_all, method_filter)
+        _a_df_all = _build_bets_df(_cached_bets_by_date(
+            str(BETS_DB), _db_mtime(BETS_DB), _today(),
+            min_ev=EV_MIN_APP, **_method_filter_sql(method_filter),
+        ))
 
         # Filters row
         fc1, fc2 = st.columns([1, 1])
@@ -1136,14 +1432,11 @@ with tab_apostas:
             pass  # map filter applied after building df
 
         # Filter by period
-        if _a_period == "Hoje":
-            _a_bets = [b for b in _a_all if (b.get("game_date") or "")[:10] == _today()]
-        elif _a_period == "Amanhã":
-            _a_bets = [b for b in _a_all if (b.get("game_date") or "")[:10] == _tomorrow()]
+        if _a_period == "Todos futuros" or _a_df_all.empty:
+            _a_df = _a_df_all
         else:
-            _a_bets = _a_all
-
-        _a_df = _build_bets_df(_a_bets)
+            _a_day = _today() if _a_period == "Hoje" else _tomorrow()
+            _a_df = _a_df_all[_a_df_all["game_date"].str[:10] == _a_day]
 
         if _a_df.empty:
             st.info(f"Nenhuma aposta encontrada ({_a_period}).")
@@ -1154,8 +1447,9 @@ with tab_apostas:
 
             # Quick stats
             n_total = len(_a_df)
-            n_map1 = len(_a_df[_a_df["Mapa"] == "Map 1"]) if "Mapa" in _a_df.columns else 0
-            n_map2 = len(_a_df[_a_df["Mapa"] == "Map 2"]) if "Mapa" in _a_df.columns else 0
+            _a_map_counts = _a_df["Mapa"].value_counts() if "Mapa" in _a_df.columns else pd.Series(dtype=int)
+            n_map1 = int(_a_map_counts.get("Map 1", 0))
+            n_map2 = int(_a_map_counts.get("Map 2", 0))
             render_kpi_row([
                 {"label": f"Apostas ({_a_period})", "value": n_total},
                 {"label": "Map 1", "value": n_map1},
@@ -1165,16 +1459,10 @@ with tab_apostas:
             st.divider()
 
             # Grouped bets
-            render_bets_grouped(
-                _a_df,
-                key_prefix="apostas_",
-                source="model",
-                already_placed_keys=_get_placed_bets_keys(USER_BETS_DB),
-                show_mark=True,
-            )
+            _mark_placed_fragment(_a_df, key_prefix="apostas_", source="model")
 
             # Summary
-            _a_stats = get_bet_stats(db_path=BETS_DB)
+            _a_stats = _cached_bet_stats(str(BETS_DB), _db_mtime(BETS_DB))
             st.divider()
             st.caption(
                 f"Total no banco: {_a_stats['total']} apostas | "
@@ -1202,12 +1490,7 @@ with tab_draft:
             _sk = _z_cal.get("sigmoid_k", "N/A")
             _as = _z_cal.get("adjust_strength", "N/A")
             try:
-                _cfg_s = importlib.util.spec_from_file_location(
-                    "oa_cfg_ml", ROOT / "odds_analysis" / "config.py"
-                )
-                _cfg_m = importlib.util.module_from_spec(_cfg_s)
-                _cfg_s.loader.exec_module(_cfg_m)
-                _mlt = getattr(_cfg_m, "ML_CONFIDENCE_THRESHOLD", 0.65)
+                _mlt = getattr(_load_oa_config(), "ML_CONFIDENCE_THRESHOLD", 0.65)
             except Exception:
                 _mlt = 0.65
             st.info(
@@ -1220,479 +1503,461 @@ with tab_draft:
     except Exception:
         pass
 
-    games_today, games_tomorrow = _games_today_tomorrow()
-    games_for_picker = (games_today or []) + (games_tomorrow or [])
-    champs = _champions_from_history()
-    # Inclui campeões extras vindos da API (preenchidos pelo botão "Preencher campeões")
-    extra = st.session_state.get("_draft_extra_champs", [])
-    all_champs = sorted(set(champs) | set(extra)) if champs or extra else []
-    empty = [""] + (all_champs or ["Nenhum campeão"])
-
-    # ── Container 1: Game selection ──
-    with st.container(border=True):
-        st.markdown("**📅 Seleção do Jogo**")
-
-        mode = st.radio("Modo", ["Jogo do dia", "Manual"], horizontal=True, key="draft_mode")
-
-        league_sel = None
-        team1_sel = None
-        team2_sel = None
-        matchup_id_sel = None
-        start_time_sel = None
-
-        if mode == "Jogo do dia":
-            if not games_for_picker:
-                st.info("Nenhum jogo hoje/amanhã no Pinnacle. Use modo Manual.")
-            else:
-                opts = [
-                    f"{g['league_name']} — {g['home_team']} vs {g['away_team']} ({g['start_time'][:16]})"
-                    for g in games_for_picker
-                ]
-                idx = st.selectbox(
-                    "Jogo", range(len(opts)),
-                    format_func=lambda i: opts[i],
-                    key="draft_ml_jogo_dia",
-                )
-                if idx is not None and 0 <= idx < len(games_for_picker):
-                    g = games_for_picker[idx]
-                    league_sel = g["league_name"]
-                    team1_sel = g["home_team"]
-                    team2_sel = g["away_team"]
-                    matchup_id_sel = g["matchup_id"]
-                    start_time_sel = g["start_time"]
-                    st.success(f"**{league_sel}** — {team1_sel} vs {team2_sel}")
-        else:
-            leagues = _leagues_from_history()
-            league_sel = st.selectbox("Liga", [""] + (leagues or ["—"]), key="draft_manual_league")
-            teams = _teams_by_league(league_sel) if league_sel else []
-            team1_sel = st.selectbox("Time 1", [""] + (teams or ["—"]), key="draft_manual_t1")
-            team2_sel = st.selectbox("Time 2", [""] + (teams or ["—"]), key="draft_manual_t2")
-
-        # LoL Esports schedule (collapsible)
-        with st.expander("📡 Próximos jogos (LoL Esports)", expanded=False):
-            try:
-                schedule_events = _ls_get_schedule_events()
-                live_events = _ls_get_live_events()
-                live_match_ids = set()
-                for ev in (live_events or []):
-                    if ev.get("type") == "match":
-                        mid = ev.get("match") and ev.get("match", {}).get("id")
-                        if mid:
-                            live_match_ids.add(str(mid))
-                now_utc = datetime.now(timezone.utc)
-                ls_rows = []
-                for ev in (schedule_events or [])[:80]:
-                    if ev.get("type") != "match":
-                        continue
-                    match = ev.get("match") or {}
-                    teams_ls = match.get("teams") or []
-                    if len(teams_ls) < 2:
-                        continue
-                    mid = str(match.get("id", ""))
-                    if not mid or mid == "N/A":
-                        continue
-                    start_iso = ev.get("startTime") or ""
-                    try:
-                        dt_utc = datetime.fromisoformat(start_iso.replace("Z", "+00:00"))
-                        if dt_utc.tzinfo is None:
-                            dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-                        if dt_utc < now_utc and mid not in live_match_ids:
-                            continue
-                        dt_local = dt_utc.astimezone(tz=None)
-                        start_display = dt_local.strftime("%d/%m %H:%M")
-                    except Exception:
-                        start_display = start_iso[:16] if start_iso else "—"
-                    league_ls = (ev.get("league") or {}).get("name", "") or "—"
-                    t1_ls = (teams_ls[0].get("name") or teams_ls[0].get("code") or "").strip() or "—"
-                    t2_ls = (teams_ls[1].get("name") or teams_ls[1].get("code") or "").strip() or "—"
-                    state = "🔴 Ao vivo" if mid in live_match_ids else "⏳"
-                    ls_rows.append({"Liga": league_ls, "Jogo": f"{t1_ls} vs {t2_ls}",
-                                    "Horário": start_display, "Status": state})
-                if ls_rows:
-                    st.dataframe(pd.DataFrame(ls_rows), width="stretch", hide_index=True)
-                else:
-                    st.info("Nenhum jogo encontrado.")
-            except Exception as e:
-                st.warning(f"Erro ao carregar LoL Esports: {e}")
-
-    # ── Container 2: Draft ──
-    with st.container(border=True):
-        st.markdown("**🃏 Draft**")
-
-        # Live draft toggle
-        ls_enabled = st.checkbox(
-            "📡 Buscar draft ao vivo (LoL Esports)",
-            value=False,
-            key="ls_enable_live_draft",
-        )
+    @st.fragment
+    def _draft_fragment():
+        """Seleção, draft e resultados: interações aqui reexecutam só este bloco."""
+        games_today, games_tomorrow = _games_today_tomorrow()
+        games_for_picker = (games_today or []) + (games_tomorrow or [])
+        champs = _champions_from_history(_db_mtime(HISTORY_DB))
+        # Inclui campeões extras vindos da API (preenchidos pelo botão "Preencher campeões")
+        extra = st.session_state.get("_draft_extra_champs", [])
+        all_champs = sorted(set(champs) | set(extra)) if champs or extra else []
+        empty = [""] + (all_champs or ["Nenhum campeão"])
+
+        # ── Container 1: Game selection ──
+        with st.container(border=True):
+            st.markdown("**📅 Seleção do Jogo**")
 
-        if ls_enabled and league_sel and team1_sel and team2_sel:
-            map_choice = st.selectbox("Mapa ao vivo", [1, 2, 3, 4, 5], index=0, key="ls_map_choice")
-            col_a, col_b = st.columns(2)
-            with col_a:
-                do_fetch = st.button("🔄 Buscar draft", type="secondary", width="stretch")
-            with col_b:
-                do_fill = st.button("✅ Preencher campeões", type="primary", width="stretch")
+            mode = st.radio("Modo", ["Jogo do dia", "Manual"], horizontal=True, key="draft_mode")
 
-            if do_fetch or do_fill:
-                try:
-                    events = []
-                    try:
-                        events.extend(_ls_get_live_events())
-                    except Exception:
-                        pass
-                    try:
-                        events.extend(_ls_get_schedule_events())
-                    except Exception:
-                        pass
-                    cand = ls_draft.find_best_match_id(
-                        events, league_name=league_sel, team1=team1_sel,
-                        team2=team2_sel, start_time_iso=start_time_sel,
+            league_sel = None
+            team1_sel = None
+            team2_sel = None
+            matchup_id_sel = None
+            start_time_sel = None
+
+            if mode == "Jogo do dia":
+                if not games_for_picker:
+                    st.info("Nenhum jogo hoje/amanhã no Pinnacle. Use modo Manual.")
+                else:
+                    opts = [
+                        f"{g['league_name']} — {g['home_team']} vs {g['away_team']} ({g['start_time'][:16]})"
+                        for g in games_for_picker
+                    ]
+                    idx = st.selectbox(
+                        "Jogo", range(len(opts)),
+                        format_func=lambda i: opts[i],
+                        key="draft_ml_jogo_dia",
                     )
-                    if not cand:
-                        st.warning("Partida não encontrada no LoL Esports.")
+                    if idx is not None and 0 <= idx < len(games_for_picker):
+                        g = games_for_picker[idx]
+                        league_sel = g["league_name"]
+                        team1_sel = g["home_team"]
+                        team2_sel = g["away_team"]
+                        matchup_id_sel = g["matchup_id"]
+                        start_time_sel = g["start_time"]
+                        st.success(f"**{league_sel}** — {team1_sel} vs {team2_sel}")
+            else:
+                leagues = _leagues_from_history(_db_mtime(HISTORY_DB))
+                league_sel = st.selectbox("Liga", [""] + (leagues or ["—"]), key="draft_manual_league")
+                teams = _teams_by_league(league_sel) if league_sel else []
+                team1_sel = st.selectbox("Time 1", [""] + (teams or ["—"]), key="draft_manual_t1")
+                team2_sel = st.selectbox("Time 2", [""] + (teams or ["—"]), key="draft_manual_t2")
+
+            # LoL Esports schedule (collapsible)
+            with st.expander("📡 Próximos jogos (LoL Esports)", expanded=False):
+                try:
+                    schedule_events = _ls_get_schedule_events()
+                    live_events = _ls_get_live_events()
+                    live_match_ids = set()
+                    for ev in (live_events or []):
+                        if ev.get("type") == "match":
+                            mid = ev.get("match") and ev.get("match", {}).get("id")
+                            if mid:
+                                live_match_ids.add(str(mid))
+                    now_utc = datetime.now(timezone.utc)
+                    ls_cols = {"mid": [], "start_iso": [], "Liga": [], "t1": [], "t2": []}
+                    for ev in (schedule_events or [])[:80]:
+                        if ev.get("type") != "match":
+                            continue
+                        match = ev.get("match") or {}
+                        teams_ls = match.get("teams") or []
+                        if len(teams_ls) < 2:
+                            continue
+                        mid = str(match.get("id", ""))
+                        if not mid or mid == "N/A":
+                            continue
+                        ls_cols["mid"].append(mid)
+                        ls_cols["start_iso"].append(ev.get("startTime") or "")
+                        ls_cols["Liga"].append((ev.get("league") or {}).get("name", "") or "—")
+                        ls_cols["t1"].append((teams_ls[0].get("name") or teams_ls[0].get("code") or "").strip() or "—")
+                        ls_cols["t2"].append((teams_ls[1].get("name") or teams_ls[1].get("code") or "").strip() or "—")
+                    ls_df = pd.DataFrame(ls_cols)
+                    if not ls_df.empty:
+                        dt_utc = pd.to_datetime(ls_df["start_iso"], errors="coerce", utc=True, format="ISO8601")
+                        is_live = ls_df["mid"].isin(live_match_ids)
+                        # NaT < now é False: horário ilegível continua na lista, como antes
+                        keep = ~(dt_utc < now_utc) | is_live
+                        ls_df, dt_utc, is_live = ls_df[keep], dt_utc[keep], is_live[keep]
+                        local_tz = datetime.now().astimezone().tzinfo
+                        ls_df["Jogo"] = ls_df["t1"] + " vs " + ls_df["t2"]
+                        ls_df["Horário"] = (
+                            dt_utc.dt.tz_convert(local_tz).dt.strftime("%d/%m %H:%M")
+                            .fillna(ls_df["start_iso"].str[:16].replace("", "—"))
+                        )
+                        ls_df["Status"] = np.where(is_live, "🔴 Ao vivo", "⏳")
+                    if not ls_df.empty:
+                        st.dataframe(ls_df[["Liga", "Jogo", "Horário", "Status"]], width="stretch", hide_index=True)
                     else:
-                        st.success(f"Match: id={cand.match_id} (score {cand.score:.2f})")
-                        details = _ls_get_event_details(cand.match_id)
-                        game_ids, sides = ls_draft.extract_game_ids_by_map(details)
-                        game_id = game_ids.get(int(map_choice))
-                        if not game_id:
-                            st.info(f"Sem gameId para Map {map_choice}.")
-                        else:
-                            window = _ls_get_window(game_id)
-                            draft = ls_draft.extract_draft_from_window(window)
-                            team_names_by_id = ls_draft.extract_match_team_names(details)
-                            team1_is_blue: Optional[bool] = None
-                            side_map = sides.get(int(map_choice)) or {}
-                            blue_tid = side_map.get("blue")
-                            red_tid = side_map.get("red")
-                            blue_name = team_names_by_id.get(str(blue_tid), "") if blue_tid else ""
-                            red_name = team_names_by_id.get(str(red_tid), "") if red_tid else ""
-                            if blue_name and _norm_key(blue_name) == _norm_key(team1_sel):
-                                team1_is_blue = True
-                            elif red_name and _norm_key(red_name) == _norm_key(team1_sel):
-                                team1_is_blue = False
-                            if team1_is_blue is None:
-                                st.warning("Não consegui mapear BLUE/RED automaticamente.")
-                                team1_side = st.radio(
-                                    "Time 1 é:", ["BLUE side", "RED side"],
-                                    horizontal=True, key="ls_team1_side_choice",
-                                )
-                                team1_is_blue = team1_side == "BLUE side"
-                            else:
-                                st.caption(f"Time 1: {'BLUE' if team1_is_blue else 'RED'} side")
-                            t1_draft = draft.get("blue" if team1_is_blue else "red", {})
-                            t2_draft = draft.get("red" if team1_is_blue else "blue", {})
-
-                            df_preview = pd.DataFrame([
-                                {"Role": r, "Time 1": t1_draft.get(r.lower(), ""), "Time 2": t2_draft.get(r.lower(), "")}
-                                for r in ["TOP", "JUNG", "MID", "ADC", "SUP"]
-                            ])
-                            st.dataframe(df_preview, width="stretch", hide_index=True)
-
-                            if do_fill:
-                                # Coleta todos os nomes do draft da API
-                                api_champs: list[str] = []
-                                for role in ["top", "jung", "mid", "adc", "sup"]:
-                                    for td in (t1_draft, t2_draft):
-                                        raw = td.get(role, "")
-                                        if raw and str(raw).strip():
-                                            api_champs.append(str(raw).strip())
-                                            mapped = LOL_CHAMPION_ID_MAP.get(str(raw).strip())
-                                            if mapped:
-                                                api_champs.append(mapped)
-
-                                # Adiciona ao options os campeões da API que não existem
-                                opts = list(empty)
-                                for ac in api_champs:
-                                    if ac not in opts:
-                                        opts.append(ac)
-                                opts.sort(key=lambda x: (x == "", x))
-
-                                # Salva options expandidas para o rerun
-                                st.session_state["_draft_extra_champs"] = sorted(
-                                    set(api_champs) - set(empty)
-                                )
-
-                                for role in ["top", "jung", "mid", "adc", "sup"]:
-                                    st.session_state[f"{role}_t1"] = _match_champ_to_options(t1_draft.get(role, ""), opts)
-                                    st.session_state[f"{role}_t2"] = _match_champ_to_options(t2_draft.get(role, ""), opts)
-                                st.success("Campeões preenchidos!")
-                                st.rerun()
+                        st.info("Nenhum jogo encontrado.")
                 except Exception as e:
-                    st.warning(f"Falha ao consultar draft ao vivo: {e}")
+                    st.warning(f"Erro ao carregar LoL Esports: {e}")
 
-        # Champion selectboxes
-        st.markdown("**Campeões**")
-        c1, c2 = st.columns(2)
-        with c1:
-            st.caption("Time 1")
-            top_t1 = st.selectbox("Top T1", empty, key="top_t1")
-            jung_t1 = st.selectbox("Jungle T1", empty, key="jung_t1")
-            mid_t1 = st.selectbox("Mid T1", empty, key="mid_t1")
-            adc_t1 = st.selectbox("ADC T1", empty, key="adc_t1")
-            sup_t1 = st.selectbox("Sup T1", empty, key="sup_t1")
-        with c2:
-            st.caption("Time 2")
-            top_t2 = st.selectbox("Top T2", empty, key="top_t2")
-            jung_t2 = st.selectbox("Jungle T2", empty, key="jung_t2")
-            mid_t2 = st.selectbox("Mid T2", empty, key="mid_t2")
-            adc_t2 = st.selectbox("ADC T2", empty, key="adc_t2")
-            sup_t2 = st.selectbox("Sup T2", empty, key="sup_t2")
-
-        # Map selector for bet association
-        mapa_sel = None
-        if matchup_id_sel is not None:
-            mapa_sel = st.selectbox(
-                "Mapa das apostas",
-                [1, 2],
-                format_func=lambda x: f"Map {x}",
-                key="draft_ml_mapa_sel",
-                help="Associe ao mapa do draft preenchido.",
+        # ── Container 2: Draft ──
+        with st.container(border=True):
+            st.markdown("**🃏 Draft**")
+
+            # Live draft toggle
+            ls_enabled = st.checkbox(
+                "📡 Buscar draft ao vivo (LoL Esports)",
+                value=False,
+                key="ls_enable_live_draft",
             )
 
-    # ── Container 3: Results ──
-    with st.container(border=True):
-        st.markdown("**🔬 Resultados**")
+            if ls_enabled and league_sel and team1_sel and team2_sel:
+                map_choice = st.selectbox("Mapa ao vivo", [1, 2, 3, 4, 5], index=0, key="ls_map_choice")
+                col_a, col_b = st.columns(2)
+                with col_a:
+                    do_fetch = st.button("🔄 Buscar draft", type="secondary", width="stretch")
+                with col_b:
+                    do_fill = st.button("✅ Preencher campeões", type="primary", width="stretch")
 
-        run_ml = st.button("▶ Rodar Modelo (empírico + ML)", type="primary", width="stretch")
-        results = []
-        value_bets = []
-        draft_data = {}
+                if do_fetch or do_fill:
+                    try:
+                        events = []
+                        try:
+                            events.extend(_ls_get_live_events())
+                        except Exception:
+                            pass
+                        try:
+                            events.extend(_ls_get_schedule_events())
+                        except Exception:
+                            pass
+                        cand = ls_draft.find_best_match_id(
+                            events, league_name=league_sel, team1=team1_sel,
+                            team2=team2_sel, start_time_iso=start_time_sel,
+                        )
+                        if not cand:
+                            st.warning("Partida não encontrada no LoL Esports.")
+                        else:
+                            st.success(f"Match: id={cand.match_id} (score {cand.score:.2f})")
+                            details = _ls_get_event_details(cand.match_id)
+                            game_ids, sides = ls_draft.extract_game_ids_by_map(details)
+                            game_id = game_ids.get(int(map_choice))
+                            if not game_id:
+                                st.info(f"Sem gameId para Map {map_choice}.")
+                            else:
+                                window = _ls_get_window(game_id)
+                                draft = ls_draft.extract_draft_from_window(window)
+                                team_names_by_id = ls_draft.extract_match_team_names(details)
+                                team1_is_blue: Optional[bool] = None
+                                side_map = sides.get(int(map_choice)) or {}
+                                blue_tid = side_map.get("blue")
+                                red_tid = side_map.get("red")
+                                blue_name = team_names_by_id.get(str(blue_tid), "") if blue_tid else ""
+                                red_name = team_names_by_id.get(str(red_tid), "") if red_tid else ""
+                                if blue_name and _norm_key(blue_name) == _norm_key(team1_sel):
+                                    team1_is_blue = True
+                                elif red_name and _norm_key(red_name) == _norm_key(team1_sel):
+                                    team1_is_blue = False
+                                if team1_is_blue is None:
+                                    st.warning("Não consegui mapear BLUE/RED automaticamente.")
+                                    team1_side = st.radio(
+                                        "Time 1 é:", ["BLUE side", "RED side"],
+                                        horizontal=True, key="ls_team1_side_choice",
+                                    )
+                                    team1_is_blue = team1_side == "BLUE side"
+                                else:
+                                    st.caption(f"Time 1: {'BLUE' if team1_is_blue else 'RED'} side")
+                                t1_draft = draft.get("blue" if team1_is_blue else "red", {})
+                                t2_draft = draft.get("red" if team1_is_blue else "blue", {})
+
+                                df_preview = pd.DataFrame({
+                                    "Role": DRAFT_ROLES,
+                                    "Time 1": [t1_draft.get(r.lower(), "") for r in DRAFT_ROLES],
+                                    "Time 2": [t2_draft.get(r.lower(), "") for r in DRAFT_ROLES],
+                                })
+                                st.dataframe(df_preview, width="stretch", hide_index=True)
+
+                                if do_fill:
+                                    # Coleta todos os nomes do draft da API
+                                    api_champs: list[str] = []
+                                    for role in ["top", "jung", "mid", "adc", "sup"]:
+                                        for td in (t1_draft, t2_draft):
+                                            raw = td.get(role, "")
+                                            if raw and str(raw).strip():
+                                                api_champs.append(str(raw).strip())
+                                                mapped = LOL_CHAMPION_ID_MAP.get(str(raw).strip())
+                                                if mapped:
+                                                    api_champs.append(mapped)
+
+                                    # Adiciona ao options os campeões da API que não existem
+                                    opts = list(empty)
+                                    for ac in api_champs:
+                                        if ac not in opts:
+                                            opts.append(ac)
+                                    opts.sort(key=lambda x: (x == "", x))
+
+                                    # Salva options expandidas para o rerun
+                                    st.session_state["_draft_extra_champs"] = sorted(
+                                        set(api_champs) - set(empty)
+                                    )
+
+                                    lookup = _champ_lookup(tuple(opts))
+                                    updates = {}
+                                    for role in ["top", "jung", "mid", "adc", "sup"]:
+                                        updates[f"{role}_t1"] = _match_champ_to_options(t1_draft.get(role, ""), opts, lookup)
+                                        updates[f"{role}_t2"] = _match_champ_to_options(t2_draft.get(role, ""), opts, lookup)
+                                    st.session_state.update(updates)
+                                    st.success("Campeões preenchidos!")
+                                    _rerun_fragment()
+                    except Exception as e:
+                        st.warning(f"Falha ao consultar draft ao vivo: {e}")
+
+            # Champion selectboxes
+            st.markdown("**Campeões**")
+            c1, c2 = st.columns(2)
+            with c1:
+                st.caption("Time 1")
+                top_t1 = st.selectbox("Top T1", empty, key="top_t1")
+                jung_t1 = st.selectbox("Jungle T1", empty, key="jung_t1")
+                mid_t1 = st.selectbox("Mid T1", empty, key="mid_t1")
+                adc_t1 = st.selectbox("ADC T1", empty, key="adc_t1")
+                sup_t1 = st.selectbox("Sup T1", empty, key="sup_t1")
+            with c2:
+                st.caption("Time 2")
+                top_t2 = st.selectbox("Top T2", empty, key="top_t2")
+                jung_t2 = st.selectbox("Jungle T2", empty, key="jung_t2")
+                mid_t2 = st.selectbox("Mid T2", empty, key="mid_t2")
+                adc_t2 = st.selectbox("ADC T2", empty, key="adc_t2")
+                sup_t2 = st.selectbox("Sup T2", empty, key="sup_t2")
+
+            # Map selector for bet association
+            mapa_sel = None
+            if matchup_id_sel is not None:
+                mapa_sel = st.selectbox(
+                    "Mapa das apostas",
+                    [1, 2],
+                    format_func=lambda x: f"Map {x}",
+                    key="draft_ml_mapa_sel",
+                    help="Associe ao mapa do draft preenchido.",
+                )
 
-        if run_ml:
-            if not league_sel or not team1_sel or not team2_sel:
-                st.warning("Selecione liga e times.")
-            elif not all([top_t1, jung_t1, mid_t1, adc_t1, sup_t1, top_t2, jung_t2, mid_t2, adc_t2, sup_t2]):
-                st.warning("Preencha todos os 10 campeões.")
-            else:
-                # Normalize league
-                try:
-                    import importlib.util
-                    _spec = importlib.util.spec_from_file_location(
-                        "oa_normalizer", ROOT / "odds_analysis" / "normalizer.py"
-                    )
-                    _mod = importlib.util.module_from_spec(_spec)
-                    _spec.loader.exec_module(_mod)
-                    _nz = _mod.get_normalizer()
-                    league_norm = _nz.normalize_league_name(league_sel) or league_sel
-                except Exception:
-                    league_norm = league_sel
-
-                def normalize_champ_name(champ):
-                    if not champ:
-                        return ""
-                    return " ".join(str(champ).strip().split())
-
-                draft_data = {
-                    "league": league_norm,
-                    "top_t1": normalize_champ_name(top_t1),
-                    "jung_t1": normalize_champ_name(jung_t1),
-                    "mid_t1": normalize_champ_name(mid_t1),
-                    "adc_t1": normalize_champ_name(adc_t1),
-                    "sup_t1": normalize_champ_name(sup_t1),
-                    "top_t2": normalize_champ_name(top_t2),
-                    "jung_t2": normalize_champ_name(jung_t2),
-                    "mid_t2": normalize_champ_name(mid_t2),
-                    "adc_t2": normalize_champ_name(adc_t2),
-                    "sup_t2": normalize_champ_name(sup_t2),
-                }
-
-                if st.checkbox("🔍 Mostrar dados enviados", key="debug_ml_data"):
-                    st.json(draft_data)
-
-                # ── Empirical analysis ──
-                value_bets = []
-                if matchup_id_sel is not None:
-                    with st.spinner("Análise empírica..."):
-                        emp = _run_empirical(matchup_id_sel)
-                    if emp and not emp.get("error"):
-                        markets = emp.get("markets") or []
-                        for m in markets:
-                            if m.get("error"):
-                                continue
-                            ad = m.get("analysis") or {}
-                            if not ad.get("value") or ad.get("empirical_prob") is None:
-                                continue
-                            ev = ad.get("expected_value", 0)
-                            edge = ad.get("edge", 0)
-                            value_bets.append({
-                                "market": m["market"],
-                                "side": m["market"]["side"],
-                                "line_value": m["market"].get("line_value"),
-                                "odd_decimal": m["market"]["odd_decimal"],
-                                "expected_value": ev,
-                                "edge": edge,
-                                "empirical_prob": ad.get("empirical_prob"),
-                                "implied_prob": ad.get("implied_probability"),
-                                "historical_mean": ad.get("historical_mean"),
-                                "historical_std": ad.get("historical_std"),
-                                "historical_games": ad.get("historical_games"),
-                            })
-                    elif emp and emp.get("error"):
-                        st.warning(f"Empírico: {emp['error']}")
+        # ── Container 3: Results ──
+        with st.container(border=True):
+            st.markdown("**🔬 Resultados**")
+
+            run_ml = st.button("▶ Rodar Modelo (empírico + ML)", type="primary", width="stretch")
+            results = []
+            value_bets = []
+            draft_data = {}
+
+            if run_ml:
+                if not league_sel or not team1_sel or not team2_sel:
+                    st.warning("Selecione liga e times.")
+                elif not all([top_t1, jung_t1, mid_t1, adc_t1, sup_t1, top_t2, jung_t2, mid_t2, adc_t2, sup_t2]):
+                    st.warning("Preencha todos os 10 campeões.")
                 else:
-                    st.info("Modo manual: sem matchup. Apenas predição ML.")
-
-                value_bets_ev = [
-                    vb for vb in value_bets
-                    if vb.get("expected_value") is not None and float(vb.get("expected_value") or 0) >= EV_MIN_APP
-                ]
-
-                # ── ML predictions ──
-                lines_to_check = [vb["line_value"] for vb in value_bets_ev]
-
-                def _round_to_step(x: float, step: float = 0.5) -> float:
-                    return round(float(x) / step) * step
-
-                if not lines_to_check and league_norm:
+                    # Normalize league
                     try:
-                        analyzer = _get_analyzer()
-                        ls = (analyzer.ml_league_stats or {}).get(league_norm, {})
-                        mean_val = ls.get("mean")
-                        if mean_val is not None:
-                            lines_to_check = [_round_to_step(float(mean_val), 0.5)]
+                        _nz = _load_oa_normalizer().get_normalizer()
+                        league_norm = _nz.normalize_league_name(league_sel) or league_sel
                     except Exception:
-                        lines_to_check = [25.5]
-
-                ml_by_line = {}
-                seen = set()
-                for line_val in lines_to_check:
-                    if line_val is None:
-                        continue
-                    key = float(line_val)
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    ml_res = _run_ml_with_draft(draft_data, float(line_val))
-                    if ml_res is None:
-                        st.caption(f"⚠ ML: confiança < threshold para linha {line_val} (ignorado)")
-                    ml_pred = (ml_res.get("prediction") or "").upper() if ml_res else ""
-                    ml_by_line[float(line_val)] = {
-                        "ml_pred": ml_pred,
-                        "ml_prob_over": ml_res.get("probability_over") if ml_res else None,
-                        "ml_prob_under": ml_res.get("probability_under") if ml_res else None,
+                        league_norm = league_sel
+
+                    def normalize_champ_name(champ):
+                        if not champ:
+                            return ""
+                        return " ".join(str(champ).strip().split())
+
+                    draft_data = {
+                        "league": league_norm,
+                        "top_t1": normalize_champ_name(top_t1),
+                        "jung_t1": normalize_champ_name(jung_t1),
+                        "mid_t1": normalize_champ_name(mid_t1),
+                        "adc_t1": normalize_champ_name(adc_t1),
+                        "sup_t1": normalize_champ_name(sup_t1),
+                        "top_t2": normalize_champ_name(top_t2),
+                        "jung_t2": normalize_champ_name(jung_t2),
+                        "mid_t2": normalize_champ_name(mid_t2),
+                        "adc_t2": normalize_champ_name(adc_t2),
+                        "sup_t2": normalize_champ_name(sup_t2),
                     }
 
-                # ── Build convergence results ──
-                for vb in value_bets_ev:
-                    line_val = vb.get("line_value")
-                    if line_val is None:
-                        continue
-                    ml_info = ml_by_line.get(float(line_val), {})
-                    empirical_side = (vb.get("side") or "").upper()
-                    ml_pred = (ml_info.get("ml_pred") or "").upper()
-                    converges = bool(ml_pred) and (ml_pred == empirical_side)
-                    results.append({
-                        "line": line_val,
-                        "side": vb.get("side"),
-                        "ml_pred": ml_pred,
-                        "ml_prob_over": ml_info.get("ml_prob_over"),
-                        "ml_prob_under": ml_info.get("ml_prob_under"),
-                        "converges": converges,
-                        "odd": vb.get("odd_decimal"),
-                        "ev": vb.get("expected_value"),
-                        "emp_prob": vb.get("empirical_prob"),
-                        "implied_prob": vb.get("implied_prob"),
-                    })
-
-                # ── Display results ──
-                if value_bets_ev:
-                    st.markdown(f"**Empírico (EV ≥ {EV_MIN_APP*100:.0f}%)**")
-                    df_emp_ev = pd.DataFrame([{
-                        "Side": str(vb.get("side") or "").upper(),
-                        "Linha": vb.get("line_value"),
-                        "Odd": vb.get("odd_decimal"),
-                        "Prob.": vb.get("empirical_prob"),
-                        "EV%": float(vb.get("expected_value") or 0) * 100,
-                    } for vb in value_bets_ev])
-                    st.dataframe(df_emp_ev.sort_values("EV%", ascending=False),
-                                 width="stretch", hide_index=True,
-                                 column_config={
-                                     "Linha": st.column_config.NumberColumn(format="%.1f"),
-                                     "Odd": st.column_config.NumberColumn(format="%.2f"),
-                                     "Prob.": st.column_config.NumberColumn(format="%.3f"),
-                                     "EV%": st.column_config.NumberColumn(format="%.1f"),
-                                 })
-
-                if ml_by_line:
-                    st.markdown("**ML por linha**")
-                    df_ml = pd.DataFrame([{
-                        "Linha": line,
-                        "ML pred": info.get("ml_pred") or "—",
-                        "P(OVER)": info.get("ml_prob_over"),
-                        "P(UNDER)": info.get("ml_prob_under"),
-                        "Status": "✅ Confiante" if info.get("ml_pred") else "⚠ Abaixo do threshold",
-                    } for line, info in ml_by_line.items()])
-                    st.dataframe(df_ml.sort_values("Linha"), width="stretch", hide_index=True,
-                                 column_config={
-                                     "P(OVER)": st.column_config.NumberColumn(format="%.3f"),
-                                     "P(UNDER)": st.column_config.NumberColumn(format="%.3f"),
-                                 })
-
-                if results:
-                    eligible = [r for r in results if r.get("ev") is not None and float(r.get("ev") or 0) >= EV_MIN_APP]
-                    converged = [r for r in eligible if r.get("converges")]
-                    if eligible:
-                        st.markdown(f"**Convergência (EV ≥ {EV_MIN_APP*100:.0f}%)**")
-                        render_kpi_row([
-                            {"label": "Total EV+", "value": len(eligible)},
-                            {"label": "Convergiu", "value": len(converged)},
-                            {"label": "Taxa", "value": f"{len(converged)/len(eligible)*100:.0f}%"},
-                        ])
-                        if converged:
-                            df_conv = pd.DataFrame([{
-                                "Side": str(r.get("side") or "").upper(),
-                                "Linha": r.get("line"),
-                                "Odd": r.get("odd"),
-                                "EV%": (r.get("ev") * 100) if r.get("ev") else None,
-                                "ML": r.get("ml_pred"),
-                                "P(O)": r.get("ml_prob_over"),
-                                "P(U)": r.get("ml_prob_under"),
-                            } for r in converged])
-                            st.dataframe(
-                                df_conv.sort_values("EV%", ascending=False),
-                                width="stretch", hide_index=True,
-                                column_config={
-                                    "Linha": st.column_config.NumberColumn(format="%.1f"),
-                                    "Odd": st.column_config.NumberColumn(format="%.2f"),
-                                    "EV%": st.column_config.NumberColumn(format="%.1f"),
-                                    "P(O)": st.column_config.NumberColumn(format="%.3f"),
-                                    "P(U)": st.column_config.NumberColumn(format="%.3f"),
-                                },
-                            )
-                        with st.expander("Divergiram (debug)", expanded=False):
-                            diverged = [r for r in eligible if not r.get("converges")]
-                            if not diverged:
-                                st.caption("Nenhuma.")
-                            else:
-                                df_div = pd.DataFrame([{
-                                    "Side": str(r.get("side") or "").upper(),
-                                    "Linha": r.get("line"),
-                                    "Odd": r.get("odd"),
-                                    "EV%": (r.get("ev") * 100) if r.get("ev") else None,
-                                    "ML": r.get("ml_pred"),
-                                } for r in diverged])
-                                st.dataframe(df_div, width="stretch", hide_index=True)
-
-        # ── Good bets table (always shown if available) ──
-        if results and value_bets and matchup_id_sel is not None:
-            good_bet_rows = _draft_ml_build_bet_rows(
-                results, value_bets, matchup_id_sel, start_time_sel,
-                league_sel, team1_sel, team2_sel, draft_data,
-                mapa_sel=mapa_sel,
-            )
-            if good_bet_rows:
-                st.session_state["draft_ml_bet_rows"] = list(good_bet_rows)
+                    if st.checkbox("🔍 Mostrar dados enviados", key="debug_ml_data"):
+                        st.json(draft_data)
+
+                    # ── Empirical analysis ──
+                    value_bets = []
+                    if matchup_id_sel is not None:
+                        with st.spinner("Análise empírica..."):
+                            emp = _run_empirical(matchup_id_sel)
+                        if emp and not emp.get("error"):
+                            markets = emp.get("markets") or []
+                            for m in markets:
+                                if m.get("error"):
+                                    continue
+                                ad = m.get("analysis") or {}
+                                if not ad.get("value") or ad.get("empirical_prob") is None:
+                                    continue
+                                ev = ad.get("expected_value", 0)
+                                edge = ad.get("edge", 0)
+                                value_bets.append({
+                                    "market": m["market"],
+                                    "side": m["market"]["side"],
+                                    "line_value": m["market"].get("line_value"),
+                                    "odd_decimal": m["market"]["odd_decimal"],
+                                    "expected_value": ev,
+                                    "edge": edge,
+                                    "empirical_prob": ad.get("empirical_prob"),
+                                    "implied_prob": ad.get("implied_probability"),
+                                    "historical_mean": ad.get("historical_mean"),
+                                    "historical_std": ad.get("historical_std"),
+                                    "historical_games": ad.get("historical_games"),
+                                })
+                        elif emp and emp.get("error"):
+                            st.warning(f"Empírico: {emp['error']}")
+                    else:
+                        st.info("Modo manual: sem matchup. Apenas predição ML.")
+
+                    value_bets_ev = [
+                        vb for vb in value_bets
+                        if vb.get("expected_value") is not None and float(vb.get("expected_value") or 0) >= EV_MIN_APP
+                    ]
+
+                    # ── ML predictions ──
+                    lines_to_check = [vb["line_value"] for vb in value_bets_ev]
+
+                    def _round_to_step(x: float, step: float = 0.5) -> float:
+                        return round(float(x) / step) * step
+
+                    if not lines_to_check and league_norm:
+                        try:
+                            analyzer = _get_analyzer()
+                            ls = (analyzer.ml_league_stats or {}).get(league_norm, {})
+                            mean_val = ls.get("mean")
+                            if mean_val is not None:
+                                lines_to_check = [_round_to_step(float(mean_val), 0.5)]
+                        except Exception:
+                            lines_to_check = [25.5]
+
+                    # chave = linha × 10 (int): hash exato, sem comparar floats
+                    ml_by_line = {}
+                    unique_lines = sorted({float(lv) for lv in lines_to_check if lv is not None})
+                    for line_val in unique_lines:
+                        ml_res = _run_ml_with_draft(draft_data, line_val)
+                        if ml_res is None:
+                            st.caption(f"⚠ ML: confiança < threshold para linha {line_val} (ignorado)")
+                        ml_pred = (ml_res.get("prediction") or "").upper() if ml_res else ""
+                        ml_by_line[int(round(line_val * 10))] = {
+                            "line": line_val,
+                            "ml_pred": ml_pred,
+                            "ml_prob_over": ml_res.get("probability_over") if ml_res else None,
+                            "ml_prob_under": ml_res.get("probability_under") if ml_res else None,
+                        }
+
+                    # ── Build convergence results ──
+                    # side em maiúsculas calculado uma vez por aposta (convergência + tabelas)
+                    sides_up = [(vb.get("side") or "").upper() for vb in value_bets_ev]
+                    for vb, empirical_side in zip(value_bets_ev, sides_up):
+                        side, line_val, odd, ev, emp_prob, implied_prob = _VB_FIELDS(vb)
+                        if line_val is None:
+                            continue
+                        ml_pred, ml_prob_over, ml_prob_under = _ML_FIELDS(
+                            ml_by_line.get(int(round(float(line_val) * 10)), _NO_ML)
+                        )
+                        converges = bool(ml_pred) and (ml_pred == empirical_side)
+                        results.append({
+                            "line": line_val,
+                            "side": side,
+                            "side_up": empirical_side,
+                            "ml_pred": ml_pred,
+                            "ml_prob_over": ml_prob_over,
+                            "ml_prob_under": ml_prob_under,
+                            "converges": converges,
+                            "odd": odd,
+                            "ev": ev,
+                            "emp_prob": emp_prob,
+                            "implied_prob": implied_prob,
+                        })
+
+                    # ── Display results ──
+                    if value_bets_ev:
+                        st.markdown(f"**Empírico (EV ≥ {EV_MIN_APP*100:.0f}%)**")
+                        emp_lines, emp_odds, emp_probs, emp_evs = zip(*map(_VB_TABLE_FIELDS, value_bets_ev))
+                        df_emp_ev = _build_emp_ev_df({
+                            "Side": sides_up,
+                            "Linha": list(emp_lines),
+                            "Odd": list(emp_odds),
+                            "Prob.": list(emp_probs),
+                            "EV%": np.fromiter(
+                                (float(ev or 0) * 100 for ev in emp_evs),
+                                dtype=np.float64, count=len(emp_evs),
+                            ),
+                        })
+                        st.dataframe(df_emp_ev,
+                                     width="stretch", hide_index=True,
+                                     column_config=_COLS_EMP_EV)
+
+                    if ml_by_line:
+                        st.markdown("**ML por linha**")
+                        df_ml = _build_ml_df({
+                            "Linha": [info["line"] for info in ml_by_line.values()],
+                            "ML pred": [info.get("ml_pred") or "" for info in ml_by_line.values()],
+                            "P(OVER)": [info.get("ml_prob_over") for info in ml_by_line.values()],
+                            "P(UNDER)": [info.get("ml_prob_under") for info in ml_by_line.values()],
+                        })
+                        st.dataframe(df_ml, width="stretch", hide_index=True,
+                                     column_config=_COLS_ML_LINE)
+
+                    if results:
+                        results_df = pd.DataFrame.from_records(results)
+                        results_df["ev"] = pd.to_numeric(results_df["ev"], errors="coerce")
+                        eligible_df = results_df[results_df["ev"].fillna(0) >= EV_MIN_APP]
+                        conv_mask = eligible_df["converges"].astype(bool)
+                        converged_df = eligible_df[conv_mask]
+                        if not eligible_df.empty:
+                            st.markdown(f"**Convergência (EV ≥ {EV_MIN_APP*100:.0f}%)**")
+                            render_kpi_row([
+                                {"label": "Total EV+", "value": len(eligible_df)},
+                                {"label": "Convergiu", "value": len(converged_df)},
+                                {"label": "Taxa", "value": f"{len(converged_df)/len(eligible_df)*100:.0f}%"},
+                            ])
+                            if not converged_df.empty:
+                                df_conv = _build_conv_df(converged_df)
+                                st.dataframe(
+                                    df_conv,
+                                    width="stretch", hide_index=True,
+                                    column_config=_COLS_CONV,
+                                )
+                            with st.expander("Divergiram (debug)", expanded=False):
+                                diverged_df = eligible_df[~conv_mask]
+                                if diverged_df.empty:
+                                    st.caption("Nenhuma.")
+                                else:
+                                    df_div = _build_conv_df(diverged_df, sort_by_ev=False)
+                                    st.dataframe(df_div[["Side", "Linha", "Odd", "EV%", "ML"]],
+                                                 width="stretch", hide_index=True)
+
+            # ── Good bets table (always shown if available) ──
+            if results and value_bets and matchup_id_sel is not None:
+                good_bet_rows = _draft_ml_build_bet_rows(
+                    results, value_bets, matchup_id_sel, start_time_sel,
+                    league_sel, team1_sel, team2_sel, draft_data,
+                    mapa_sel=mapa_sel,
+                )
+                if good_bet_rows:
+                    st.session_state["draft_ml_bet_rows"] = {_draft_ml_bet_key(bd): bd for bd in good_bet_rows}
+                    st.subheader(f"Apostas boas (EV ≥ {EV_MIN_APP*100:.0f}%)")
+                    _ = _render_draft_ml_bets_table(st.session_state["draft_ml_bet_rows"])
+                else:
+                    st.session_state["draft_ml_bet_rows"] = {}
+                    st.info(f"Nenhuma aposta com EV ≥ {EV_MIN_APP*100:.0f}% e dados empíricos.")
+            elif st.session_state.get("draft_ml_bet_rows"):
                 st.subheader(f"Apostas boas (EV ≥ {EV_MIN_APP*100:.0f}%)")
-                _ = _render_draft_ml_bets_table(good_bet_rows)
-            else:
-                st.session_state["draft_ml_bet_rows"] = []
-                st.info(f"Nenhuma aposta com EV ≥ {EV_MIN_APP*100:.0f}% e dados empíricos.")
-        elif st.session_state.get("draft_ml_bet_rows"):
-            good_bet_rows = st.session_state["draft_ml_bet_rows"]
-            st.subheader(f"Apostas boas (EV ≥ {EV_MIN_APP*100:.0f}%)")
-            _ = _render_draft_ml_bets_table(good_bet_rows)
+                _ = _render_draft_ml_bets_table(st.session_state["draft_ml_bet_rows"])
+
+    _draft_fragment()
 
 
 # ───────────────────────────────────────────────────────────────
@@ -1707,72 +1972,83 @@ with tab_minhas:
 
         # ── Sub-tab: Aguardando ──
         with sub_aguard:
-            # Update results button (prominent)
-            if st.button("🔄 Atualizar Resultados", type="primary", width="content"):
-                with st.spinner("Atualizando resultados..."):
-                    try:
-                        updater = ResultsUpdater(db_path=USER_BETS_DB)
-                        upd_stats = updater.update_all_results(dry_run=False)
-                        st.success("Atualização concluída!")
-                        st.json({
-                            "Pendentes": upd_stats["pending_bets"],
-                            "Encontrados": upd_stats["matched"],
-                            "Atualizados": upd_stats["updated"],
-                            "Não encontrados": upd_stats["not_found"],
-                            "Erros": upd_stats["errors"],
-                        })
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"Erro: {e}")
+            @st.fragment
+            def _minhas_aguard_fragment():
+                """Aguardando: atualizar/remover/filtrar reexecuta só esta sub-aba."""
+                # Remoção muda os ✅ das abas Apostas/Draft+ML: reroda o app inteiro
+                if st.session_state.pop("_minhas_removed", False):
+                    st.rerun(scope="app")
+                # Update results button (prominent)
+                if st.button("🔄 Atualizar Resultados", type="primary", width="content"):
+                    with st.spinner("Atualizando resultados..."):
+                        try:
+                            updater = ResultsUpdater(db_path=USER_BETS_DB)
+                            upd_stats = updater.update_all_results(dry_run=False)
+                            st.success("Atualização concluída!")
+                            st.json({
+                                "Pendentes": upd_stats["pending_bets"],
+                                "Encontrados": upd_stats["matched"],
+                                "Atualizados": upd_stats["updated"],
+                                "Não encontrados": upd_stats["not_found"],
+                                "Erros": upd_stats["errors"],
+                            })
+                            st.rerun(scope="app")
+                        except Exception as e:
+                            st.error(f"Erro: {e}")
 
-            feitas = get_placed_bets(db_path=USER_BETS_DB)
-            feitas = [b for b in feitas if float(b.get("expected_value") or 0) >= EV_MIN_APP]
-            df_feitas = _build_bets_df(feitas)
+                feitas = get_placed_bets(db_path=USER_BETS_DB, min_ev=EV_MIN_APP)
+                df_feitas = _build_bets_df(feitas)
 
-            if df_feitas.empty:
-                st.info("Nenhuma aposta aguardando resultado.")
-            else:
-                df_feitas = render_map_filter(df_feitas, "minhas_aguard")
-                st.caption(f"{len(df_feitas)} apostas aguardando resultado")
-                render_bets_grouped(
-                    df_feitas,
-                    key_prefix="minhas_aguard_",
-                    source="user",
-                    show_mark=False,
-                    show_remove=True,
-                )
+                if df_feitas.empty:
+                    st.info("Nenhuma aposta aguardando resultado.")
+                else:
+                    df_feitas = render_map_filter(df_feitas, "minhas_aguard")
+                    st.caption(f"{len(df_feitas)} apostas aguardando resultado")
+                    render_bets_grouped(
+                        df_feitas,
+                        key_prefix="minhas_aguard_",
+                        source="user",
+                        show_mark=False,
+                        show_remove=True,
+                    )
+
+            _minhas_aguard_fragment()
 
         # ── Sub-tab: Resolvidas ──
         with sub_resolv:
-            # KPIs
-            user_stats = get_bet_stats(db_path=USER_BETS_DB)
-            roi_data = user_stats.get("roi") or {}
-            if roi_data.get("total_resolved", 0) > 0:
-                render_kpi_row([
-                    {"label": "Resolvidas", "value": int(roi_data.get("total_resolved", 0))},
-                    {"label": "Vitórias", "value": int(roi_data.get("wins", 0))},
-                    {"label": "Derrotas", "value": int(roi_data.get("losses", 0))},
-                    {"label": "Winrate", "value": f"{float(roi_data.get('win_rate', 0)):.1f}%"},
-                    {"label": "Lucro (u)", "value": f"{float(roi_data.get('lucro', 0)):+.2f}"},
-                    {"label": "ROI", "value": f"{float(roi_data.get('return_pct', 0)):+.1f}%"},
-                ])
-                st.divider()
-            else:
-                st.caption("Sem apostas resolvidas (won/lost).")
-
-            resolved = get_resolved_bets(db_path=USER_BETS_DB)
-            resolved = [b for b in resolved if float(b.get("expected_value") or 0) >= EV_MIN_APP]
-            df_resolved = _build_bets_df(resolved)
-
-            if not df_resolved.empty:
-                df_resolved = render_map_filter(df_resolved, "minhas_resolv")
-                render_bets_grouped(
-                    df_resolved,
-                    key_prefix="minhas_resolv_",
-                    source="user",
-                    show_mark=False,
-                    show_remove=False,
-                )
+            @st.fragment
+            def _minhas_resolv_fragment():
+                """Resolvidas: filtro de mapa reexecuta só esta sub-aba."""
+                # KPIs
+                user_stats = _cached_bet_stats(str(USER_BETS_DB), _db_mtime(USER_BETS_DB))
+                roi_data = user_stats.get("roi") or {}
+                if roi_data.get("total_resolved", 0) > 0:
+                    render_kpi_row([
+                        {"label": "Resolvidas", "value": int(roi_data.get("total_resolved", 0))},
+                        {"label": "Vitórias", "value": int(roi_data.get("wins", 0))},
+                        {"label": "Derrotas", "value": int(roi_data.get("losses", 0))},
+                        {"label": "Winrate", "value": f"{float(roi_data.get('win_rate', 0)):.1f}%"},
+                        {"label": "Lucro (u)", "value": f"{float(roi_data.get('lucro', 0)):+.2f}"},
+                        {"label": "ROI", "value": f"{float(roi_data.get('return_pct', 0)):+.1f}%"},
+                    ])
+                    st.divider()
+                else:
+                    st.caption("Sem apostas resolvidas (won/lost).")
+
+                resolved = get_resolved_bets(db_path=USER_BETS_DB, min_ev=EV_MIN_APP)
+                df_resolved = _build_bets_df(resolved)
+
+                if not df_resolved.empty:
+                    df_resolved = render_map_filter(df_resolved, "minhas_resolv")
+                    render_bets_grouped(
+                        df_resolved,
+                        key_prefix="minhas_resolv_",
+                        source="user",
+                        show_mark=False,
+                        show_remove=False,
+                    )
+
+            _minhas_resolv_fragment()
 
 
 # ───────────────────────────────────────────────────────────────
@@ -1780,20 +2056,24 @@ with tab_minhas:
 # ───────────────────────────────────────────────────────────────
 
 with tab_perf:
+    # Sem fragmento: Performance não tem widgets (st.tabs/st.expander trocam no cliente, sem rerun),
+    # então um @st.fragment aqui não isolaria nenhuma reexecução
     _p_db = BETS_DB if "modelo" in source_filter else USER_BETS_DB
     if not _p_db.exists():
         st.warning(f"Banco `{_p_db.name}` não encontrado.")
     else:
-        _p_bets = fetch_resolved_ev15(_p_db)
-        _p_df = build_df(_p_bets)
-        _p_df = _apply_method_filter_df(_p_df, method_filter)
+        _p_df = _cached_resolved_df(str(_p_db), _db_mtime(_p_db), method_filter)
 
         if _p_df.empty:
             st.info("Nenhuma aposta resolvida (won/lost) com EV ≥ 15%.")
         else:
+            _by_method = dict(tuple(_p_df.groupby("metodo", sort=False)))
+            _p_emp = _by_method.get("Empírico", _p_df.iloc[0:0])
+            _p_ml = _by_method.get("ML", _p_df.iloc[0:0])
+
             # ── Resumo geral ──
             st.subheader("Resumo geral")
-            _p_s = summary_stats(_p_df)
+            _p_s = _cached_summary(_p_df)
             render_kpi_row([
                 {"label": "N", "value": _p_s["n"]},
                 {"label": "W", "value": _p_s["w"]},
@@ -1809,37 +2089,21 @@ with tab_perf:
 
             # ── P/L curve ──
             st.subheader("P/L acumulada por dia")
-            _p_pl = build_pl_curve(_p_df)
+            _p_pl = _cached_pl_curve(_p_df)
             render_pl_curve(_p_pl)
 
             st.divider()
 
             # ── Period profits ──
-            if "game_date_day" in _p_df.columns:
-                _p_today = datetime.now().date()
-                _p_yesterday = _p_today - timedelta(days=1)
-                _p_days = pd.to_datetime(_p_df["game_date_day"], errors="coerce")
-
-                def _p_lucro_mask(mask):
-                    sub = _p_df[mask]
-                    return float(pd.to_numeric(sub["lucro_u"], errors="coerce").fillna(0).sum()) if not sub.empty else 0.0
-
-                render_kpi_row([
-                    {"label": "Hoje", "value": f"{_p_lucro_mask(_p_days.dt.date == _p_today):+.2f}u"},
-                    {"label": "Ontem", "value": f"{_p_lucro_mask(_p_days.dt.date == _p_yesterday):+.2f}u"},
-                    {"label": "7 dias", "value": f"{_p_lucro_mask(_p_days.dt.date >= (_p_today - timedelta(days=6))):+.2f}u"},
-                    {"label": "30 dias", "value": f"{_p_lucro_mask(_p_days.dt.date >= (_p_today - timedelta(days=29))):+.2f}u"},
-                ])
-
+            if "game_date_day_d" in _p_df.columns:
+                render_period_profits(_p_df)
                 st.divider()
 
             # ── Empírico vs ML comparison ──
             if method_filter == "Todos":
                 st.subheader("Empirico vs ML")
-                _p_emp = _p_df[_p_df["metodo"] == "Empírico"]
-                _p_ml = _p_df[_p_df["metodo"] == "ML"]
-                _se = summary_stats(_p_emp)
-                _sm = summary_stats(_p_ml)
+                _se = _cached_summary(_p_emp)
+                _sm = _cached_summary(_p_ml)
 
                 _comp_df = pd.DataFrame({
                     "Metrica": ["Apostas", "Vitorias", "Derrotas", "Winrate", "Lucro (u)", "ROI%", "Odd media (W)"],
@@ -1864,162 +2128,49 @@ with tab_perf:
                 _col_pl_e, _col_pl_m = st.columns(2)
                 with _col_pl_e:
                     st.caption("P/L Empirico")
-                    render_pl_curve(build_pl_curve(_p_emp))
+                    render_pl_curve(_cached_pl_curve(_p_emp))
                 with _col_pl_m:
                     st.caption("P/L ML")
-                    render_pl_curve(build_pl_curve(_p_ml))
+                    render_pl_curve(_cached_pl_curve(_p_ml))
 
                 st.divider()
 
-            # ── Over vs Under ──
-            st.subheader("Over vs Under")
-            _ou_tab_all, _ou_tab_emp, _ou_tab_ml = st.tabs(["Geral", "Empirico", "ML"])
-            for _ou_tab, _ou_label, _ou_subset in [
-                (_ou_tab_all, "Geral", _p_df),
-                (_ou_tab_emp, "Empirico", _p_df[_p_df["metodo"] == "Empírico"]),
-                (_ou_tab_ml, "ML", _p_df[_p_df["metodo"] == "ML"]),
-            ]:
-                with _ou_tab:
-                    _ou_agg = agg_stats(_ou_subset, "side")
-                    _ou_agg = _ou_agg[_ou_agg["side"].isin(["OVER", "UNDER"])].copy() if not _ou_agg.empty else _ou_agg
-                    if _ou_agg.empty:
-                        st.caption("Sem dados.")
-                    else:
-                        _ou_c1, _ou_c2 = st.columns([1, 1])
-                        with _ou_c1:
-                            st.dataframe(
-                                _ou_agg[["side", "N", "W", "L", "WR%", "Lucro(u)", "ROI%", "AvgOdd(W)"]],
-                                width="stretch", hide_index=True,
-                                column_config={
-                                    "side": st.column_config.TextColumn("Side"),
-                                    "N": st.column_config.NumberColumn(format="%d"),
-                                    "WR%": st.column_config.NumberColumn(format="%.1f"),
-                                    "Lucro(u)": st.column_config.NumberColumn(format="%+.2f"),
-                                    "ROI%": st.column_config.NumberColumn(format="%.2f"),
-                                    "AvgOdd(W)": st.column_config.NumberColumn(format="%.2f"),
-                                },
-                            )
-                        with _ou_c2:
-                            st.bar_chart(_ou_agg.set_index("side")[["ROI%"]])
-
-            st.divider()
-
-            # ── Por liga ──
-            st.subheader("Por liga")
-            _lg_tab_all, _lg_tab_emp, _lg_tab_ml = st.tabs(["Geral", "Empirico", "ML"])
-            for _lg_tab, _lg_label, _lg_subset in [
-                (_lg_tab_all, "Geral", _p_df),
-                (_lg_tab_emp, "Empirico", _p_df[_p_df["metodo"] == "Empírico"]),
-                (_lg_tab_ml, "ML", _p_df[_p_df["metodo"] == "ML"]),
-            ]:
-                with _lg_tab:
-                    _lg_agg = agg_stats(_lg_subset, "league_name")
-                    _lg_agg = _lg_agg[_lg_agg["league_name"] != "—"].copy() if not _lg_agg.empty else _lg_agg
-                    if _lg_agg.empty:
-                        st.caption("Sem dados.")
-                    else:
-                        st.dataframe(
-                            _lg_agg[["league_name", "N", "W", "L", "WR%", "Lucro(u)", "ROI%", "AvgOdd(W)"]],
-                            width="stretch", hide_index=True,
-                            column_config={
-                                "league_name": st.column_config.TextColumn("Liga"),
-                                "N": st.column_config.NumberColumn(format="%d"),
-                                "WR%": st.column_config.NumberColumn(format="%.1f"),
-                                "Lucro(u)": st.column_config.NumberColumn(format="%+.2f"),
-                                "ROI%": st.column_config.NumberColumn(format="%.2f"),
-                                "AvgOdd(W)": st.column_config.NumberColumn(format="%.2f"),
-                            },
-                        )
-
-            st.divider()
-
-            # ── Por faixa de odds ──
-            st.subheader("Por faixa de odds")
-            _ob_tab_all, _ob_tab_emp, _ob_tab_ml = st.tabs(["Geral", "Empirico", "ML"])
-            _ob_order = odds_bucket_order()
-            for _ob_tab, _ob_label, _ob_subset in [
-                (_ob_tab_all, "Geral", _p_df),
-                (_ob_tab_emp, "Empirico", _p_df[_p_df["metodo"] == "Empírico"]),
-                (_ob_tab_ml, "ML", _p_df[_p_df["metodo"] == "ML"]),
-            ]:
-                with _ob_tab:
-                    _ob_agg = agg_stats(_ob_subset, "odds_bucket")
-                    if not _ob_agg.empty:
-                        _ob_agg["_ord"] = _ob_agg["odds_bucket"].apply(
-                            lambda x: _ob_order.index(x) if x in _ob_order else 999
-                        )
-                        _ob_agg = _ob_agg.sort_values("_ord").drop(columns=["_ord"])
-                        _ob_c1, _ob_c2 = st.columns([1, 1])
-                        with _ob_c1:
-                            st.dataframe(
-                                _ob_agg[["odds_bucket", "N", "W", "L", "WR%", "Lucro(u)", "ROI%", "AvgOdd(W)"]],
-                                width="stretch", hide_index=True,
-                                column_config={
-                                    "odds_bucket": st.column_config.TextColumn("Faixa"),
-                                    "N": st.column_config.NumberColumn(format="%d"),
-                                    "WR%": st.column_config.NumberColumn(format="%.1f"),
-                                    "Lucro(u)": st.column_config.NumberColumn(format="%+.2f"),
-                                    "ROI%": st.column_config.NumberColumn(format="%.2f"),
-                                    "AvgOdd(W)": st.column_config.NumberColumn(format="%.2f"),
-                                },
-                            )
-                        with _ob_c2:
-                            st.bar_chart(_ob_agg.set_index("odds_bucket")[["ROI%"]])
-                    else:
-                        st.caption("Sem dados.")
-
-            st.divider()
-
-            # ── Por mapa ──
-            st.subheader("Por mapa")
-            _mp_tab_all, _mp_tab_emp, _mp_tab_ml = st.tabs(["Geral", "Empirico", "ML"])
-            for _mp_tab, _mp_label, _mp_subset in [
-                (_mp_tab_all, "Geral", _p_df),
-                (_mp_tab_emp, "Empirico", _p_df[_p_df["metodo"] == "Empírico"]),
-                (_mp_tab_ml, "ML", _p_df[_p_df["metodo"] == "ML"]),
-            ]:
-                with _mp_tab:
-                    _mp_agg = agg_stats(_mp_subset, "mapa_label")
-                    if not _mp_agg.empty:
-                        st.dataframe(
-                            _mp_agg[["mapa_label", "N", "W", "L", "WR%", "Lucro(u)", "ROI%", "AvgOdd(W)"]],
-                            width="stretch", hide_index=True,
-                            column_config={
-                                "mapa_label": st.column_config.TextColumn("Mapa"),
-                                "N": st.column_config.NumberColumn(format="%d"),
-                                "WR%": st.column_config.NumberColumn(format="%.1f"),
-                                "Lucro(u)": st.column_config.NumberColumn(format="%+.2f"),
-                                "ROI%": st.column_config.NumberColumn(format="%.2f"),
-                                "AvgOdd(W)": st.column_config.NumberColumn(format="%.2f"),
-                            },
-                        )
-                    else:
-                        st.caption("Sem dados.")
+            # ── Por side / liga / faixa de odds / mapa ──
+            _agg_sections = [
+                ("Over vs Under", "side", "Side", {"keep": ("OVER", "UNDER")}),
+                ("Por liga", "league_name", "Liga", {"drop_dash": True, "show_chart": False}),
+                ("Por faixa de odds", "odds_bucket", "Faixa", {"order": odds_bucket_order()}),
+                ("Por mapa", "mapa_label", "Mapa", {"show_chart": False}),
+            ]
+            for _sec_i, (_sec_title, _sec_col, _sec_header, _sec_opts) in enumerate(_agg_sections):
+                if _sec_i:
+                    st.divider()
+                st.subheader(_sec_title)
+                _sec_tabs = st.tabs(["Geral", "Empirico", "ML"])
+                for _sec_tab, _sec_subset in zip(_sec_tabs, (_p_df, _p_emp, _p_ml)):
+                    with _sec_tab:
+                        _render_agg_section(_sec_subset, _sec_col, _sec_header, **_sec_opts)
 
             # ── Cenários (Top N por jogo+mapa) ──
             with st.expander("📊 Cenários (Top N por jogo+mapa)", expanded=False):
                 st.caption("Simula performance com 1/2/3 apostas por mapa (maior odd ou maior EV).")
 
-                def _pick_top_n_per_game_map(_df: pd.DataFrame, *, n: int, by: str) -> pd.DataFrame:
-                    if _df.empty or "matchup_id" not in _df.columns or "mapa_label" not in _df.columns:
-                        return _df.iloc[0:0].copy()
-                    if by not in _df.columns:
-                        return _df.iloc[0:0].copy()
-                    work = _df.copy()
-                    work["odd_decimal"] = pd.to_numeric(work["odd_decimal"], errors="coerce")
-                    work["expected_value"] = pd.to_numeric(work["expected_value"], errors="coerce")
-                    sort_cols = ["odd_decimal", "expected_value"] if by == "odd_decimal" else ["expected_value", "odd_decimal"]
-                    work = work.sort_values(by=sort_cols, ascending=[False, False], na_position="last")
-                    parts = []
-                    for _, g in work.groupby(["matchup_id", "mapa_label"], dropna=False, sort=False):
-                        parts.append(g.head(max(1, int(n))))
-                    return pd.concat(parts, ignore_index=True) if parts else work.iloc[0:0].copy()
+                # ordena uma vez por critério; cada Top N é só um head(n) nos grupos já ordenados
+                _scen_groups = {}
+                if not _p_df.empty and {"matchup_id", "mapa_label"} <= set(_p_df.columns):
+                    for by_col, sort_cols in [("odd_decimal", ["odd_decimal", "expected_value"]),
+                                              ("expected_value", ["expected_value", "odd_decimal"])]:
+                        _scen_groups[by_col] = (
+                            _p_df.sort_values(by=sort_cols, ascending=[False, False], na_position="last")
+                            .groupby(["matchup_id", "mapa_label"], dropna=False, sort=False)
+                        )
 
                 scenarios = []
                 for n_pick in (1, 2, 3):
                     for by_col, label in [("odd_decimal", "Odd"), ("expected_value", "EV")]:
-                        _df_pick = _pick_top_n_per_game_map(_p_df, n=n_pick, by=by_col)
-                        _s_pick = summary_stats(_df_pick)
+                        _grp = _scen_groups.get(by_col)
+                        _df_pick = _grp.head(n_pick) if _grp is not None else _p_df.iloc[0:0]
+                        _s_pick = _cached_summary(_df_pick)
                         scenarios.append({
                             "Cenário": f"Top {n_pick} por {label}",
                             "N": _s_pick["n"],
@@ -2030,16 +2181,11 @@ with tab_perf:
                 df_scen = pd.DataFrame(scenarios)
                 st.dataframe(
                     df_scen, width="stretch", hide_index=True,
-                    column_config={
-                        "N": st.column_config.NumberColumn(format="%d"),
-                        "WR%": st.column_config.NumberColumn(format="%.1f"),
-                        "Lucro(u)": st.column_config.NumberColumn(format="%+.2f"),
-                        "ROI%": st.column_config.NumberColumn(format="%+.2f"),
-                    },
+                    column_config=_COLS_SCENARIOS,
                 )
 
             # ── Best/worst league ──
-            _bw_lg = agg_stats(_p_df, "league_name")
+            _bw_lg = _cached_agg(_p_df, "league_name")
             _bw_lg = _bw_lg[_bw_lg["league_name"] != "—"].copy() if not _bw_lg.empty else _bw_lg
             if not _bw_lg.empty and len(_bw_lg) >= 2:
                 st.divider()
@@ -2050,3 +2196,4 @@ with tab_perf:
                     st.metric("Melhor liga (ROI%)", f"{best['league_name']}", f"{best['ROI%']:+.2f}%")
                 with b2:
                     st.metric("Pior liga (ROI%)", f"{worst['league_name']}", f"{worst['ROI%']:+.2f}%")
+
@@ -2,28 +2,134 @@
 Análise de resultados das apostas por faixas de odds.
 Analisa apostas com odds >= 1.6, >= 1.7, >= 1.8, >= 1.9, >= 2.0
 """
+import hashlib
+import os
+import pickle
 import sqlite3
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import sys
 
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich import box
-    HAS_RICH = True
-except ImportError:
-    HAS_RICH = False
+import numpy as np
 
-try:
-    from prettytable import PrettyTable
-    HAS_PRETTYTABLE = True
-except ImportError:
-    HAS_PRETTYTABLE = False
+# Mesma chave PINNACLE_PLAIN de analyze_results.PLAIN_OUTPUT
+HAS_RICH = HAS_PRETTYTABLE = False
+if os.getenv("PINNACLE_PLAIN") != "1":
+    try:
+        from rich.console import Console
+        from rich.table import Table
+        from rich import box
+        from rich.style import Style
+        from rich.text import Text
+        HAS_RICH = True
+    except ImportError:
+        pass
+    
+    try:
+        from prettytable import PrettyTable
+        HAS_PRETTYTABLE = True
+    except ImportError:
+        pass
 
 from config import BETS_DB
-from analyze_results import BetStats, ResultsAnalyzer
+from bets_database import db_state
+from analyze_results import (
+    RN_IN_GAME_SQL, SIGN_COLORS, STRATEGY_TOP_N, BetArrays, BetStats, ResultsAnalyzer, market_side_key,
+)
+
+
+# Só as colunas lidas por BetStats/BetArrays, stats_by_group (liga) e market_side_key
+# (+ id e rn, a posição no jogo usada por rank_in_game)
+_RANGE_COLUMNS = (
+    "id, matchup_id, league_name, market_type, side, line_value,"
+    f" odd_decimal, expected_value, edge, status, {RN_IN_GAME_SQL}"
+)
+
+
+def _range_sql(with_min_odd: bool, exclude_low_lines: bool) -> str:
+    query = f"SELECT {_RANGE_COLUMNS} FROM bets WHERE status IN ('won', 'lost')"
+    if with_min_odd:
+        query += " AND odd_decimal >= ?"
+    if exclude_low_lines:
+        query += " AND NOT (LOWER(side) = 'under' AND line_value <= ?)"
+    return query + " ORDER BY matchup_id, expected_value DESC, id"
+
+
+# SQL de get_bets_by_odd_range pré-montado por (tem odd mínima, exclui linhas baixas)
+_RANGE_SQL = {
+    (with_min_odd, exclude_low_lines): _range_sql(with_min_odd, exclude_low_lines)
+    for with_min_odd in (False, True)
+    for exclude_low_lines in (False, True)
+}
+
+
+# Colunas das tabelas resumo (cabeçalho e largura no rich)
+_SUMMARY_HEADERS = (
+    "Faixa de Odds", "Resolvidas", "V", "L", "Win Rate",
+    "ROI", "Lucro", "Odd Média", "EV Médio",
+)
+_SUMMARY_WIDTHS = (25, 10, 5, 5, 10, 10, 12, 10, 10)
+
+if HAS_RICH:
+    # Mesma ordem de SIGN_COLORS: (negativo, zero, positivo)
+    _SIGN_STYLES = tuple(Style(color=color) for color in SIGN_COLORS)
+
+
+def _sign_style(value: float) -> "Style":
+    """Verde para positivo, vermelho para negativo, branco para zero."""
+    return _SIGN_STYLES[(value > 0) - (value < 0) + 1]
+
+
+# Cache em disco de analyze_by_odd_ranges: o resultado só depende do conteúdo do BETS_DB.
+# Um arquivo por (BETS_DB, filtro), regravado quando o banco muda: a chave (versão + estado
+# do banco) fica dentro do arquivo. Subir _RESULTS_CACHE_VERSION quando o formato de
+# results (ou o cálculo) mudar.
+_RESULTS_CACHE_DIR = Path.home() / ".cache" / "pinnacle"
+_RESULTS_CACHE_VERSION = 2
+
+
+def _results_cache_entry(exclude_low_lines: bool) -> Optional[Tuple[Path, Tuple]]:
+    """(arquivo, chave) do cache para o estado atual do BETS_DB (mtime+tamanho, inclusive o -wal)."""
+    state = db_state()
+    if state is None:
+        return None
+    digest = hashlib.md5(repr([str(BETS_DB), exclude_low_lines]).encode()).hexdigest()[:16]
+    return _RESULTS_CACHE_DIR / f"odds_ranges_{digest}.pkl", (_RESULTS_CACHE_VERSION, state)
+
+
+def _load_cached_results(entry: Optional[Tuple[Path, Tuple]]) -> Optional[Dict]:
+    if entry is None:
+        return None
+    path, key = entry
+    if not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            stored_key, results = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError, ValueError):
+        return None
+    return results if stored_key == key else None
+
+
+def _store_cached_results(entry: Optional[Tuple[Path, Tuple]], results: Dict):
+    if entry is None:
+        return
+    path, key = entry
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((key, results), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        # Arquivos do formato antigo (um por estado do banco, odds_<hash>.pkl) nunca eram apagados
+        for stale in path.parent.glob("odds_*.pkl"):
+            if not stale.name.startswith("odds_ranges_"):
+                stale.unlink(missing_ok=True)
+    except OSError:
+        pass  # cache é opcional
 
 
 class OddsAnalyzer:
@@ -32,6 +138,26 @@ class OddsAnalyzer:
     def __init__(self):
         self.console = Console(force_terminal=True, width=120) if HAS_RICH else None
         self.base_analyzer = ResultsAnalyzer()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Memo da sessão por (estado do banco, odd mínima, filtro): repetir a busca não reconsulta
+        self._fetch_range_cached = lru_cache(maxsize=32)(self._fetch_range)
+    
+    def _get_conn(self) -> sqlite3.Connection:
+        """Conexão somente-leitura reaproveitada entre consultas (aberta na primeira)."""
+        if self._conn is None:
+            conn = sqlite3.connect(BETS_DB, isolation_level=None)
+            conn.execute("PRAGMA query_only=1")
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._conn = conn
+        return self._conn
+    
+    def close(self):
+        """Fecha a conexão reaproveitada, se aberta."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
     
     def get_bets_by_odd_range(self, min_odd: float = None, exclude_low_lines: bool = False) -> List[Dict]:
         """
@@ -42,36 +168,26 @@ class OddsAnalyzer:
             exclude_low_lines: Se True, exclui apostas com line_value <= 27.5 e side = 'under'
         
         Returns:
-            Lista de apostas resolvidas (won/lost)
+            Lista de apostas resolvidas (won/lost); a mesma lista é devolvida
+            enquanto o banco não mudar, então não deve ser modificada
         """
-        if not BETS_DB.exists():
+        state = db_state()
+        if state is None:
             return []
-        
-        conn = sqlite3.connect(BETS_DB)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT * FROM bets
-            WHERE status IN ('won', 'lost')
-        """
+        return self._fetch_range_cached(state, min_odd, exclude_low_lines)
+    
+    def _fetch_range(self, state: Tuple, min_odd: Optional[float], exclude_low_lines: bool) -> List[Dict]:
+        """Consulta de get_bets_by_odd_range; state (de db_state()) só entra na chave do cache."""
         params = []
-        
         if min_odd is not None:
-            query += " AND odd_decimal >= ?"
             params.append(min_odd)
-        
         if exclude_low_lines:
-            query += " AND NOT (LOWER(side) = 'under' AND line_value <= ?)"
             params.append(27.5)
         
-        query += " ORDER BY matchup_id, expected_value DESC"
-        
-        cursor.execute(query, params)
-        bets = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        
-        return bets
+        cursor = self._get_conn().execute(_RANGE_SQL[(min_odd is not None, exclude_low_lines)], params)
+        # Tuplas simples lidas direto do cursor: uma única materialização (os dicts)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
     
     def analyze_by_odd_ranges(self, exclude_low_lines: bool = False) -> Dict:
         """
@@ -83,6 +199,12 @@ class OddsAnalyzer:
         Returns:
             Dicionário com análises por faixa de odds
         """
+        # Mesmo banco (mtime+tamanho) e mesmo filtro: reaproveita o resultado salvo
+        cache_entry = _results_cache_entry(exclude_low_lines)
+        cached = _load_cached_results(cache_entry)
+        if cached is not None:
+            return cached
+        
         # Define faixas de odds
         odd_ranges = [
             (None, 'Todas as apostas'),
@@ -97,55 +219,92 @@ class OddsAnalyzer:
             (2.2, 'Odds >= 2.2'),
         ]
         
-        results = {}
+        # Uma única consulta (sem odd mínima); cada faixa é uma máscara sobre as mesmas colunas
+        all_bets = self.get_bets_by_odd_range(min_odd=None, exclude_low_lines=exclude_low_lines)
+        arrays = BetArrays(all_bets)
+        # Liga e mercado+side codificados uma vez; cada faixa agrupa só por máscara
+        league_groups = arrays.group_codes([b.get('league_name', 'unknown') for b in all_bets])
+        market_groups = arrays.group_codes([market_side_key(b) for b in all_bets])
         
-        for min_odd, label in odd_ranges:
-            bets = self.get_bets_by_odd_range(min_odd=min_odd, exclude_low_lines=exclude_low_lines)
-            
-            if not bets:
-                results[label] = {
-                    'stats': None,
-                    'count': 0,
-                }
-                continue
-            
-            # Calcula estatísticas
-            stats = BetStats(bets)
-            
-            # Análise por liga
-            by_league = self.base_analyzer.analyze_by_dimension(bets, 'league')
-            
-            # Análise por mercado (market_type + side)
-            by_market = self.base_analyzer.analyze_by_market_with_side(bets)
-            
-            # Análise por estratégia
-            strategies = {
-                'all': 'Todas as apostas',
-                'best': 'Apenas a melhor',
-                'top2': 'Top 2 melhores',
-                'top3': 'Top 3 melhores',
-                'top4': 'Top 4 melhores',
-                'top5': 'Top 5 melhores',
-            }
-            
-            by_strategy = {}
-            for strategy_key, strategy_label in strategies.items():
-                filtered_bets = self.base_analyzer.filter_by_strategy(bets, strategy_key)
-                by_strategy[strategy_label] = BetStats(filtered_bets)
-            
-            results[label] = {
-                'stats': stats,
-                'count': len(bets),
-                'by_league': by_league,
-                'by_market': by_market,
-                'by_strategy': by_strategy,
-            }
+        # Quantas apostas há em cada faixa, por busca binária nas odds ordenadas
+        # (odd >= min_odd); faixas vazias (as de odd mais alta) nem vão para o cálculo
+        sorted_odd = np.sort(arrays.odd)
+        non_empty = [
+            min_odd for min_odd, _ in odd_ranges
+            if min_odd is None or np.searchsorted(sorted_odd, min_odd, side='left') < sorted_odd.size
+        ]
+        
+        # Faixas independentes (só leem os mesmos arrays): calculadas em paralelo
+        def analyze_range(min_odd):
+            return self._analyze_range(arrays, league_groups, market_groups, min_odd)
+        
+        workers = max(1, min(len(non_empty), os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            computed = dict(zip(non_empty, executor.map(analyze_range, non_empty)))
+        
+        results = {
+            label: computed.get(min_odd, {'stats': None, 'count': 0})
+            for min_odd, label in odd_ranges
+        }
         
+        _store_cached_results(cache_entry, results)
         return results
     
-    def print_analysis(self, results: Dict, show_details: bool = True):
-        """Imprime análise formatada por faixas de odds."""
-        filter_label = ' (SEM under 27.5 ou menos)' if any('exclude_low_lines' in str(r) for r in results.values()) else ''
+    def _analyze_range(self, arrays: BetArrays, league_groups, market_groups,
+                       min_odd: Optional[float]) -> Dict:
+        """Estatísticas de uma faixa de odds (geral, por liga, mercado e estratégia)."""
+        if min_odd is None:
+            mask = np.ones(len(arrays.bets), dtype=bool)
+        else:
+            mask = arrays.odd >= min_odd
+        count = int(mask.sum())
+        
+        if not count:
+            return {
+                'stats': None,
+                'count': 0,
+            }
+        
+        # Calcula estatísticas
+        stats = BetStats.from_arrays(arrays, mask)
+        
+        # Análise por liga
+        by_league = arrays.stats_by_group(*league_groups, mask)
+        
+        # Análise por mercado (market_type + side)
+        by_market = arrays.stats_by_group(*market_groups, mask)
+        
+        # Análise por estratégia
+        strategies = {
+            'all': 'Todas as apostas',
+            'best': 'Apenas a melhor',
+            'top2': 'Top 2 melhores',
+            'top3': 'Top 3 melhores',
+            'top4': 'Top 4 melhores',
+            'top5': 'Top 5 melhores',
+        }
+        
+        # Top N por jogo = posição no jogo (já em ordem de EV) < N, sem reagrupar as apostas
+        rank = arrays.rank_in_game(mask)
+        by_strategy = {}
+        for strategy_key, strategy_label in strategies.items():
+            if strategy_key == 'all':
+                strategy_mask = mask
+            else:
+                strategy_mask = mask & (rank < STRATEGY_TOP_N[strategy_key])
+            by_strategy[strategy_label] = BetStats.from_arrays(arrays, strategy_mask)
+        
+        return {
+            'stats': stats,
+            'count': count,
+            'by_league': by_league,
+            'by_market': by_market,
+            'by_strategy': by_strategy,
+        }
+    
+    def print_analysis(self, results: Dict, show_details: bool = True, exclude_low_lines: bool = False):
+        """Imprime análise formatada por faixas de odds (exclude_low_lines só muda o título)."""
+        filter_label = ' (SEM under 27.5 ou menos)' if exclude_low_lines else ''
         title = f"ANÁLISE POR FAIXAS DE ODDS{filter_label}"
         
         if self.console:
@@ -208,61 +367,43 @@ class OddsAnalyzer:
             
             print()
     
-    def print_summary_table(self, results: Dict):
-        """Imprime tabela resumo comparando todas as faixas de odds."""
+    def _render_rows(self, rows: List[Tuple[str, BetStats]], title: str,
+                     empty_message: str, empty_style: str = "red"):
+        """Imprime título e tabela de faixas de odds (PrettyTable, rich ou ASCII)."""
         if self.console:
             self.console.print(f"\n[bold cyan]{'=' * 100}[/bold cyan]")
-            self.console.print("[bold yellow]TABELA RESUMO - COMPARAÇÃO POR FAIXAS DE ODDS[/bold yellow]")
+            self.console.print(f"[bold yellow]{title}[/bold yellow]")
             self.console.print(f"[bold cyan]{'=' * 100}[/bold cyan]\n")
         else:
             print(f"\n{'=' * 100}")
-            print("TABELA RESUMO - COMPARAÇÃO POR FAIXAS DE ODDS")
+            print(title)
             print(f"{'=' * 100}\n")
         
-        # Prepara dados para tabela
-        rows = []
-        for label, data in results.items():
-            stats = data['stats']
-            if not stats:
-                continue
-            
-            rows.append({
-                'label': label,
-                'stats': stats,
-            })
-        
         if not rows:
             if self.console:
-                self.console.print("[red]Nenhum dado disponível para comparação[/red]\n")
+                self.console.print(f"[{empty_style}]{empty_message}[/{empty_style}]\n")
             else:
-                print("Nenhum dado disponível para comparação\n")
+                print(f"{empty_message}\n")
             return
         
-        # Cria tabela
         if HAS_PRETTYTABLE:
             table = PrettyTable()
-            table.field_names = [
-                "Faixa de Odds", "Resolvidas", "V", "L", "Win Rate", 
-                "ROI", "Lucro", "Odd Média", "EV Médio"
-            ]
+            table.field_names = list(_SUMMARY_HEADERS)
             for col in table.field_names:
-                if col == "Faixa de Odds":
-                    table.align[col] = "l"
-                else:
-                    table.align[col] = "r"
+                table.align[col] = "l" if col == "Faixa de Odds" else "r"
             
-            for row in rows:
-                stats = row['stats']
+            for label, stats in rows:
+                cells = stats.display
                 table.add_row([
-                    row['label'],
+                    label,
                     stats.resolved,
                     stats.won,
                     stats.lost,
-                    f"{stats.win_rate:.1f}%",
-                    f"{stats.roi:+.2f}%",
-                    f"{stats.profit:+.2f}",
-                    f"{stats.avg_win_odd:.2f}",
-                    f"{stats.avg_ev*100:.2f}%",
+                    cells['win_rate'],
+                    cells['roi'],
+                    cells['profit'],
+                    cells['avg_win_odd'],
+                    cells['avg_ev'],
                 ])
             
             print(table)
@@ -274,31 +415,25 @@ class OddsAnalyzer:
                 show_lines=False,
                 min_width=110
             )
-            table.add_column("Faixa de Odds", style="cyan", width=25)
-            table.add_column("Resolvidas", justify="right", width=10)
-            table.add_column("V", justify="right", width=5)
-            table.add_column("L", justify="right", width=5)
-            table.add_column("Win Rate", justify="right", width=10)
-            table.add_column("ROI", justify="right", width=10)
-            table.add_column("Lucro", justify="right", width=12)
-            table.add_column("Odd Média", justify="right", width=10)
-            table.add_column("EV Médio", justify="right", width=10)
+            for header, width in zip(_SUMMARY_HEADERS, _SUMMARY_WIDTHS):
+                if header == "Faixa de Odds":
+                    table.add_column(header, style="cyan", width=width)
+                else:
+                    table.add_column(header, justify="right", width=width)
             
-            for row in rows:
-                stats = row['stats']
-                roi_style = "green" if stats.roi > 0 else "red" if stats.roi < 0 else "white"
-                profit_style = "green" if stats.profit > 0 else "red" if stats.profit < 0 else "white"
-                
+            # Células coloridas como Text já estilizado: sem passar pelo parser de markup
+            for label, stats in rows:
+                cells = stats.display
                 table.add_row(
-                    row['label'],
-                    str(stats.resolved),
-                    str(stats.won),
-                    str(stats.lost),
-                    f"{stats.win_rate:.1f}%",
-                    f"[{roi_style}]{stats.roi:+.2f}%[/{roi_style}]",
-                    f"[{profit_style}]{stats.profit:+.2f}[/{profit_style}]",
-                    f"{stats.avg_win_odd:.2f}",
-                    f"{stats.avg_ev*100:.2f}%",
+                    Text(label),
+                    Text(str(stats.resolved)),
+                    Text(str(stats.won)),
+                    Text(str(stats.lost)),
+                    Text(cells['win_rate']),
+                    Text.styled(cells['roi'], _sign_style(stats.roi)),
+                    Text.styled(cells['profit'], _sign_style(stats.profit)),
+                    Text(cells['avg_win_odd']),
+                    Text(cells['avg_ev']),
                 )
             
             self.console.print(table)
@@ -306,22 +441,31 @@ class OddsAnalyzer:
             # Fallback ASCII
             print(f"{'Faixa de Odds':<25} {'Resolvidas':>10} {'V':>5} {'L':>5} {'Win Rate':>10} {'ROI':>10} {'Lucro':>12} {'Odd Média':>10} {'EV Médio':>10}")
             print("-" * 100)
-            for row in rows:
-                stats = row['stats']
+            for label, stats in rows:
+                cells = stats.display
                 print(
-                    f"{row['label']:<25} "
+                    f"{label:<25} "
                     f"{stats.resolved:>10} "
                     f"{stats.won:>5} "
                     f"{stats.lost:>5} "
-                    f"{stats.win_rate:>9.1f}% "
-                    f"{stats.roi:>+9.2f}% "
-                    f"{stats.profit:>+11.2f} "
-                    f"{stats.avg_win_odd:>9.2f} "
-                    f"{stats.avg_ev*100:>9.2f}%"
+                    f"{cells['win_rate']:>10} "
+                    f"{cells['roi']:>10} "
+                    f"{cells['profit']:>11} "
+                    f"{cells['avg_win_odd']:>9} "
+                    f"{cells['avg_ev']:>10}"
                 )
         
         print()
     
+    def print_summary_table(self, results: Dict):
+        """Imprime tabela resumo comparando todas as faixas de odds."""
+        rows = [(label, data['stats']) for label, data in results.items() if data['stats']]
+        self._render_rows(
+            rows,
+            "TABELA RESUMO - COMPARAÇÃO POR FAIXAS DE ODDS",
+            "Nenhum dado disponível para comparação",
+        )
+    
     def print_strategy_tables(self, results: Dict):
         """Imprime tabelas resumo por estratégia (melhor, top 2, top 3, top 4, top 5)."""
         strategies = [
@@ -333,117 +477,18 @@ class OddsAnalyzer:
         ]
         
         for strategy_key, strategy_label in strategies:
-            if self.console:
-                self.console.print(f"\n[bold cyan]{'=' * 100}[/bold cyan]")
-                self.console.print(f"[bold yellow]TABELA RESUMO - {strategy_label.upper()} POR FAIXA DE ODDS[/bold yellow]")
-                self.console.print(f"[bold cyan]{'=' * 100}[/bold cyan]\n")
-            else:
-                print(f"\n{'=' * 100}")
-                print(f"TABELA RESUMO - {strategy_label.upper()} POR FAIXA DE ODDS")
-                print(f"{'=' * 100}\n")
-            
-            # Prepara dados para tabela
             rows = []
             for label, data in results.items():
                 stats = data.get('by_strategy', {}).get(strategy_label)
-                if not stats or stats.resolved == 0:
-                    continue
-                
-                rows.append({
-                    'label': label,
-                    'stats': stats,
-                })
-            
-            if not rows:
-                if self.console:
-                    self.console.print(f"[dim]Nenhum dado disponível para {strategy_label}[/dim]\n")
-                else:
-                    print(f"Nenhum dado disponível para {strategy_label}\n")
-                continue
+                if stats and stats.resolved:
+                    rows.append((label, stats))
             
-            # Cria tabela
-            if HAS_PRETTYTABLE:
-                table = PrettyTable()
-                table.field_names = [
-                    "Faixa de Odds", "Resolvidas", "V", "L", "Win Rate", 
-                    "ROI", "Lucro", "Odd Média", "EV Médio"
-                ]
-                for col in table.field_names:
-                    if col == "Faixa de Odds":
-                        table.align[col] = "l"
-                    else:
-                        table.align[col] = "r"
-                
-                for row in rows:
-                    stats = row['stats']
-                    table.add_row([
-                        row['label'],
-                        stats.resolved,
-                        stats.won,
-                        stats.lost,
-                        f"{stats.win_rate:.1f}%",
-                        f"{stats.roi:+.2f}%",
-                        f"{stats.profit:+.2f}",
-                        f"{stats.avg_win_odd:.2f}",
-                        f"{stats.avg_ev*100:.2f}%",
-                    ])
-                
-                print(table)
-            elif self.console:
-                table = Table(
-                    show_header=True,
-                    header_style="bold magenta",
-                    box=box.SIMPLE,
-                    show_lines=False,
-                    min_width=110
-                )
-                table.add_column("Faixa de Odds", style="cyan", width=25)
-                table.add_column("Resolvidas", justify="right", width=10)
-                table.add_column("V", justify="right", width=5)
-                table.add_column("L", justify="right", width=5)
-                table.add_column("Win Rate", justify="right", width=10)
-                table.add_column("ROI", justify="right", width=10)
-                table.add_column("Lucro", justify="right", width=12)
-                table.add_column("Odd Média", justify="right", width=10)
-                table.add_column("EV Médio", justify="right", width=10)
-                
-                for row in rows:
-                    stats = row['stats']
-                    roi_style = "green" if stats.roi > 0 else "red" if stats.roi < 0 else "white"
-                    profit_style = "green" if stats.profit > 0 else "red" if stats.profit < 0 else "white"
-                    
-                    table.add_row(
-                        row['label'],
-                        str(stats.resolved),
-                        str(stats.won),
-                        str(stats.lost),
-                        f"{stats.win_rate:.1f}%",
-                        f"[{roi_style}]{stats.roi:+.2f}%[/{roi_style}]",
-                        f"[{profit_style}]{stats.profit:+.2f}[/{profit_style}]",
-                        f"{stats.avg_win_odd:.2f}",
-                        f"{stats.avg_ev*100:.2f}%",
-                    )
-                
-                self.console.print(table)
-            else:
-                # Fallback ASCII
-                print(f"{'Faixa de Odds':<25} {'Resolvidas':>10} {'V':>5} {'L':>5} {'Win Rate':>10} {'ROI':>10} {'Lucro':>12} {'Odd Média':>10} {'EV Médio':>10}")
-                print("-" * 100)
-                for row in rows:
-                    stats = row['stats']
-                    print(
-                        f"{row['label']:<25} "
-                        f"{stats.resolved:>10} "
-                        f"{stats.won:>5} "
-                        f"{stats.lost:>5} "
-                        f"{stats.win_rate:>9.1f}% "
-                        f"{stats.roi:>+9.2f}% "
-                        f"{stats.profit:>+11.2f} "
-                        f"{stats.avg_win_odd:>9.2f} "
-                        f"{stats.avg_ev*100:>9.2f}%"
-                    )
-            
-            print()
+            self._render_rows(
+                rows,
+                f"TABELA RESUMO - {strategy_label.upper()} POR FAIXA DE ODDS",
+                f"Nenhum dado disponível para {strategy_label}",
+                empty_style="dim",
+            )
 
 
 def run_odds_analysis(show_details: bool = True, exclude_low_lines: bool = False):
@@ -455,15 +500,17 @@ def run_odds_analysis(show_details: bool = True, exclude_low_lines: bool = False
         exclude_low_lines: Se True, exclui under 27.5 ou menos
     """
     # Força encoding UTF-8 para Windows
-    import os
     if os.name == 'nt':
         os.environ['PYTHONIOENCODING'] = 'utf-8'
     
     analyzer = OddsAnalyzer()
     
     # Análise completa
-    results = analyzer.analyze_by_odd_ranges(exclude_low_lines=exclude_low_lines)
-    analyzer.print_analysis(results, show_details=show_details)
+    try:
+        results = analyzer.analyze_by_odd_ranges(exclude_low_lines=exclude_low_lines)
+    finally:
+        analyzer.close()
+    analyzer.print_analysis(results, show_details=show_details, exclude_low_lines=exclude_low_lines)
     
     # Tabela resumo principal (todas as apostas)
     analyzer.print_summary_table(results)
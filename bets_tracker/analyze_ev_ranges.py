@@ -2,123 +2,172 @@
 Análise detalhada de apostas por faixas de EV (Expected Value)
 Mostra resultados separados por EV >= 5%, >= 10%, >= 15% e >= 20%
 """
+import io
 import sqlite3
-from pathlib import Path
-from typing import Dict, List
+import sys
+import textwrap
+from typing import Callable, Dict, List, Optional
 from config import BETS_DB
+from bets_database import db_state
 
 
-def analyze_by_ev_ranges(metodo: str = None, best_per_game: bool = False) -> Dict:
+# Faixas de EV (em decimal: 0.05 = 5%, 0.10 = 10%, etc)
+EV_RANGES = {
+    'all': {'min': 0.0, 'label': 'Todas as apostas'},
+    'ev_5_plus': {'min': 0.05, 'label': 'EV >= 5%'},
+    'ev_10_plus': {'min': 0.10, 'label': 'EV >= 10%'},
+    'ev_15_plus': {'min': 0.15, 'label': 'EV >= 15%'},
+    'ev_20_plus': {'min': 0.20, 'label': 'EV >= 20%'},
+}
+
+# As faixas ">= min" são aninhadas: cada aposta vai para um único balde (a faixa de maior
+# mínimo que atinge), o SQLite agrega por balde e cada faixa é a soma acumulada dos
+# baldes, da mais alta para a mais baixa. EV negativo fica fora de todas (balde NULL).
+_BAND_KEYS_DESC = sorted(EV_RANGES, key=lambda key: EV_RANGES[key]['min'], reverse=True)
+_BUCKET_SQL = "CASE {} END".format(" ".join(
+    f"WHEN expected_value >= {EV_RANGES[key]['min']!r} THEN '{key}'" for key in _BAND_KEYS_DESC
+))
+_BUCKET_AGGREGATES = """
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE status = 'won') AS wins,
+            COUNT(*) FILTER (WHERE status = 'lost') AS losses,
+            SUM(odd_decimal) FILTER (WHERE status = 'won') AS win_odd_sum,
+            SUM(odd_decimal) FILTER (WHERE status = 'lost') AS loss_odd_sum,
+            SUM(odd_decimal) AS odd_sum,
+            SUM(expected_value) AS ev_sum,
+            SUM(edge) AS edge_sum,
+            SUM(CASE WHEN status = 'won' THEN odd_decimal - 1 ELSE -1 END) AS profit,
+            MIN(expected_value) AS min_ev,
+            MAX(expected_value) AS max_ev,
+            MIN(odd_decimal) AS min_odd,
+            MAX(odd_decimal) AS max_odd"""
+_SUM_FIELDS = ('total', 'wins', 'losses', 'win_odd_sum', 'loss_odd_sum', 'odd_sum', 'ev_sum', 'edge_sum', 'profit')
+
+
+def _safe_div(n: float, d: float, scale: float = 1.0) -> float:
+    """(n / d) * scale, ou 0.0 quando d é zero/None."""
+    return (n / d) * scale if d else 0.0
+
+
+def _expected_win_rate(avg_win_odd: float) -> float:
+    """Win rate implícito na odd média das vitórias (1/odd), em %; 0 sem vitórias."""
+    return _safe_div(1, avg_win_odd, 100)
+
+
+def _merge_bucket(acc: Optional[Dict], bucket: Optional[Dict]) -> Optional[Dict]:
+    """Soma de dois agregados de balde (somas somam; mínimos/máximos combinam)."""
+    if bucket is None:
+        return acc
+    if acc is None:
+        return dict(bucket)
+    merged = {field: (acc[field] or 0) + (bucket[field] or 0) for field in _SUM_FIELDS}
+    for field, pick in (('min_ev', min), ('max_ev', max), ('min_odd', min), ('max_odd', max)):
+        merged[field] = pick(acc[field], bucket[field])
+    return merged
+
+
+def _open_conn() -> sqlite3.Connection:
+    """Conexão só-leitura com o bets.db, com cache de páginas maior e mmap para as varreduras."""
+    conn = sqlite3.connect(BETS_DB)
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA query_only=1")
+    return conn
+
+
+# Colunas lidas pelas seções; todas cobertas por idx_resolved_ev (bets_database)
+_RESOLVED_COLUMNS = "id, expected_value, odd_decimal, status, edge, league_name, matchup_id"
+
+
+def _resolved_cte(metodo: str = None, best_per_game: bool = False):
+    """
+    CTE `resolved` com as apostas resolvidas (won/lost) do filtro, e seus parâmetros.
+    
+    Com best_per_game, mantém só a aposta de maior EV de cada jogo (empate: menor id, que
+    na mesma aposta em mapa 1 e mapa 2 é a do mapa 1).
+    """
+    where = "status IN ('won', 'lost')"
+    params = []
+    if metodo:
+        where += " AND metodo = ?"
+        params.append(metodo)
+    
+    if best_per_game:
+        cte = f"""
+            WITH ranked AS (
+                SELECT {_RESOLVED_COLUMNS}, ROW_NUMBER() OVER (
+                    PARTITION BY matchup_id ORDER BY expected_value DESC, id
+                ) AS rn
+                FROM bets
+                WHERE {where}
+            ),
+            resolved AS (SELECT * FROM ranked WHERE rn = 1)
+        """
+    else:
+        cte = f"WITH resolved AS (SELECT {_RESOLVED_COLUMNS} FROM bets WHERE {where})"
+    return cte, params
+
+
+# Resultados de consulta já calculados (faixas e ligas), por (tipo, metodo, best_per_game,
+# estado do banco); uma escrita no banco muda o estado e invalida a entrada
+_QUERY_CACHE: Dict[tuple, object] = {}
+_QUERY_CACHE_SIZE = 16
+
+
+def _cached_query(kind: str, metodo: str, best_per_game: bool, fetch: Callable[[], object]):
+    """Devolve fetch() memoizado para o estado atual do banco (db_state)."""
+    cache_key = (kind, metodo, best_per_game, db_state())
+    value = _QUERY_CACHE.get(cache_key)
+    if value is None:
+        value = fetch()
+        _QUERY_CACHE[cache_key] = value
+        if len(_QUERY_CACHE) > _QUERY_CACHE_SIZE:
+            _QUERY_CACHE.pop(next(iter(_QUERY_CACHE)))
+    return value
+
+
+def analyze_by_ev_ranges(metodo: str = None, best_per_game: bool = False,
+                         conn: Optional[sqlite3.Connection] = None) -> Dict:
     """
     Analisa apostas resolvidas por faixas de EV.
     
     Args:
         metodo: Filtro opcional por método ('probabilidade_empirica' ou 'machinelearning')
         best_per_game: Se True, considera apenas a melhor aposta (maior EV) por jogo
+        conn: Conexão já aberta para reaproveitar; não é fechada aqui
     
     Returns:
-        Dict com estatísticas por faixa de EV
+        Dict com estatísticas por faixa de EV (inclui mínimos/máximos de EV e odd da faixa)
     """
     if not BETS_DB.exists():
         print(f"[ERRO] Banco não encontrado: {BETS_DB}")
         return {}
     
-    conn = sqlite3.connect(BETS_DB)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    # Query base
-    base_query = """
-        SELECT 
-            id,
-            metodo,
-            expected_value,
-            odd_decimal,
-            status,
-            edge,
-            league_name,
-            matchup_id
-        FROM bets
-        WHERE status IN ('won', 'lost')
-    """
+    totals = _cached_query('bands', metodo, best_per_game,
+                           lambda: _fetch_band_totals(metodo, best_per_game, conn))
     
-    params = []
-    if metodo:
-        base_query += " AND metodo = ?"
-        params.append(metodo)
-    
-    cursor.execute(base_query, params)
-    bets = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    
-    # Se best_per_game=True, filtra para manter apenas a melhor aposta (maior EV) por jogo
     if best_per_game:
-        from collections import defaultdict
-        bets_by_game = defaultdict(list)
-        
-        # Agrupa apostas por matchup_id
-        for bet in bets:
-            bets_by_game[bet['matchup_id']].append(bet)
-        
-        # Para cada jogo, pega apenas a aposta com maior EV
-        filtered_bets = []
-        for matchup_id, game_bets in bets_by_game.items():
-            # Ordena por EV (decrescente) e pega a primeira
-            best_bet = max(game_bets, key=lambda x: x['expected_value'])
-            filtered_bets.append(best_bet)
-        
-        bets = filtered_bets
-        print(f"[FILTRO] Considerando apenas melhor aposta por jogo: {len(bets)} apostas (de {sum(len(gb) for gb in bets_by_game.values())} totais)")
+        print(f"[FILTRO] Considerando apenas melhor aposta por jogo: {totals['n_selected']} apostas (de {totals['n_resolved']} totais)")
         print()
     
-    if not bets:
+    if not totals['n_selected']:
         return {}
     
-    # Define faixas de EV (em decimal: 0.05 = 5%, 0.10 = 10%, etc)
-    ev_ranges = {
-        'all': {'min': 0.0, 'label': 'Todas as apostas'},
-        'ev_5_plus': {'min': 0.05, 'label': 'EV >= 5%'},
-        'ev_10_plus': {'min': 0.10, 'label': 'EV >= 10%'},
-        'ev_15_plus': {'min': 0.15, 'label': 'EV >= 15%'},
-        'ev_20_plus': {'min': 0.20, 'label': 'EV >= 20%'},
-    }
-    
     results = {}
     
-    for range_key, range_info in ev_ranges.items():
-        # Filtra apostas por faixa de EV
-        filtered_bets = [
-            bet for bet in bets 
-            if bet['expected_value'] >= range_info['min']
-        ]
-        
-        if not filtered_bets:
+    for range_key, range_info in EV_RANGES.items():
+        band = totals['bands'].get(range_key)
+        if not band:
             continue
         
-        # Calcula estatísticas
-        total = len(filtered_bets)
-        wins = sum(1 for bet in filtered_bets if bet['status'] == 'won')
-        losses = sum(1 for bet in filtered_bets if bet['status'] == 'lost')
-        win_rate = (wins / total * 100) if total > 0 else 0
-        
-        # Odd média das vitórias
-        win_odds = [bet['odd_decimal'] for bet in filtered_bets if bet['status'] == 'won']
-        avg_win_odd = sum(win_odds) / len(win_odds) if win_odds else 0
-        
-        # EV médio
-        avg_ev = sum(bet['expected_value'] for bet in filtered_bets) / total
-        
-        # Lucro (assumindo stake de 1 unidade)
-        profit = sum(
-            (bet['odd_decimal'] - 1) if bet['status'] == 'won' else -1
-            for bet in filtered_bets
-        )
-        
-        # ROI (Return on Investment)
-        roi = (profit / total * 100) if total > 0 else 0
-        
-        # Edge médio
-        avg_edge = sum(bet['edge'] for bet in filtered_bets) / total if filtered_bets else 0
+        total = band['total']
+        wins = band['wins']
+        losses = band['losses']
+        profit = band['profit']
+        win_rate = wins / total * 100
+        avg_win_odd = _safe_div(band['win_odd_sum'], wins)
+        expected_win_rate = _expected_win_rate(avg_win_odd)
         
         results[range_key] = {
             'label': range_info['label'],
@@ -127,15 +176,67 @@ def analyze_by_ev_ranges(metodo: str = None, best_per_game: bool = False) -> Dic
             'losses': losses,
             'win_rate': win_rate,
             'avg_win_odd': avg_win_odd,
-            'avg_ev': avg_ev,
-            'avg_edge': avg_edge,
+            'expected_win_rate': expected_win_rate,
+            'win_rate_diff': win_rate - expected_win_rate,
+            'avg_ev': band['ev_sum'] / total,
+            'avg_edge': (band['edge_sum'] or 0) / total,
             'profit': profit,
-            'roi': roi
+            'roi': profit / total * 100,
+            'avg_profit_per_bet': profit / total,
+            'min_ev': band['min_ev'],
+            'max_ev': band['max_ev'],
+            'min_odd': band['min_odd'],
+            'max_odd': band['max_odd'],
+            'avg_odd': band['odd_sum'] / total,
+            'avg_loss_odd': band['loss_odd_sum'] / losses if losses else None,
         }
     
     return results
 
 
+def _fetch_band_totals(metodo: str, best_per_game: bool, conn: Optional[sqlite3.Connection]) -> Dict:
+    """
+    Uma consulta agrupada por balde de EV (sem trazer as apostas).
+    
+    Returns:
+        {'n_resolved', 'n_selected', 'bands': {faixa: agregados acumulados da faixa}}
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = _open_conn()
+    
+    cte, params = _resolved_cte(metodo, best_per_game)
+    query = f"""
+        {cte}
+        SELECT {_BUCKET_SQL} AS bucket, {_BUCKET_AGGREGATES}
+        FROM resolved
+        GROUP BY bucket
+    """
+    cursor = conn.execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    buckets = {row[0]: dict(zip(columns, row)) for row in cursor}
+    
+    n_resolved = conn.execute(
+        f"SELECT COUNT(*) FROM bets WHERE status IN ('won', 'lost'){' AND metodo = ?' if metodo else ''}",
+        params,
+    ).fetchone()[0] if best_per_game else None
+    if own_conn:
+        conn.close()
+    
+    bands = {}
+    acc = None
+    for key in _BAND_KEYS_DESC:
+        acc = _merge_bucket(acc, buckets.get(key))
+        if acc is not None:
+            bands[key] = acc
+    
+    return {
+        'n_resolved': n_resolved,
+        'n_selected': sum(bucket['total'] for bucket in buckets.values()),
+        'bands': bands,
+    }
+
+
 def print_analysis(metodo: str = None, best_per_game: bool = False):
     """Imprime análise formatada por faixas de EV."""
     metodo_label = metodo if metodo else "Todos os métodos"
@@ -146,241 +247,214 @@ def print_analysis(metodo: str = None, best_per_game: bool = False):
     print("=" * 80)
     print()
     
-    results = analyze_by_ev_ranges(metodo=metodo, best_per_game=best_per_game)
+    if not BETS_DB.exists():
+        print(f"[ERRO] Banco não encontrado: {BETS_DB}")
+        print("[AVISO] Nenhuma aposta resolvida encontrada")
+        return
+    
+    # Uma conexão para todas as seções
+    conn = _open_conn()
+    try:
+        _print_sections(conn, metodo, best_per_game)
+    finally:
+        conn.close()
+
+
+def _fetch_league_rows(conn: sqlite3.Connection, metodo: str, best_per_game: bool) -> List[tuple]:
+    """Uma consulta agrupada: uma linha por liga (mesma seleção de apostas das faixas)."""
+    cte, params = _resolved_cte(metodo, best_per_game)
+    cursor = conn.execute(f"""
+        {cte}
+        SELECT
+            league_name,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE status = 'won') AS wins,
+            COUNT(*) FILTER (WHERE status = 'lost') AS losses,
+            AVG(odd_decimal) FILTER (WHERE status = 'won') AS avg_win_odd,
+            AVG(expected_value) AS avg_ev,
+            SUM(CASE WHEN status = 'won' THEN odd_decimal - 1 ELSE -1 END) AS profit
+        FROM resolved
+        GROUP BY league_name
+        ORDER BY league_name
+    """, params)
+    return cursor.fetchall()
+
+
+# Blocos do relatório por faixa/liga: um format_map por bloco em vez de um print por linha
+_BAND_TEMPLATE = textwrap.dedent("""\
+    [{label}]
+       Total resolvidas: {total}
+       Vitorias: {wins} ({win_rate:.1f}%)
+       Derrotas: {losses}
+       Odd media (vitorias): {avg_win_odd:.2f}
+       EV medio: {avg_ev_pct:.2f}%
+       Edge medio: {avg_edge:.2f}%
+       Lucro: {profit:.2f} unidades
+       ROI: {roi:.2f}%
+""")
+_BAND_EXPECTED_TEMPLATE = (
+    "   Win rate esperado (1/odd): {expected_win_rate:.1f}%\n"
+    "   Win rate real: {win_rate:.1f}%\n"
+    "   Diferenca: {win_rate_diff:+.1f}% ({verdict} que esperado)\n"
+)
+_BAND_PROFIT_TEMPLATE = "   Lucro medio por aposta: {avg_profit_per_bet:.3f} unidades\n\n"
+_COMPARE_TEMPLATE = textwrap.dedent("""\
+
+    {label}:
+       Win Rate: {win_rate:.1f}% ({win_rate_vs_all:+.1f}% vs todas) | ROI: {roi:.2f}% ({roi_vs_all:+.2f}% vs todas)
+       EV medio: {avg_ev_pct:.2f}% | Apostas: {total}
+""")
+_DETAIL_TEMPLATE = textwrap.dedent("""\
+
+    {label} (EV >= {min_pct:.0f}%):
+       Total: {total} apostas
+       EV minimo: {min_ev_pct:.2f}%
+       EV maximo: {max_ev_pct:.2f}%
+       EV medio: {avg_ev_pct:.2f}%
+       Odd minima: {min_odd:.2f}
+       Odd maxima: {max_odd:.2f}
+       Odd media (todas): {avg_odd:.2f}
+""")
+_DETAIL_WIN_ODD_TEMPLATE = "   Odd media (vitorias): {avg_win_odd:.2f}\n"
+_DETAIL_LOSS_ODD_TEMPLATE = "   Odd media (derrotas): {avg_loss_odd:.2f}\n"
+_DETAIL_RESULT_TEMPLATE = (
+    "   Vitorias: {wins} ({win_rate:.1f}%)\n"
+    "   Derrotas: {losses}\n"
+    "   Lucro total: {profit:.2f} unidades\n"
+    "   ROI: {roi:.2f}%\n"
+    "   Lucro medio/aposta: {avg_profit_per_bet:.3f} unidades\n"
+)
+_LEAGUE_TEMPLATE = textwrap.dedent("""\
+
+    [{league}]
+       Total: {total} apostas
+       Vitorias: {wins} ({win_rate:.1f}%)
+       Derrotas: {losses}
+       Odd media (vitorias): {avg_win_odd:.2f}
+       EV medio: {avg_ev_pct:.2f}%
+       Lucro: {profit:.2f} unidades
+       ROI: {roi:.2f}%
+""")
+_EXPECTED_LINE_TEMPLATE = "   Win rate esperado: {expected_win_rate:.1f}% | Real: {win_rate:.1f}% | Diff: {win_rate_diff:+.1f}%\n"
+_SECTION_RULE = "=" * 80
+
+
+def _write_header(out, title: str):
+    out.write(f"{_SECTION_RULE}\n{title}\n{_SECTION_RULE}\n")
+
+
+def _print_sections(conn: sqlite3.Connection, metodo: str, best_per_game: bool):
+    """Corpo de print_analysis sobre uma conexão já aberta; cada seção vai para stdout de uma vez."""
+    results = analyze_by_ev_ranges(metodo=metodo, best_per_game=best_per_game, conn=conn)
     
     if not results:
         print("[AVISO] Nenhuma aposta resolvida encontrada")
         return
     
+    # Campos em % usados pelos templates
+    fields = {
+        range_key: dict(stats, avg_ev_pct=stats['avg_ev'] * 100,
+                        min_ev_pct=stats['min_ev'] * 100, max_ev_pct=stats['max_ev'] * 100)
+        for range_key, stats in results.items()
+    }
+    
     # Ordem de exibição
     display_order = ['all', 'ev_5_plus', 'ev_10_plus', 'ev_15_plus', 'ev_20_plus']
     
+    out = io.StringIO()
     for range_key in display_order:
-        if range_key not in results:
+        if range_key not in fields:
             continue
         
-        stats = results[range_key]
+        stats = fields[range_key]
+        out.write(_BAND_TEMPLATE.format_map(stats))
         
-        print(f"[{stats['label']}]")
-        print(f"   Total resolvidas: {stats['total']}")
-        print(f"   Vitorias: {stats['wins']} ({stats['win_rate']:.1f}%)")
-        print(f"   Derrotas: {stats['losses']}")
-        print(f"   Odd media (vitorias): {stats['avg_win_odd']:.2f}")
-        print(f"   EV medio: {stats['avg_ev']*100:.2f}%")
-        print(f"   Edge medio: {stats['avg_edge']:.2f}%")
-        print(f"   Lucro: {stats['profit']:.2f} unidades")
-        print(f"   ROI: {stats['roi']:.2f}%")
-        
-        # Calcula win rate esperado baseado na odd média
+        # Win rate esperado baseado na odd média (já calculado em analyze_by_ev_ranges)
         if stats['avg_win_odd'] > 0:
-            expected_win_rate = (1 / stats['avg_win_odd']) * 100
-            actual_win_rate = stats['win_rate']
-            difference = actual_win_rate - expected_win_rate
-            print(f"   Win rate esperado (1/odd): {expected_win_rate:.1f}%")
-            print(f"   Win rate real: {actual_win_rate:.1f}%")
-            print(f"   Diferenca: {difference:+.1f}% ({'MELHOR' if difference > 0 else 'PIOR'} que esperado)")
-        
-        # Lucro por aposta (média)
-        avg_profit_per_bet = stats['profit'] / stats['total'] if stats['total'] > 0 else 0
-        print(f"   Lucro medio por aposta: {avg_profit_per_bet:.3f} unidades")
+            verdict = 'MELHOR' if stats['win_rate_diff'] > 0 else 'PIOR'
+            out.write(_BAND_EXPECTED_TEMPLATE.format_map(dict(stats, verdict=verdict)))
         
-        print()
+        out.write(_BAND_PROFIT_TEMPLATE.format_map(stats))
+    sys.stdout.write(out.getvalue())
     
     # Análise comparativa detalhada
-    print("=" * 80)
-    print("RESUMO COMPARATIVO")
-    print("=" * 80)
-    
-    if 'all' in results:
-        all_stats = results['all']
-        print(f"\nTodas as apostas:")
-        print(f"   Win Rate: {all_stats['win_rate']:.1f}% | ROI: {all_stats['roi']:.2f}% | EV medio: {all_stats['avg_ev']*100:.2f}%")
-    
-    for range_key in ['ev_5_plus', 'ev_10_plus', 'ev_15_plus', 'ev_20_plus']:
-        if range_key in results:
-            stats = results[range_key]
-            if 'all' in results:
-                all_stats = results['all']
-                win_rate_diff = stats['win_rate'] - all_stats['win_rate']
-                roi_diff = stats['roi'] - all_stats['roi']
-                print(f"\n{stats['label']}:")
-                print(f"   Win Rate: {stats['win_rate']:.1f}% ({win_rate_diff:+.1f}% vs todas) | ROI: {stats['roi']:.2f}% ({roi_diff:+.2f}% vs todas)")
-                print(f"   EV medio: {stats['avg_ev']*100:.2f}% | Apostas: {stats['total']}")
+    out = io.StringIO()
+    _write_header(out, "RESUMO COMPARATIVO")
+    
+    if 'all' in fields:
+        all_stats = fields['all']
+        out.write(f"\nTodas as apostas:\n")
+        out.write(f"   Win Rate: {all_stats['win_rate']:.1f}% | ROI: {all_stats['roi']:.2f}% | EV medio: {all_stats['avg_ev_pct']:.2f}%\n")
+        
+        for range_key in ['ev_5_plus', 'ev_10_plus', 'ev_15_plus', 'ev_20_plus']:
+            if range_key in fields:
+                stats = fields[range_key]
+                out.write(_COMPARE_TEMPLATE.format_map(dict(
+                    stats,
+                    win_rate_vs_all=stats['win_rate'] - all_stats['win_rate'],
+                    roi_vs_all=stats['roi'] - all_stats['roi'],
+                )))
+    sys.stdout.write(out.getvalue())
     
     # Análise detalhada de distribuição de odds e EV por faixa
-    print("=" * 80)
-    print("DETALHAMENTO POR FAIXA DE EV")
-    print("=" * 80)
-    
-    conn = sqlite3.connect(BETS_DB)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    out = io.StringIO()
+    _write_header(out, "DETALHAMENTO POR FAIXA DE EV")
     
+    # Mínimos, máximos e médias já vêm da consulta agregada de analyze_by_ev_ranges
     for range_key in ['ev_5_plus', 'ev_10_plus', 'ev_15_plus', 'ev_20_plus']:
-        if range_key not in results:
-            continue
-        
-        stats = results[range_key]
-        min_ev = {'ev_5_plus': 0.05, 'ev_10_plus': 0.10, 'ev_15_plus': 0.15, 'ev_20_plus': 0.20}[range_key]
-        
-        # Query para buscar apostas dessa faixa
-        query = """
-            SELECT 
-                expected_value,
-                odd_decimal,
-                status,
-                edge,
-                matchup_id
-            FROM bets
-            WHERE status IN ('won', 'lost')
-            AND expected_value >= ?
-        """
-        params = [min_ev]
-        if metodo:
-            query += " AND metodo = ?"
-            params.append(metodo)
-        
-        cursor.execute(query, params)
-        bets = [dict(row) for row in cursor.fetchall()]
-        
-        if not bets:
+        if range_key not in fields:
             continue
         
-        # Se best_per_game, filtra novamente para esta faixa
-        if best_per_game:
-            from collections import defaultdict
-            bets_by_game = defaultdict(list)
-            for bet in bets:
-                bets_by_game[bet['matchup_id']].append(bet)
-            bets = [max(game_bets, key=lambda x: x['expected_value']) for game_bets in bets_by_game.values()]
-        
-        # Estatísticas detalhadas
-        evs = [bet['expected_value'] for bet in bets]
-        odds = [bet['odd_decimal'] for bet in bets]
-        win_odds = [bet['odd_decimal'] for bet in bets if bet['status'] == 'won']
-        loss_odds = [bet['odd_decimal'] for bet in bets if bet['status'] == 'lost']
-        
-        print(f"\n{stats['label']} (EV >= {min_ev*100:.0f}%):")
-        print(f"   Total: {len(bets)} apostas")
-        print(f"   EV minimo: {min(evs)*100:.2f}%")
-        print(f"   EV maximo: {max(evs)*100:.2f}%")
-        print(f"   EV medio: {stats['avg_ev']*100:.2f}%")
-        print(f"   Odd minima: {min(odds):.2f}")
-        print(f"   Odd maxima: {max(odds):.2f}")
-        print(f"   Odd media (todas): {sum(odds)/len(odds):.2f}")
-        if win_odds:
-            print(f"   Odd media (vitorias): {sum(win_odds)/len(win_odds):.2f}")
-        if loss_odds:
-            print(f"   Odd media (derrotas): {sum(loss_odds)/len(loss_odds):.2f}")
-        print(f"   Vitorias: {stats['wins']} ({stats['win_rate']:.1f}%)")
-        print(f"   Derrotas: {stats['losses']}")
-        print(f"   Lucro total: {stats['profit']:.2f} unidades")
-        print(f"   ROI: {stats['roi']:.2f}%")
-        print(f"   Lucro medio/aposta: {stats['profit']/len(bets):.3f} unidades")
+        stats = fields[range_key]
+        out.write(_DETAIL_TEMPLATE.format_map(dict(stats, min_pct=EV_RANGES[range_key]['min'] * 100)))
+        if stats['wins']:
+            out.write(_DETAIL_WIN_ODD_TEMPLATE.format_map(stats))
+        if stats['losses']:
+            out.write(_DETAIL_LOSS_ODD_TEMPLATE.format_map(stats))
+        out.write(_DETAIL_RESULT_TEMPLATE.format_map(stats))
         
         # Win rate esperado vs real
         if stats['avg_win_odd'] > 0:
-            expected_wr = (1 / stats['avg_win_odd']) * 100
-            actual_wr = stats['win_rate']
-            diff = actual_wr - expected_wr
-            print(f"   Win rate esperado: {expected_wr:.1f}% | Real: {actual_wr:.1f}% | Diff: {diff:+.1f}%")
-    
-    conn.close()
+            out.write(_EXPECTED_LINE_TEMPLATE.format_map(stats))
+    sys.stdout.write(out.getvalue())
     
     # Análise por ligas
-    print("=" * 80)
-    print("ANALISE POR LIGAS")
-    print("=" * 80)
-    
-    conn = sqlite3.connect(BETS_DB)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    # Busca todas as ligas
-    query = """
-        SELECT DISTINCT league_name
-        FROM bets
-        WHERE status IN ('won', 'lost')
-    """
-    params = []
-    if metodo:
-        query += " AND metodo = ?"
-        params.append(metodo)
-    
-    cursor.execute(query, params)
-    leagues = [row[0] for row in cursor.fetchall()]
+    out = io.StringIO()
+    _write_header(out, "ANALISE POR LIGAS")
+    
+    leagues = _cached_query('leagues', metodo, best_per_game,
+                            lambda: _fetch_league_rows(conn, metodo, best_per_game))
+    
+    # Tuplas na ordem do SELECT de _fetch_league_rows
+    for league, total, wins, losses, avg_win_odd, avg_ev, profit in leagues:
+        win_rate = wins / total * 100
+        avg_win_odd = avg_win_odd or 0
+        expected_wr = _expected_win_rate(avg_win_odd)
+        league_stats = {
+            'league': league,
+            'total': total,
+            'wins': wins,
+            'losses': losses,
+            'win_rate': win_rate,
+            'avg_win_odd': avg_win_odd,
+            'avg_ev_pct': avg_ev * 100,
+            'profit': profit,
+            'roi': profit / total * 100,
+            'expected_win_rate': expected_wr,
+            'win_rate_diff': win_rate - expected_wr,
+        }
+        
+        out.write(_LEAGUE_TEMPLATE.format_map(league_stats))
+        if avg_win_odd > 0:
+            out.write(_EXPECTED_LINE_TEMPLATE.format_map(league_stats))
     
     if not leagues:
-        print("[AVISO] Nenhuma liga encontrada")
-        conn.close()
+        out.write("[AVISO] Nenhuma liga encontrada\n")
+        sys.stdout.write(out.getvalue())
         return
     
-    # Analisa cada liga
-    for league in sorted(leagues):
-        query = """
-            SELECT 
-                expected_value,
-                odd_decimal,
-                status,
-                edge,
-                matchup_id
-            FROM bets
-            WHERE status IN ('won', 'lost')
-            AND league_name = ?
-        """
-        params = [league]
-        if metodo:
-            query += " AND metodo = ?"
-            params.append(metodo)
-        
-        cursor.execute(query, params)
-        bets = [dict(row) for row in cursor.fetchall()]
-        
-        if not bets:
-            continue
-        
-        # Se best_per_game, filtra para manter apenas melhor aposta por jogo
-        if best_per_game:
-            from collections import defaultdict
-            bets_by_game = defaultdict(list)
-            for bet in bets:
-                bets_by_game[bet['matchup_id']].append(bet)
-            bets = [max(game_bets, key=lambda x: x['expected_value']) for game_bets in bets_by_game.values()]
-        
-        # Calcula estatísticas da liga
-        total = len(bets)
-        wins = sum(1 for bet in bets if bet['status'] == 'won')
-        losses = sum(1 for bet in bets if bet['status'] == 'lost')
-        win_rate = (wins / total * 100) if total > 0 else 0
-        
-        win_odds = [bet['odd_decimal'] for bet in bets if bet['status'] == 'won']
-        avg_win_odd = sum(win_odds) / len(win_odds) if win_odds else 0
-        
-        avg_ev = sum(bet['expected_value'] for bet in bets) / total
-        
-        profit = sum(
-            (bet['odd_decimal'] - 1) if bet['status'] == 'won' else -1
-            for bet in bets
-        )
-        
-        roi = (profit / total * 100) if total > 0 else 0
-        
-        expected_wr = (1 / avg_win_odd * 100) if avg_win_odd > 0 else 0
-        diff_wr = win_rate - expected_wr
-        
-        print(f"\n[{league}]")
-        print(f"   Total: {total} apostas")
-        print(f"   Vitorias: {wins} ({win_rate:.1f}%)")
-        print(f"   Derrotas: {losses}")
-        print(f"   Odd media (vitorias): {avg_win_odd:.2f}")
-        print(f"   EV medio: {avg_ev*100:.2f}%")
-        print(f"   Lucro: {profit:.2f} unidades")
-        print(f"   ROI: {roi:.2f}%")
-        if avg_win_odd > 0:
-            print(f"   Win rate esperado: {expected_wr:.1f}% | Real: {win_rate:.1f}% | Diff: {diff_wr:+.1f}%")
-    
-    conn.close()
-    print()
+    out.write("\n")
+    sys.stdout.write(out.getvalue())
 
 
 def main():
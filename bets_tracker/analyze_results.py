@@ -2,38 +2,102 @@
 Sistema completo de análise de resultados das apostas
 Analisa por método, liga, tipo de mercado, estratégia e com/sem filtro de linha mínima
 """
+import os
 import sqlite3
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from functools import cached_property
 import sys
 
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich import box
-    HAS_RICH = True
-except ImportError:
-    HAS_RICH = False
+import numpy as np
 
-try:
-    from prettytable import PrettyTable
-    HAS_PRETTYTABLE = True
-except ImportError:
-    HAS_PRETTYTABLE = False
+# PINNACLE_PLAIN=1: saída em texto puro, sem nem importar rich/prettytable
+# (cron, saída redirecionada para arquivo). Sem a variável, mantém as cores mesmo fora de TTY.
+PLAIN_OUTPUT = os.getenv("PINNACLE_PLAIN") == "1"
+
+HAS_RICH = HAS_PRETTYTABLE = False
+if not PLAIN_OUTPUT:
+    try:
+        from rich.console import Console
+        from rich.table import Table
+        from rich import box
+        HAS_RICH = True
+    except ImportError:
+        pass
+    
+    try:
+        from prettytable import PrettyTable
+        HAS_PRETTYTABLE = True
+    except ImportError:
+        pass
 
 from config import BETS_DB
 
+# Estratégias "Top N por jogo" -> N (comparado com rn, a posição por EV dentro do jogo)
+STRATEGY_TOP_N = {'best': 1, 'top2': 2, 'top3': 3, 'top4': 4, 'top5': 5}
+
+# Estratégias de analyze_complete (chave -> rótulo)
+STRATEGY_LABELS = {
+    'all': 'Todas as apostas',
+    'best': 'Apenas a melhor',
+    'top2': 'Top 2 melhores',
+    'top3': 'Top 3 melhores',
+}
+
+# Posição da aposta no jogo por EV (1 = melhor), calculada pelo SQLite; o id desempata
+# igual ao ORDER BY, então rn - 1 é a mesma posição que rank_in_game calcula sobre a lista.
+# Empate de EV costuma ser a mesma aposta no mapa 1 e no mapa 2: o menor id fica com o mapa 1
+RN_IN_GAME_SQL = "ROW_NUMBER() OVER (PARTITION BY matchup_id ORDER BY expected_value DESC, id) AS rn"
+
+# Colunas de get_bets: as lidas por BetStats/BetArrays (matchup_id para rank_in_game),
+# market_side_key e as máscaras de analyze_variants (liga para stats_by_group, método,
+# side/linha), + id; o resto da linha não sai do SQLite
+BET_COLUMNS = (
+    "id, matchup_id, league_name, market_type, side, line_value, metodo,"
+    " odd_decimal, expected_value, edge, status"
+)
+
+# Cor por sinal (negativo, zero, positivo), indexada por (x > 0) - (x < 0) + 1
+SIGN_COLORS = ("red", "white", "green")
+
+
+def sign_color(value: float) -> str:
+    """Cor rich de ROI/lucro: vermelho se negativo, branco se zero, verde se positivo."""
+    return SIGN_COLORS[(value > 0) - (value < 0) + 1]
+
+
+def market_side_key(bet: Dict) -> str:
+    """Chave de mercado+side para stats_by_group (ex: 'total_kills OVER')."""
+    market_type = bet.get('market_type', 'unknown')
+    side = bet.get('side', '').upper() if bet.get('side') else 'UNKNOWN'
+    return f"{market_type} {side}"
+
 
 class BetStats:
     """Classe para calcular estatísticas de apostas."""
     
     def __init__(self, bets: List[Dict]):
         self.bets = bets
-        self.total = len(bets)
-        self.won = sum(1 for b in bets if b.get('status') == 'won')
-        self.lost = sum(1 for b in bets if b.get('status') == 'lost')
-        self.pending = sum(1 for b in bets if b.get('status') == 'pending')
+        self.total = n = len(bets)
+        
+        # Colunas em arrays uma vez; todas as contagens/somas saem deles (sem uma passada por estatística)
+        odd = np.fromiter((b.get('odd_decimal') or 0.0 for b in bets), dtype=np.float64, count=n)
+        ev = np.fromiter((b.get('expected_value') or 0.0 for b in bets), dtype=np.float64, count=n)
+        edge = np.fromiter((b.get('edge') or 0.0 for b in bets), dtype=np.float64, count=n)
+        status = np.array([b.get('status') for b in bets], dtype=object)
+        won_mask = status == 'won'
+        
+        self._derive(
+            n, int(won_mask.sum()), int((status == 'lost').sum()), int((status == 'pending').sum()),
+            float(odd[won_mask].sum()), float(odd.sum()), float(ev.sum()), float(edge.sum()),
+        )
+    
+    def _derive(self, total: int, won: int, lost: int, pending: int,
+                total_return: float, odd_sum: float, ev_sum: float, edge_sum: float):
+        """Estatísticas derivadas das contagens e somas."""
+        self.won = won
+        self.lost = lost
+        self.pending = pending
         self.resolved = self.won + self.lost
         
         # Win rate
@@ -41,22 +105,21 @@ class BetStats:
         
         # Lucro (assumindo stake de 1 unidade por aposta)
         self.total_stake = float(self.resolved)
-        self.total_return = sum(b.get('odd_decimal', 0) for b in bets if b.get('status') == 'won')
+        self.total_return = total_return
         self.profit = self.total_return - self.total_stake
         self.roi = (self.profit / self.total_stake * 100) if self.total_stake > 0 else 0.0
         
         # Odd média
-        self.avg_odd = sum(b.get('odd_decimal', 0) for b in bets) / self.total if self.total > 0 else 0.0
+        self.avg_odd = odd_sum / total if total > 0 else 0.0
         
         # Odd média das vitórias
-        win_odds = [b.get('odd_decimal', 0) for b in bets if b.get('status') == 'won']
-        self.avg_win_odd = sum(win_odds) / len(win_odds) if win_odds else 0.0
+        self.avg_win_odd = total_return / won if won else 0.0
         
         # EV médio
-        self.avg_ev = sum(b.get('expected_value', 0) for b in bets) / self.total if self.total > 0 else 0.0
+        self.avg_ev = ev_sum / total if total > 0 else 0.0
         
         # Edge médio
-        self.avg_edge = sum(b.get('edge', 0) for b in bets) / self.total if self.total > 0 else 0.0
+        self.avg_edge = edge_sum / total if total > 0 else 0.0
         
         # Win rate esperado baseado na odd média
         self.expected_win_rate = (1 / self.avg_odd * 100) if self.avg_odd > 0 else 0.0
@@ -65,6 +128,36 @@ class BetStats:
         # Lucro por aposta (média)
         self.avg_profit_per_bet = self.profit / self.resolved if self.resolved > 0 else 0.0
     
+    @classmethod
+    def from_arrays(cls, arrays: "BetArrays", mask: np.ndarray) -> "BetStats":
+        """Mesmas estatísticas de BetStats(bets), calculadas por máscara sobre colunas já extraídas (bets=None)."""
+        self = cls.__new__(cls)
+        self.bets = None
+        odd = arrays.odd[mask]
+        won = arrays.won[mask]
+        self.total = int(odd.size)
+        self._derive(
+            self.total, int(won.sum()), int(arrays.lost[mask].sum()), int(arrays.pending[mask].sum()),
+            float(odd[won].sum()), float(odd.sum()), float(arrays.ev[mask].sum()), float(arrays.edge[mask].sum()),
+        )
+        return self
+    
+    @cached_property
+    def display(self) -> Dict[str, str]:
+        """
+        Valores já formatados para as tabelas (win rate, ROI, lucro, odd e EV médios).
+        
+        Formatados uma vez por objeto; os vários modos de impressão (PrettyTable, rich,
+        ASCII, linha compacta) só alinham essas strings.
+        """
+        return {
+            'win_rate': f"{self.win_rate:.1f}%",
+            'roi': f"{self.roi:+.2f}%",
+            'profit': f"{self.profit:+.2f}",
+            'avg_win_odd': f"{self.avg_win_odd:.2f}",
+            'avg_ev': f"{self.avg_ev*100:.2f}%",
+        }
+    
     def to_dict(self) -> Dict:
         """Retorna estatísticas como dicionário."""
         return {
@@ -88,13 +181,63 @@ class BetStats:
         }
 
 
+class BetArrays:
+    """Colunas de uma lista de apostas em arrays NumPy, para várias BetStats.from_arrays sobre o mesmo conjunto."""
+    
+    def __init__(self, bets: List[Dict]):
+        n = len(bets)
+        status = [b.get('status') for b in bets]
+        self.bets = bets
+        self.odd = np.fromiter((b.get('odd_decimal', 0) or 0 for b in bets), dtype=np.float64, count=n)
+        self.ev = np.fromiter((b.get('expected_value', 0) or 0 for b in bets), dtype=np.float64, count=n)
+        self.edge = np.fromiter((b.get('edge', 0) or 0 for b in bets), dtype=np.float64, count=n)
+        self.won = np.fromiter((s == 'won' for s in status), dtype=bool, count=n)
+        self.lost = np.fromiter((s == 'lost' for s in status), dtype=bool, count=n)
+        self.pending = np.fromiter((s == 'pending' for s in status), dtype=bool, count=n)
+        self.matchup_id = np.array([b.get('matchup_id') for b in bets], dtype=object)
+        self.rn = (
+            np.fromiter((b['rn'] for b in bets), dtype=np.int64, count=n)
+            if bets and 'rn' in bets[0] else None
+        )
+    
+    def group_codes(self, keys: List) -> Tuple[np.ndarray, np.ndarray]:
+        """(rótulos ordenados, código de cada aposta) para uma chave por aposta."""
+        labels, codes = np.unique(np.array(keys, dtype=object), return_inverse=True)
+        return labels, codes
+    
+    def stats_by_group(self, labels: np.ndarray, codes: np.ndarray, mask: np.ndarray) -> Dict[str, BetStats]:
+        """BetStats por rótulo de group_codes para as apostas de `mask`, por máscara sobre os códigos."""
+        return {labels[c]: BetStats.from_arrays(self, mask & (codes == c)) for c in np.unique(codes[mask])}
+    
+    def rank_in_game(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Posição (0 = melhor EV) de cada aposta de `mask` dentro do seu jogo.
+        
+        Pressupõe a ordem de get_bets (matchup_id, expected_value DESC, id), a mesma do
+        rn de RN_IN_GAME_SQL; fora de `mask` o valor é -1.
+        Com `mask` cobrindo todas as apostas, usa o rn já calculado no SQL.
+        """
+        if self.rn is not None and mask.all():
+            return self.rn - 1
+        idx = np.flatnonzero(mask)
+        rank = np.full(len(self.bets), -1, dtype=np.int64)
+        if idx.size == 0:
+            return rank
+        mids = self.matchup_id[idx]
+        new_game = np.ones(idx.size, dtype=bool)
+        new_game[1:] = mids[1:] != mids[:-1]
+        starts = np.flatnonzero(new_game)
+        pos = np.arange(idx.size)
+        rank[idx] = pos - np.repeat(starts, np.diff(np.append(starts, idx.size)))
+        return rank
+
+
 class ResultsAnalyzer:
     """Analisador completo de resultados das apostas."""
     
     def __init__(self):
         # Força terminal e cores mesmo quando executado via subprocess
         if HAS_RICH:
-            import os
             # Garante que o Rich detecte o terminal corretamente
             os.environ['TERM'] = os.environ.get('TERM', 'xterm-256color')
             self.console = Console(force_terminal=True, width=120, force_interactive=False)
@@ -117,131 +260,41 @@ class ResultsAnalyzer:
             return []
         
         conn = sqlite3.connect(BETS_DB)
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        query = """
-            SELECT * FROM bets
-            WHERE status IN ('won', 'lost')
+        where, params = self._resolved_where(metodo, exclude_low_lines)
+        query = f"""
+            SELECT {BET_COLUMNS}, {RN_IN_GAME_SQL} FROM bets
+            WHERE {where}
+            ORDER BY matchup_id, expected_value DESC, id
         """
+        
+        cursor.execute(query, params)
+        # Tuplas + nomes de cursor.description: sem o wrapper sqlite3.Row por linha
+        columns = [d[0] for d in cursor.description]
+        bets = [dict(zip(columns, row)) for row in cursor]
+        conn.close()
+        
+        return bets
+    
+    def _resolved_where(self, metodo: Optional[str], exclude_low_lines: bool) -> Tuple[str, List]:
+        """WHERE (e parâmetros) das apostas resolvidas de get_bets."""
+        where = "status IN ('won', 'lost')"
         params = []
         
         if metodo:
             # Aceita tanto 'ml' quanto 'machinelearning'
             if metodo == 'ml':
-                query += " AND (metodo = 'ml' OR metodo = 'machinelearning')"
+                where += " AND (metodo = 'ml' OR metodo = 'machinelearning')"
             else:
-                query += " AND metodo = ?"
+                where += " AND metodo = ?"
                 params.append(metodo)
         
         if exclude_low_lines:
-            query += " AND NOT (LOWER(side) = 'under' AND line_value <= ?)"
+            where += " AND NOT (LOWER(side) = 'under' AND line_value <= ?)"
             params.append(self.min_line_threshold)
         
-        query += " ORDER BY matchup_id, expected_value DESC"
-        
-        cursor.execute(query, params)
-        bets = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        
-        return bets
-    
-    def filter_by_strategy(self, bets: List[Dict], strategy: str) -> List[Dict]:
-        """
-        Filtra apostas por estratégia.
-        
-        Args:
-            bets: Lista de apostas
-            strategy: 'all', 'best', 'top2', 'top3', 'top4', 'top5'
-        
-        Returns:
-            Lista filtrada de apostas
-        """
-        if strategy == 'all':
-            return bets
-        
-        # Agrupa por jogo (matchup_id)
-        games = defaultdict(list)
-        for bet in bets:
-            games[bet['matchup_id']].append(bet)
-        
-        # Ordena apostas de cada jogo por EV (decrescente)
-        for matchup_id in games:
-            games[matchup_id].sort(key=lambda x: x.get('expected_value', 0), reverse=True)
-        
-        if strategy == 'best':
-            # Apenas a melhor aposta por jogo
-            return [game_bets[0] for game_bets in games.values()]
-        elif strategy == 'top2':
-            # Top 2 apostas por jogo
-            return [bet for game_bets in games.values() for bet in game_bets[:2]]
-        elif strategy == 'top3':
-            # Top 3 apostas por jogo
-            return [bet for game_bets in games.values() for bet in game_bets[:3]]
-        elif strategy == 'top4':
-            # Top 4 apostas por jogo
-            return [bet for game_bets in games.values() for bet in game_bets[:4]]
-        elif strategy == 'top5':
-            # Top 5 apostas por jogo
-            return [bet for game_bets in games.values() for bet in game_bets[:5]]
-        
-        return bets
-    
-    def analyze_by_dimension(self, bets: List[Dict], dimension: str) -> Dict[str, BetStats]:
-        """
-        Analisa apostas agrupadas por uma dimensão.
-        
-        Args:
-            bets: Lista de apostas
-            dimension: 'league_name', 'market_type', 'metodo'
-        
-        Returns:
-            Dicionário com estatísticas por valor da dimensão
-        """
-        grouped = defaultdict(list)
-        
-        for bet in bets:
-            # Mapeia dimensões para campos do banco
-            field_map = {
-                'league': 'league_name',
-                'league_name': 'league_name',
-                'market': 'market_type',
-                'market_type': 'market_type',
-                'metodo': 'metodo',
-            }
-            actual_field = field_map.get(dimension, dimension)
-            key = bet.get(actual_field, 'unknown')
-            grouped[key].append(bet)
-        
-        results = {}
-        for key, group_bets in sorted(grouped.items()):
-            results[key] = BetStats(group_bets)
-        
-        return results
-    
-    def analyze_by_market_with_side(self, bets: List[Dict]) -> Dict[str, BetStats]:
-        """
-        Analisa apostas agrupadas por market_type + side (ex: 'total_kills OVER', 'total_kills UNDER').
-        
-        Args:
-            bets: Lista de apostas
-        
-        Returns:
-            Dicionário com estatísticas por mercado+side
-        """
-        grouped = defaultdict(list)
-        
-        for bet in bets:
-            market_type = bet.get('market_type', 'unknown')
-            side = bet.get('side', '').upper() if bet.get('side') else 'UNKNOWN'
-            key = f"{market_type} {side}"
-            grouped[key].append(bet)
-        
-        results = {}
-        for key, group_bets in sorted(grouped.items()):
-            results[key] = BetStats(group_bets)
-        
-        return results
+        return where, params
     
     def analyze_complete(self, metodo: str, exclude_low_lines: bool = False) -> Dict:
         """
@@ -254,47 +307,80 @@ class ResultsAnalyzer:
         Returns:
             Dicionário com todas as análises
         """
-        # Busca apostas
-        bets = self.get_bets(metodo=metodo, exclude_low_lines=exclude_low_lines)
+        return self.analyze_variants([(metodo, exclude_low_lines)])[0]
+    
+    def _empty_analysis(self, metodo: str, exclude_low_lines: bool) -> Dict:
+        """Resultado de analyze_complete sem apostas resolvidas."""
+        return {
+            'metodo': metodo,
+            'exclude_low_lines': exclude_low_lines,
+            'summary': None,
+            'by_league': {},
+            'by_market': {},
+            'by_strategy': {},
+        }
+    
+    def analyze_variants(self, variants: List[Tuple[str, bool]]) -> List[Dict]:
+        """
+        analyze_complete para vários (metodo, exclude_low_lines) com uma única leitura do banco.
         
+        As apostas resolvidas são lidas uma vez (get_bets sem filtros); cada variante é uma
+        máscara de método/linha sobre os mesmos arrays, como as faixas de analyze_by_odds.
+        """
+        bets = self.get_bets()
         if not bets:
-            return {
-                'metodo': metodo,
-                'exclude_low_lines': exclude_low_lines,
-                'summary': None,
-                'by_league': {},
-                'by_market': {},
-                'by_strategy': {},
-            }
-        
-        # Resumo geral
-        summary = BetStats(bets)
-        
-        # Por liga
-        by_league = self.analyze_by_dimension(bets, 'league')
-        
-        # Por tipo de mercado (combinando market_type + side)
-        by_market = self.analyze_by_market_with_side(bets)
-        
-        # Por estratégia
-        strategies = {
-            'all': 'Todas as apostas',
-            'best': 'Apenas a melhor',
-            'top2': 'Top 2 melhores',
-            'top3': 'Top 3 melhores',
-        }
+            return [self._empty_analysis(metodo, exclude_low_lines) for metodo, exclude_low_lines in variants]
+        
+        n = len(bets)
+        arrays = BetArrays(bets)
+        # Liga e mercado+side codificados uma vez; cada variante agrupa só por máscara
+        league_groups = arrays.group_codes([b.get('league_name', 'unknown') for b in bets])
+        market_groups = arrays.group_codes([market_side_key(b) for b in bets])
+        metodos = np.array([b['metodo'] for b in bets], dtype=object)
+        # Mesmo filtro de _resolved_where: under com linha <= limite; linha NULL (nan) também
+        # sai, como no NOT (... AND line_value <= ?) do SQL
+        under = np.fromiter(((b['side'] or '').lower() == 'under' for b in bets), dtype=bool, count=n)
+        line = np.array([b['line_value'] for b in bets], dtype=np.float64)
+        low_line = under & ~(line > self.min_line_threshold)
+        
+        analyses = []
+        for metodo, exclude_low_lines in variants:
+            if not metodo:
+                mask = np.ones(n, dtype=bool)
+            elif metodo == 'ml':
+                mask = np.isin(metodos, ['ml', 'machinelearning'])
+            else:
+                mask = metodos == metodo
+            if exclude_low_lines:
+                mask &= ~low_line
+            analyses.append(self._analyze_mask(arrays, mask, league_groups, market_groups,
+                                               metodo, exclude_low_lines))
+        return analyses
+    
+    def _analyze_mask(self, arrays: BetArrays, mask: np.ndarray, league_groups, market_groups,
+                      metodo: str, exclude_low_lines: bool) -> Dict:
+        """Resultado de analyze_complete para as apostas de `mask`."""
+        if not mask.any():
+            return self._empty_analysis(metodo, exclude_low_lines)
         
+        summary = BetStats.from_arrays(arrays, mask)
+        
+        # Top N por jogo = posição no jogo (já em ordem de EV) < N, dentro da máscara
+        rank = arrays.rank_in_game(mask)
         by_strategy = {}
-        for strategy_key, strategy_label in strategies.items():
-            filtered_bets = self.filter_by_strategy(bets, strategy_key)
-            by_strategy[strategy_label] = BetStats(filtered_bets)
+        for strategy_key, strategy_label in STRATEGY_LABELS.items():
+            if strategy_key == 'all':
+                by_strategy[strategy_label] = summary
+            else:
+                strategy_mask = mask & (rank < STRATEGY_TOP_N[strategy_key])
+                by_strategy[strategy_label] = BetStats.from_arrays(arrays, strategy_mask)
         
         return {
             'metodo': metodo,
             'exclude_low_lines': exclude_low_lines,
             'summary': summary,
-            'by_league': by_league,
-            'by_market': by_market,
+            'by_league': arrays.stats_by_group(*league_groups, mask),
+            'by_market': arrays.stats_by_group(*market_groups, mask),
             'by_strategy': by_strategy,
         }
     
@@ -375,36 +461,30 @@ class ResultsAnalyzer:
                 print(f"   {label}: (nenhuma resolvida)")
             return
         
-        # Determina cores para ROI e Lucro
-        roi_color = "green" if stats.roi > 0 else "red" if stats.roi < 0 else "white"
-        profit_color = "green" if stats.profit > 0 else "red" if stats.profit < 0 else "white"
-        
         # Limita tamanho do label para evitar quebra de linha (reduzido para caber tudo)
         label_display = label[:25] if len(label) > 25 else label
+        cells = stats.display
+        head = (
+            f"   {label_display:<25} | "
+            f"Res: {stats.resolved:>3} | "
+            f"V:{stats.won:>3} L:{stats.lost:>3} | "
+            f"WR: {cells['win_rate']:>6} | "
+        )
+        roi = f"ROI: {cells['roi']:>7}"
+        profit = f"Lucro: {cells['profit']:>7}"
+        odd = f"Odd: {cells['avg_win_odd']:>4}"
         
         if self.console:
             # Usa Rich para formatação com cores - formato compacto
+            roi_color = sign_color(stats.roi)
+            profit_color = sign_color(stats.profit)
             self.console.print(
-                f"   {label_display:<25} | "
-                f"Res: {stats.resolved:>3} | "
-                f"V:{stats.won:>3} L:{stats.lost:>3} | "
-                f"WR: {stats.win_rate:>5.1f}% | "
-                f"[{roi_color}]ROI: {stats.roi:>+6.2f}%[/{roi_color}] | "
-                f"[{profit_color}]Lucro: {stats.profit:>+7.2f}[/{profit_color}] | "
-                f"Odd: {stats.avg_win_odd:>4.2f}"
+                f"{head}[{roi_color}]{roi}[/{roi_color}] | "
+                f"[{profit_color}]{profit}[/{profit_color}] | {odd}"
             )
         else:
             # Formatação simples sem cores - formato compacto
-            line = (
-                f"   {label_display:<25} | "
-                f"Res: {stats.resolved:>3} | "
-                f"V:{stats.won:>3} L:{stats.lost:>3} | "
-                f"WR: {stats.win_rate:>5.1f}% | "
-                f"ROI: {stats.roi:>+6.2f}% | "
-                f"Lucro: {stats.profit:>+7.2f} | "
-                f"Odd: {stats.avg_win_odd:>4.2f}"
-            )
-            print(line)
+            print(f"{head}{roi} | {profit} | {odd}")
     
     def print_summary_table(self, all_analyses: List[Dict]):
         """Imprime tabela resumo comparando todos os métodos e variantes."""
@@ -470,11 +550,11 @@ class ResultsAnalyzer:
                     stats.resolved,
                     stats.won,
                     stats.lost,
-                    f"{stats.win_rate:.1f}%",
-                    f"{stats.roi:+.2f}%",
-                    f"{stats.profit:+.2f}",
-                    f"{stats.avg_win_odd:.2f}",
-                    f"{stats.avg_ev*100:.2f}%",
+                    stats.display['win_rate'],
+                    stats.display['roi'],
+                    stats.display['profit'],
+                    stats.display['avg_win_odd'],
+                    stats.display['avg_ev'],
                 ])
             
             # Exibe tabela (cabeçalho é exibido automaticamente)
@@ -499,19 +579,19 @@ class ResultsAnalyzer:
             
             for row in rows:
                 stats = row['stats']
-                roi_style = "green" if stats.roi > 0 else "red" if stats.roi < 0 else "white"
-                profit_style = "green" if stats.profit > 0 else "red" if stats.profit < 0 else "white"
+                roi_style = sign_color(stats.roi)
+                profit_style = sign_color(stats.profit)
                 
                 table.add_row(
                     row['label'],
                     str(stats.resolved),
                     str(stats.won),
                     str(stats.lost),
-                    f"{stats.win_rate:.1f}%",
-                    f"[{roi_style}]{stats.roi:+.2f}%[/{roi_style}]",
-                    f"[{profit_style}]{stats.profit:+.2f}[/{profit_style}]",
-                    f"{stats.avg_win_odd:.2f}",
-                    f"{stats.avg_ev*100:.2f}%",
+                    stats.display['win_rate'],
+                    f"[{roi_style}]{stats.display['roi']}[/{roi_style}]",
+                    f"[{profit_style}]{stats.display['profit']}[/{profit_style}]",
+                    stats.display['avg_win_odd'],
+                    stats.display['avg_ev'],
                 )
             
             self.console.print(table)
@@ -526,11 +606,11 @@ class ResultsAnalyzer:
                     f"{stats.resolved:>10} "
                     f"{stats.won:>5} "
                     f"{stats.lost:>5} "
-                    f"{stats.win_rate:>9.1f}% "
-                    f"{stats.roi:>+9.2f}% "
-                    f"{stats.profit:>+11.2f} "
-                    f"{stats.avg_win_odd:>9.2f} "
-                    f"{stats.avg_ev*100:>9.2f}%"
+                    f"{stats.display['win_rate']:>10} "
+                    f"{stats.display['roi']:>10} "
+                    f"{stats.display['profit']:>11} "
+                    f"{stats.display['avg_win_odd']:>9} "
+                    f"{stats.display['avg_ev']:>10}"
                 )
         
         print()
@@ -544,36 +624,24 @@ def run_complete_analysis(show_details: bool = True):
         show_details: Se True, mostra detalhes por liga, mercado e estratégia
     """
     # Força encoding UTF-8 para Windows
-    import os
     if os.name == 'nt':
         os.environ['PYTHONIOENCODING'] = 'utf-8'
     
     analyzer = ResultsAnalyzer()
-    all_analyses = []
     
-    # 1. Método Empírico - Completo
     print("\n" + "=" * 100)
     print("INICIANDO ANÁLISE COMPLETA")
     print("=" * 100)
     
-    analysis_empirico = analyzer.analyze_complete('probabilidade_empirica', exclude_low_lines=False)
-    analyzer.print_analysis(analysis_empirico, show_details=show_details)
-    all_analyses.append(analysis_empirico)
-    
-    # 2. Método Empírico - Sem under 27.5 ou menos
-    analysis_empirico_no_low = analyzer.analyze_complete('probabilidade_empirica', exclude_low_lines=True)
-    analyzer.print_analysis(analysis_empirico_no_low, show_details=show_details)
-    all_analyses.append(analysis_empirico_no_low)
-    
-    # 3. Método ML - Completo
-    analysis_ml = analyzer.analyze_complete('ml', exclude_low_lines=False)
-    analyzer.print_analysis(analysis_ml, show_details=show_details)
-    all_analyses.append(analysis_ml)
-    
-    # 4. Método ML - Sem under 27.5 ou menos
-    analysis_ml_no_low = analyzer.analyze_complete('ml', exclude_low_lines=True)
-    analyzer.print_analysis(analysis_ml_no_low, show_details=show_details)
-    all_analyses.append(analysis_ml_no_low)
+    # As quatro variantes saem de uma única leitura do banco (analyze_variants)
+    all_analyses = analyzer.analyze_variants([
+        ('probabilidade_empirica', False),  # 1. Método Empírico - Completo
+        ('probabilidade_empirica', True),   # 2. Método Empírico - Sem under 27.5 ou menos
+        ('ml', False),                      # 3. Método ML - Completo
+        ('ml', True),                       # 4. Método ML - Sem under 27.5 ou menos
+    ])
+    for analysis in all_analyses:
+        analyzer.print_analysis(analysis, show_details=show_details)
     
     # 5. Tabela Resumo Final
     analyzer.print_summary_table(all_analyses)
@@ -5,7 +5,7 @@ import sqlite3
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import json
 import shutil
 
@@ -21,6 +21,35 @@ def _db_path(db_path: Optional[Path] = None) -> Path:
     return db_path if isinstance(db_path, Path) else BETS_DB
 
 
+def db_state(db_path: Optional[Path] = None) -> Optional[tuple]:
+    """
+    (mtime_ns, tamanho) do banco e do arquivo -wal, se houver; None se o banco não existe.
+    Muda a cada escrita, então serve de chave para caches de análises.
+    """
+    path = _db_path(db_path)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    state = (st.st_mtime_ns, st.st_size)
+    wal = Path(f"{path}-wal")
+    if wal.exists():
+        wal_st = wal.stat()
+        state += (wal_st.st_mtime_ns, wal_st.st_size)
+    return state
+
+
+FETCH_BATCH = 200
+
+
+def fetch_dicts(cursor: sqlite3.Cursor) -> List[Dict]:
+    """Materializa o resultado em lotes de FETCH_BATCH (fetchmany) em vez de um fetchall."""
+    out = []
+    while rows := cursor.fetchmany(FETCH_BATCH):
+        out.extend(dict(row) for row in rows)
+    return out
+
+
 def get_bet_by_id(bet_id: int, db_path: Optional[Path] = None) -> Optional[Dict]:
     """Busca uma aposta por ID."""
     conn = sqlite3.connect(_db_path(db_path))
@@ -119,6 +148,42 @@ def init_database(db_path: Optional[Path] = None):
         CREATE INDEX IF NOT EXISTS idx_metodo ON bets(metodo)
     """)
     
+    # idx_resolved_odd / idx_side_line: nenhuma consulta usa (as análises leem todas as resolvidas
+    # e o NOT (LOWER(side) ... AND line_value ...) não aproveita índice); só custavam nas escritas
+    cursor.execute("DROP INDEX IF EXISTS idx_resolved_odd")
+    cursor.execute("DROP INDEX IF EXISTS idx_side_line")
+    
+    # Índices das análises sobre resolvidas; os recém-criados precisam de ANALYZE (abaixo)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    existing_indexes = {row[0] for row in cursor.fetchall()}
+    
+    # Resolvidas já na ordem (jogo, EV desc, id): ORDER BY e ROW_NUMBER() das análises sem sort
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resolved_matchup_ev ON bets(matchup_id, expected_value DESC)
+        WHERE status IN ('won', 'lost')
+    """)
+    # Índice de cobertura das análises por faixa de EV (analyze_ev_ranges): status/metodo/EV
+    # + as demais colunas lidas, para nem tocar na tabela
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resolved_ev
+        ON bets(status, metodo, expected_value, league_name, matchup_id, odd_decimal, edge)
+        WHERE status IN ('won', 'lost')
+    """)
+    # idx_resolved_stats servia só a agregação SQL removida de analyze_results: sai dos bancos existentes
+    cursor.execute("DROP INDEX IF EXISTS idx_resolved_stats")
+    if not {'idx_resolved_matchup_ev', 'idx_resolved_ev'} <= existing_indexes:
+        # Sem estatísticas o planner prefere buscar por status (idx_status) e ordenar depois
+        cursor.execute("ANALYZE bets")
+    
+    # Identidade da aposta (mesma chave de duplicata do save_bet); alvo do ON CONFLICT em upsert_bet_placed
+    try:
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_bet_identity
+            ON bets(matchup_id, market_type, COALESCE(mapa, -1), line_value, side, metodo)
+        """)
+    except sqlite3.IntegrityError as e:
+        print(f"[AVISO] Apostas duplicadas impedem idx_bet_identity: {e}")
+    
     # Tabela de correções de nomes (para matching)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS name_corrections (
@@ -144,6 +209,51 @@ def init_database(db_path: Optional[Path] = None):
     print(f"[OK] Banco de apostas inicializado: {db}")
 
 
+_INSERT_BET_SQL = """
+    INSERT INTO bets (
+        matchup_id, game_date, league_name, home_team, away_team,
+        market_type, mapa, line_value, side, odd_decimal,
+        metodo, expected_value, edge, empirical_prob, implied_prob,
+        historical_mean, historical_std, historical_games,
+        status, created_at, updated_at, metadata
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _bet_insert_params(bet_data: Dict, now: str, status: str) -> tuple:
+    """Parâmetros de _INSERT_BET_SQL a partir do dicionário da aposta."""
+    # Prepara metadata JSON
+    metadata = bet_data.get('metadata', {})
+    if isinstance(metadata, dict):
+        metadata_json = json.dumps(metadata)
+    else:
+        metadata_json = metadata
+    return (
+        bet_data['matchup_id'],
+        bet_data['game_date'],
+        bet_data['league_name'],
+        bet_data['home_team'],
+        bet_data['away_team'],
+        bet_data['market_type'],
+        bet_data.get('mapa'),  # Mapa do jogo (pode ser None)
+        bet_data.get('line_value'),
+        bet_data['side'],
+        bet_data['odd_decimal'],
+        bet_data.get('metodo', 'probabilidade_empirica'),  # Método padrão
+        bet_data['expected_value'],
+        bet_data['edge'],
+        bet_data.get('empirical_prob'),
+        bet_data.get('implied_prob'),
+        bet_data.get('historical_mean'),
+        bet_data.get('historical_std'),
+        bet_data.get('historical_games'),
+        status,
+        now,
+        now,
+        metadata_json
+    )
+
+
 def save_bet(bet_data: Dict, db_path: Optional[Path] = None) -> Optional[int]:
     """
     Salva uma aposta no banco de dados.
@@ -184,46 +294,7 @@ def save_bet(bet_data: Dict, db_path: Optional[Path] = None) -> Optional[int]:
         return None  # Ja existe, nao salva duplicata
     
     now = datetime.now().isoformat()
-    
-    # Prepara metadata JSON
-    metadata = bet_data.get('metadata', {})
-    if isinstance(metadata, dict):
-        metadata_json = json.dumps(metadata)
-    else:
-        metadata_json = metadata
-    
-    cursor.execute("""
-        INSERT INTO bets (
-            matchup_id, game_date, league_name, home_team, away_team,
-            market_type, mapa, line_value, side, odd_decimal,
-            metodo, expected_value, edge, empirical_prob, implied_prob,
-            historical_mean, historical_std, historical_games,
-            status, created_at, updated_at, metadata
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        bet_data['matchup_id'],
-        bet_data['game_date'],
-        bet_data['league_name'],
-        bet_data['home_team'],
-        bet_data['away_team'],
-        bet_data['market_type'],
-        bet_data.get('mapa'),  # Mapa do jogo (pode ser None)
-        bet_data.get('line_value'),
-        bet_data['side'],
-        bet_data['odd_decimal'],
-        bet_data.get('metodo', 'probabilidade_empirica'),  # Método padrão
-        bet_data['expected_value'],
-        bet_data['edge'],
-        bet_data.get('empirical_prob'),
-        bet_data.get('implied_prob'),
-        bet_data.get('historical_mean'),
-        bet_data.get('historical_std'),
-        bet_data.get('historical_games'),
-        bet_data.get('status', 'pending'),
-        now,
-        now,
-        metadata_json
-    ))
+    cursor.execute(_INSERT_BET_SQL, _bet_insert_params(bet_data, now, bet_data.get('status', 'pending')))
     
     bet_id = cursor.lastrowid
     conn.commit()
@@ -232,6 +303,54 @@ def save_bet(bet_data: Dict, db_path: Optional[Path] = None) -> Optional[int]:
     return bet_id
 
 
+def upsert_bet_placed(bet_data: Dict, db_path: Optional[Path] = None,
+                      conn: Optional[sqlite3.Connection] = None) -> Optional[int]:
+    """
+    Insere a aposta já como 'feita' ou, se ela existir, marca como 'feita' quando ainda pending.
+    Um único INSERT ... ON CONFLICT ... RETURNING (usa idx_bet_identity).
+    
+    Args:
+        conn: conexão já aberta (não é fechada aqui); se None, abre uma em db_path
+        
+    Returns:
+        ID da aposta (nova ou existente; status won/lost/void é preservado), ou None
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(_db_path(db_path))
+    cursor = conn.cursor()
+    now = datetime.now().isoformat()
+    params = _bet_insert_params(bet_data, now, 'feita')
+    try:
+        cursor.execute(_INSERT_BET_SQL + """
+            ON CONFLICT(matchup_id, market_type, COALESCE(mapa, -1), line_value, side, metodo)
+            DO UPDATE SET
+                status = CASE WHEN status = 'pending' THEN 'feita' ELSE status END,
+                updated_at = CASE WHEN status = 'pending' THEN excluded.updated_at ELSE updated_at END
+            RETURNING id
+        """, params)
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        # Banco sem idx_bet_identity (duplicatas antigas) ou SQLite < 3.35: busca + update/insert
+        cursor.execute("""
+            SELECT id, status FROM bets
+            WHERE matchup_id = ? AND market_type = ?
+              AND COALESCE(mapa, -1) = COALESCE(?, -1)
+              AND line_value = ? AND side = ? AND metodo = ?
+            ORDER BY id DESC LIMIT 1
+        """, (params[0], params[5], params[6], params[7], params[8], params[10]))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(_INSERT_BET_SQL, params)
+            row = (cursor.lastrowid,)
+        elif row[1] == 'pending':
+            cursor.execute("UPDATE bets SET status = 'feita', updated_at = ? WHERE id = ?", (now, row[0]))
+    conn.commit()
+    if own_conn:
+        conn.close()
+    return int(row[0]) if row else None
+
+
 def get_pending_bets(db_path: Optional[Path] = None) -> List[Dict]:
     """Retorna todas as apostas pendentes (sem resultado, status pending)."""
     conn = sqlite3.connect(_db_path(db_path))
@@ -250,17 +369,18 @@ def get_pending_bets(db_path: Optional[Path] = None) -> List[Dict]:
     return bets
 
 
-def get_placed_bets(db_path: Optional[Path] = None) -> List[Dict]:
-    """Retorna apostas marcadas como 'feita' (usuário já apostou, aguardando resultado)."""
+def get_placed_bets(db_path: Optional[Path] = None, min_ev: Optional[float] = None) -> List[Dict]:
+    """Retorna apostas marcadas como 'feita' (usuário já apostou, aguardando resultado); min_ev filtra no SQL."""
     conn = sqlite3.connect(_db_path(db_path))
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT * FROM bets
-        WHERE status = 'feita'
-        ORDER BY game_date ASC
-    """)
+    sql = "SELECT * FROM bets WHERE status = 'feita'"
+    params = []
+    if min_ev is not None:
+        sql += " AND COALESCE(expected_value, 0) >= ?"
+        params.append(min_ev)
+    cursor.execute(sql + " ORDER BY game_date ASC", params)
     
     bets = [dict(row) for row in cursor.fetchall()]
     conn.close()
@@ -268,9 +388,11 @@ def get_placed_bets(db_path: Optional[Path] = None) -> List[Dict]:
     return bets
 
 
-def get_resolved_bets(statuses: tuple[str, ...] = ("won", "lost", "void"), db_path: Optional[Path] = None) -> List[Dict]:
+def get_resolved_bets(statuses: tuple[str, ...] = ("won", "lost", "void"), db_path: Optional[Path] = None,
+                      min_ev: Optional[float] = None) -> List[Dict]:
     """
     Retorna apostas resolvidas (status won/lost/void).
+    min_ev: se informado, filtra expected_value no próprio SQL.
 
     Observação: no fluxo do app, apostas só viram won/lost/void depois de serem
     marcadas como 'feita' e terem sido atualizadas pelo `ResultsUpdater`.
@@ -280,13 +402,18 @@ def get_resolved_bets(statuses: tuple[str, ...] = ("won", "lost", "void"), db_pa
     cursor = conn.cursor()
 
     placeholders = ",".join(["?"] * len(statuses))
+    params = list(statuses)
+    ev_clause = ""
+    if min_ev is not None:
+        ev_clause = "AND COALESCE(expected_value, 0) >= ?"
+        params.append(min_ev)
     cursor.execute(
         f"""
         SELECT * FROM bets
-        WHERE status IN ({placeholders})
+        WHERE status IN ({placeholders}) {ev_clause}
         ORDER BY game_date ASC
         """,
-        tuple(statuses),
+        params,
     )
 
     bets = [dict(row) for row in cursor.fetchall()]
@@ -294,23 +421,35 @@ def get_resolved_bets(statuses: tuple[str, ...] = ("won", "lost", "void"), db_pa
     return bets
 
 
-def get_bets_by_date(date_start: str, date_end: str, db_path: Optional[Path] = None) -> List[Dict]:
+def get_bets_by_date(date_start: str, date_end: Optional[str] = None, db_path: Optional[Path] = None,
+                     min_ev: Optional[float] = None, metodo: Optional[Iterable[str]] = None,
+                     exclude_metodo: Optional[Iterable[str]] = None) -> List[Dict]:
     """
     Retorna apostas com game_date entre date_start e date_end (inclusive).
-    date_start/date_end: 'YYYY-MM-DD'. game_date pode ser ISO com T.
+    date_start/date_end: 'YYYY-MM-DD'; date_end=None => sem limite superior.
+    game_date pode ser ISO com T; a comparação direta de texto usa idx_game_date.
+    min_ev / metodo / exclude_metodo filtram no próprio SQL (metodo sem diferenciar maiúsculas).
     """
     conn = sqlite3.connect(_db_path(db_path))
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT * FROM bets
-        WHERE SUBSTR(REPLACE(game_date, 'T', ' '), 1, 10) >= ?
-          AND SUBSTR(REPLACE(game_date, 'T', ' '), 1, 10) <= ?
-        ORDER BY game_date ASC, id ASC
-    """, (date_start, date_end))
-    
-    bets = [dict(row) for row in cursor.fetchall()]
+    sql = "SELECT * FROM bets WHERE game_date >= ?"
+    params = [date_start]
+    if date_end is not None:
+        sql += " AND game_date < date(?, '+1 day')"
+        params.append(date_end)
+    if min_ev is not None:
+        sql += " AND COALESCE(expected_value, 0) >= ?"
+        params.append(min_ev)
+    for values, op in ((metodo, "IN"), (exclude_metodo, "NOT IN")):
+        if values is not None:
+            values = [str(v).lower() for v in values]
+            sql += f" AND LOWER(COALESCE(metodo, '')) {op} ({','.join('?' * len(values))})"
+            params.extend(values)
+    cursor.execute(sql + " ORDER BY game_date ASC, id ASC", params)
+    
+    bets = fetch_dicts(cursor)
     conn.close()
     
     return bets
@@ -6,11 +6,18 @@ Usado pelo app Streamlit na aba "Estatísticas (EV15+)".
 from __future__ import annotations
 
 import sqlite3
+import sys
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
+# Mesmo padrão do app: módulos de bets_tracker via sys.path
+_BETS_TRACKER = str(Path(__file__).parent / "bets_tracker")
+if _BETS_TRACKER not in sys.path:
+    sys.path.insert(0, _BETS_TRACKER)
+from bets_database import fetch_dicts  # noqa: E402
+
 EV_MIN = 0.15
 
 
@@ -71,7 +78,7 @@ def fetch_resolved_ev15(db_path: Path) -> list[dict[str, Any]]:
         """,
         (EV_MIN,),
     )
-    rows = [dict(r) for r in cur.fetchall()]
+    rows = fetch_dicts(cur)
     conn.close()
     return rows
 
@@ -84,13 +91,11 @@ def build_df(bets: list[dict[str, Any]]) -> pd.DataFrame:
     records = []
     for b in bets:
         odd = float(b.get("odd_decimal") or 0)
-        game_date_raw = b.get("game_date")
-        game_dt = pd.to_datetime(game_date_raw, errors="coerce")
         records.append({
             "id": b.get("id"),
             "matchup_id": b.get("matchup_id"),
-            "game_date": game_date_raw,
-            "game_date_day": game_dt.date().isoformat() if pd.notna(game_dt) else None,
+            "game_date": b.get("game_date"),
+            "game_date_day": None,  # preenchido abaixo, a partir de game_date já parseado
             "league_name": (b.get("league_name") or "").strip() or "—",
             "side": (b.get("side") or "").strip().upper() or "—",
             "odd_decimal": odd,
@@ -105,7 +110,20 @@ def build_df(bets: list[dict[str, Any]]) -> pd.DataFrame:
             "lucro_u": _lucro_u(b),
             "expected_value": float(b.get("expected_value") or 0),
         })
-    return pd.DataFrame(records)
+    df = pd.DataFrame(records)
+    # Colunas numéricas já em float64 na carga: o app soma/ordena direto, sem pd.to_numeric
+    df = df.astype({"odd_decimal": "float64", "expected_value": "float64", "lucro_u": "float64"})
+    # game_date parseado de uma vez pelo horário de parede: o coletor grava start_time cru (com Z,
+    # +hh:mm ou sem fuso); descartar o offset mantém o dia igual ao prefixo gravado, como o resto
+    # do app (game_date.str[:10]), e a coluna sai datetime64, com .dt
+    df["game_date"] = pd.to_datetime(
+        df["game_date"].astype("string").str.replace(r"(Z|[+-]\d{2}:?\d{2})$", "", regex=True),
+        errors="coerce", format="ISO8601",
+    )
+    # Dia já parseado (datetime64 à meia-noite), para filtros por período sem reparsear game_date_day
+    df["game_date_day_d"] = df["game_date"].dt.normalize()
+    df["game_date_day"] = df["game_date_day_d"].dt.strftime("%Y-%m-%d")
+    return df
 
 
 def _avg_odd_wins(grp: pd.DataFrame) -> float | None: